@@ -1,10 +1,50 @@
 import streamlit as st
-import pandas as pd
+import re
+import json
+import hashlib
+import logging
 import numpy as np
-import plotly.express as px
+# plotly.graph_objects는 streamlit을 불러올 때 이미 함께 불러오므로 지연 import 이점이 없음
 import plotly.graph_objects as go
-import random
-import requests
+from collections import OrderedDict
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from pipeline import (
+    ADMIN_PANEL,
+    ANALYSIS_DEADLINE,
+    CONSENSUS_METHODS,
+    CONSENSUS_TEXT_PARSE_WEIGHT,
+    DESCRIPTION_MAX_TOKENS,
+    ConsensusBuilder,
+    HTTP_PREWARM,
+    METRICS,
+    MEDIA_CHANNELS,
+    OPTIMIZATION_OBJECTIVES,
+    SIMULATION_GRANULARITIES,
+    SIMULATION_GRANULARITY,
+    SIMULATION_HORIZON_DAYS,
+    SIMULATION_PERCENTILES,
+    SIMULATION_WEEKLY_BUDGET,
+    STREAM_RESPONSES,
+    SWEEP_LOWER_IS_BETTER,
+    SWEEP_METRICS,
+    build_analysis_prompt,
+    configure_secrets,
+    downsample_lttb,
+    estimate_analysis,
+    extract_partial_analysis,
+    generate_simulation_results,
+    get_analysis_cache,
+    get_consensus_weight,
+    get_job_manager,
+    is_model_available,
+    optimize_media_distribution,
+    prewarm_connections,
+    run_scenario_sweep,
+    set_error_handler,
+    start_metrics_server,
+    time_stage,
+    trim_to_tokens
+)
 
 # 페이지 설정
 st.set_page_config(
@@ -14,290 +54,41 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# API 설정 상태 체크
-def check_api_keys():
-    """API 키가 설정되어 있는지 확인하고 상태를 세션에 저장"""
-    try:
-        if "OPENAI_API_KEY" in st.secrets and st.secrets["OPENAI_API_KEY"]:
-            st.session_state.openai_available = True
-        else:
-            st.session_state.openai_available = False
-            
-        if "ANTHROPIC_API_KEY" in st.secrets and st.secrets["ANTHROPIC_API_KEY"]:
-            st.session_state.anthropic_available = True
-        else:
-            st.session_state.anthropic_available = False
-            
-        if "GOOGLE_API_KEY" in st.secrets and st.secrets["GOOGLE_API_KEY"]:
-            st.session_state.gemini_available = True
-        else:
-            st.session_state.gemini_available = False
-            
-        if "DEEPSEEK_API_KEY" in st.secrets and st.secrets["DEEPSEEK_API_KEY"]:
-            st.session_state.deepseek_available = True
-        else:
-            st.session_state.deepseek_available = False
-            
-        if "GROK_API_KEY" in st.secrets and st.secrets["GROK_API_KEY"]:
-            st.session_state.grok_available = True
-        else:
-            st.session_state.grok_available = False
-    except Exception as e:
-        st.error(f"API 키 확인 중 오류가 발생했습니다: {str(e)}")
-        st.session_state.openai_available = False
-        st.session_state.anthropic_available = False
-        st.session_state.gemini_available = False
-        st.session_state.deepseek_available = False
-        st.session_state.grok_available = False
-
-# API 호출 함수들 - 직접 HTTP 요청 사용
-def call_openai_api(prompt):
-    """OpenAI API를 직접 HTTP 요청으로 호출"""
-    try:
-        api_key = st.secrets["OPENAI_API_KEY"]
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-        payload = {
-            "model": "gpt-4",
-            "messages": [
-                {"role": "system", "content": "당신은 광고 및 마케팅 전략 전문가입니다."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.7
-        }
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=payload
-        )
-        if response.status_code == 200:
-            return response.json()["choices"][0]["message"]["content"]
-        else:
-            error_message = f"OpenAI API 호출 오류: {response.status_code}"
-            if response.status_code == 401:
-                error_message = "OpenAI API 키가 유효하지 않거나 만료되었습니다. API 키를 확인해주세요."
-            elif response.status_code == 400:
-                error_details = response.json().get("error", {}).get("message", "알 수 없는 오류")
-                error_message = f"OpenAI API 요청 오류: {error_details}"
-            elif response.status_code == 429:
-                error_message = "OpenAI API 요청 한도를 초과했습니다. 잠시 후 다시 시도해주세요."
-            
-            st.error(error_message)
-            return f"오류: {error_message}"
-    except Exception as e:
-        st.error(f"OpenAI API 호출 중 오류 발생: {str(e)}")
-        return f"오류: {str(e)}"
-
-def call_anthropic_api(prompt):
-    """Anthropic API를 직접 HTTP 요청으로 호출"""
-    try:
-        api_key = st.secrets["ANTHROPIC_API_KEY"]
-        headers = {
-            "Content-Type": "application/json",
-            "X-API-Key": api_key,
-            "anthropic-version": "2023-01-01"
-        }
-        payload = {
-            "model": "claude-3-opus-20240229",
-            "max_tokens": 2000,
-            "temperature": 0.7,
-            "system": "당신은 광고 및 마케팅 전략 전문가입니다.",
-            "messages": [
-                {"role": "user", "content": prompt}
-            ]
-        }
-        response = requests.post(
-            "https://api.anthropic.com/v1/messages",
-            headers=headers,
-            json=payload
-        )
-        if response.status_code == 200:
-            return response.json()["content"][0]["text"]
-        else:
-            error_message = f"Anthropic API 호출 오류: {response.status_code}"
-            if response.status_code == 401:
-                error_message = "Anthropic API 키가 유효하지 않거나 만료되었습니다. API 키를 확인해주세요."
-            elif response.status_code == 400:
-                error_details = response.json().get("error", {}).get("message", "알 수 없는 오류")
-                error_message = f"Anthropic API 요청 오류: {error_details}"
-            elif response.status_code == 429:
-                error_message = "Anthropic API 요청 한도를 초과했습니다. 잠시 후 다시 시도해주세요."
-            
-            st.error(error_message)
-            return f"오류: {error_message}"
-    except Exception as e:
-        st.error(f"Anthropic API 호출 중 오류 발생: {str(e)}")
-        return f"오류: {str(e)}"
-
-def call_gemini_api(prompt):
-    """Google Gemini API를 직접 HTTP 요청으로 호출"""
-    try:
-        api_key = st.secrets["GOOGLE_API_KEY"]
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={api_key}"
-        
-        headers = {
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "contents": [{
-                "parts": [{
-                    "text": prompt
-                }]
-            }],
-            "generationConfig": {
-                "temperature": 0.7,
-                "maxOutputTokens": 2048
-            }
-        }
-        
-        response = requests.post(url, headers=headers, json=payload)
-        
-        if response.status_code == 200:
-            result = response.json()
-            try:
-                return result["candidates"][0]["content"]["parts"][0]["text"]
-            except (KeyError, IndexError) as e:
-                st.error(f"Gemini API 응답 파싱 오류: {str(e)}")
-                return f"Gemini API 응답 파싱 오류: {str(e)}"
-        else:
-            error_message = f"Gemini API 호출 오류: {response.status_code}"
-            if response.status_code == 400:
-                error_details = response.json().get("error", {}).get("message", "알 수 없는 오류")
-                error_message = f"Gemini API 요청 오류: {error_details}"
-            elif response.status_code == 403:
-                error_message = "Gemini API 키가 유효하지 않거나 권한이 없습니다. API 키를 확인해주세요."
-            elif response.status_code == 429:
-                error_message = "Gemini API 요청 한도를 초과했습니다. 잠시 후 다시 시도해주세요."
-            
-            st.error(error_message)
-            return f"오류: {error_message}"
-    except Exception as e:
-        st.error(f"Gemini API 호출 중 오류 발생: {str(e)}")
-        return f"오류: {str(e)}"
+# 백그라운드 분석 작업의 진행 상황을 조회해 화면을 갱신하는 간격 (초)
+JOB_POLL_INTERVAL = 0.15
+# JSON 형식 응답에서 analysis 값이 아직 도착하지 않았을 때 스트리밍 탭에 표시하는 문구
+STREAM_PENDING_TEXT = "_분석 결과를 생성하는 중입니다..._"
 
-def call_deepseek_api(prompt):
-    """DeepSeek API를 직접 HTTP 요청으로 호출"""
-    try:
-        api_key = st.secrets["DEEPSEEK_API_KEY"]
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-        payload = {
-            "model": "deepseek-chat",
-            "messages": [
-                {"role": "system", "content": "당신은 광고 및 마케팅 전략 전문가입니다."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.7
-        }
-        response = requests.post(
-            "https://api.deepseek.com/v1/chat/completions",
-            headers=headers,
-            json=payload
-        )
-        if response.status_code == 200:
-            return response.json()["choices"][0]["message"]["content"]
-        else:
-            error_message = f"DeepSeek API 호출 오류: {response.status_code}"
-            if response.status_code == 401:
-                error_message = "DeepSeek API 키가 유효하지 않거나 만료되었습니다. API 키를 확인해주세요."
-            elif response.status_code == 400:
-                error_details = response.json().get("error", {}).get("message", "알 수 없는 오류")
-                error_message = f"DeepSeek API 요청 오류: {error_details}"
-            elif response.status_code == 429:
-                error_message = "DeepSeek API 요청 한도를 초과했습니다. 잠시 후 다시 시도해주세요."
-            
-            st.error(error_message)
-            return f"오류: {error_message}"
-    except Exception as e:
-        st.error(f"DeepSeek API 호출 중 오류 발생: {str(e)}")
-        return f"오류: {str(e)}"
+# 모델별 API 키 사용 가능 여부가 저장되는 세션 상태 키
+MODEL_STATE_KEYS = {
+    "ChatGPT": "openai_available",
+    "Claude": "anthropic_available",
+    "Gemini": "gemini_available",
+    "DeepSeek": "deepseek_available",
+    "Grok": "grok_available"
+}
 
-def call_grok_api(prompt):
-    """Grok API를 직접 HTTP 요청으로 호출"""
-    try:
-        api_key = st.secrets["GROK_API_KEY"]
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-        payload = {
-            "model": "grok-1",
-            "messages": [
-                {"role": "system", "content": "당신은 광고 및 마케팅 전략 전문가입니다. 독특하고 창의적인 시각으로 분석해주세요."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.8
-        }
-        response = requests.post(
-            "https://api.x.ai/v1/chat/completions",
-            headers=headers,
-            json=payload
-        )
-        if response.status_code == 200:
-            return response.json()["choices"][0]["message"]["content"]
-        else:
-            error_message = f"Grok API 호출 오류: {response.status_code}"
-            if response.status_code == 401:
-                error_message = "Grok API 키가 유효하지 않거나 만료되었습니다. API 키를 확인해주세요."
-            elif response.status_code == 400:
-                error_details = response.json().get("error", {}).get("message", "알 수 없는 오류")
-                error_message = f"Grok API 요청 오류: {error_details}"
-            elif response.status_code == 429:
-                error_message = "Grok API 요청 한도를 초과했습니다. 잠시 후 다시 시도해주세요."
-            
-            st.error(error_message)
-            return f"오류: {error_message}"
-    except Exception as e:
-        st.error(f"Grok API 호출 중 오류 발생: {str(e)}")
-        return f"오류: {str(e)}"
+# 모델별 API 키 설정 여부 (프로세스당 한 번 확인하고 이후 rerun과 세션에서 재사용)
+@st.cache_resource(show_spinner=False)
+def get_api_key_status():
+    return {
+        state_key: bool(is_model_available(model_name))
+        for model_name, state_key in MODEL_STATE_KEYS.items()
+    }
 
-# AI 모델 호출 함수 (통합 인터페이스)
-def get_ai_analysis(prompt, model_name):
-    """모델 유형에 따라 적절한 API 호출 함수를 선택하여 실행"""
+# API 설정 상태 체크
+def check_api_keys():
+    """API 키가 설정되어 있는지 확인하고 상태를 세션에 저장 (세션당 한 번)"""
+    if "api_keys_checked" in st.session_state:
+        return
     try:
-        if model_name == "ChatGPT":
-            if not st.session_state.openai_available:
-                st.error("OpenAI API 설정이 필요합니다.")
-                return "OpenAI API 설정이 필요합니다. API 키를 확인해주세요."
-            return call_openai_api(prompt)
-        
-        elif model_name == "Claude":
-            if not st.session_state.anthropic_available:
-                st.error("Anthropic API 설정이 필요합니다.")
-                return "Anthropic API 설정이 필요합니다. API 키를 확인해주세요."
-            return call_anthropic_api(prompt)
-        
-        elif model_name == "Gemini":
-            if not st.session_state.gemini_available:
-                st.error("Google Gemini API 설정이 필요합니다.")
-                return "Google Gemini API 설정이 필요합니다. API 키를 확인해주세요."
-            return call_gemini_api(prompt)
-        
-        elif model_name == "DeepSeek":
-            if not st.session_state.deepseek_available:
-                st.error("DeepSeek API 설정이 필요합니다.")
-                return "DeepSeek API 설정이 필요합니다. API 키를 확인해주세요."
-            return call_deepseek_api(prompt)
-        
-        elif model_name == "Grok":
-            if not st.session_state.grok_available:
-                st.error("Grok API 설정이 필요합니다.")
-                return "Grok API 설정이 필요합니다. API 키를 확인해주세요."
-            return call_grok_api(prompt)
-        
-        else:
-            st.error(f"지원되지 않는 모델: {model_name}")
-            return f"지원되지 않는 모델: {model_name}"
-    
+        status = get_api_key_status()
     except Exception as e:
-        error_msg = f"{model_name} 모델 호출 중 오류가 발생했습니다: {str(e)}"
-        st.error(error_msg)
-        return f"오류: {error_msg}"
+        st.error(f"API 키 확인 중 오류가 발생했습니다: {str(e)}")
+        status = {state_key: False for state_key in MODEL_STATE_KEYS.values()}
+    for state_key, available in status.items():
+        st.session_state[state_key] = available
+    st.session_state.api_keys_checked = True
 
 # 캠페인 정보 입력 화면에서 적절한 모델 목록 가져오기
 def get_available_models():
@@ -319,12 +110,40 @@ def get_available_models():
     
     return available_models
 
+# 파이프라인 오류는 스크립트 컨텍스트가 있는 스레드에서만 화면에 표시 (그 외에는 로그로 남김)
+# 백그라운드 분석 작업의 제공자 오류는 작업의 failures에 남으므로 watch_parallel_job/watch_race_job에서 표시
+def show_pipeline_error(message):
+    if get_script_run_ctx(suppress_warning=True) is None:
+        logging.getLogger(__name__).warning(message)
+    else:
+        st.error(message)
+
+# 파이프라인이 st.secrets의 API 키를 사용하고 오류를 화면에 표시하도록 연결 (프로세스당 한 번)
+@st.cache_resource(show_spinner=False)
+def init_pipeline():
+    try:
+        configure_secrets(dict(st.secrets))
+    except Exception:
+        pass
+    set_error_handler(show_pipeline_error)
+    
+    # 사용 가능한 모델의 API 서버 연결 미리 준비
+    if HTTP_PREWARM:
+        prewarm_connections(tuple(
+            model_name for model_name in MODEL_STATE_KEYS if is_model_available(model_name)
+        ))
+    
+    # METRICS_PORT가 설정되어 있으면 Prometheus가 수집할 /metrics 서버 시작
+    start_metrics_server()
+    return True
+
+init_pipeline()
+
 # API 키 확인
 check_api_keys()
 
-# CSS 스타일 적용 (Google Performance Max 스타일 + 다크 모드 호환)
-st.markdown("""
-<style>
+# CSS 스타일 (Google Performance Max 스타일 + 다크 모드 호환)
+PAGE_STYLE = """
     /* 기본 스타일링 (라이트 및 다크 모드 호환) */
     .main {
         padding: 1rem;
@@ -424,8 +243,18 @@ st.markdown("""
         border-radius: 4px 4px 0px 0px;
         margin-right: 0px;
     }
-</style>
-""", unsafe_allow_html=True)
+"""
+
+# 주석과 공백을 걷어낸 CSS를 한 번만 만들어 두고 rerun마다 재사용 (페이지에서 사라지지 않도록 매번 출력은 필요)
+@st.cache_resource(show_spinner=False)
+def get_page_style():
+    css = re.sub(r"/\*.*?\*/", "", PAGE_STYLE, flags=re.S)
+    css = re.sub(r"\s*([{};>,])\s*", r"\1", css)
+    css = re.sub(r"\s+", " ", css).strip()
+    return f"<style>{css}</style>"
+
+# CSS 스타일 적용
+st.markdown(get_page_style(), unsafe_allow_html=True)
 
 # 초기 세션 상태 설정
 if "step" not in st.session_state:
@@ -441,6 +270,8 @@ if "analysis_results" not in st.session_state:
     st.session_state.analysis_results = {}
 if "simulation_results" not in st.session_state:
     st.session_state.simulation_results = None
+if "analysis_consensus" not in st.session_state:
+    st.session_state.analysis_consensus = None
 
 # 헤더 섹션
 def render_header():
@@ -460,6 +291,7 @@ def render_header():
                 }
                 st.session_state.analysis_results = {}
                 st.session_state.simulation_results = None
+                st.session_state.analysis_consensus = None
                 st.rerun()
 
 # 단계 표시 함수
@@ -482,162 +314,472 @@ def show_progress():
                 st.markdown(f"<div style='text-align: center; color: rgba(150, 150, 150, 0.8); font-weight: 400;'>{step}</div>", unsafe_allow_html=True)
     st.markdown("<br>", unsafe_allow_html=True)
 
-# 광고 분석 결과 처리 및 파싱
-def parse_ad_recommendations(analysis_text):
-    """AI 분석 텍스트에서 키 정보를 추출합니다."""
-    try:
-        lines = analysis_text.strip().split('\n')
-        
-        # 기본값 설정
-        ad_type = "균형적"
-        media_distribution = {
-            "Google": 25,
-            "Meta": 25,
-            "Naver": 20,
-            "Kakao": 20,
-            "TTD": 10
-        }
-        
-        # 광고 유형 찾기 (검색 vs 디스플레이)
-        for line in lines:
-            if "검색광고" in line and ("추천" in line or "적합" in line or "적절" in line):
-                ad_type = "검색광고"
-                break
-            elif "디스플레이광고" in line and ("추천" in line or "적합" in line or "적절" in line):
-                ad_type = "디스플레이광고"
-                break
-            
-        # 매체별 예산 배분 비율 시도
-        try:
-            # 매체 배분 섹션 찾기
-            distribution_section = False
-            for i, line in enumerate(lines):
-                if ("예산 배분" in line or "예산 분배" in line or "비율" in line) and ("매체" in line or "Google" in line or "Meta" in line):
-                    distribution_section = True
-                    # 다음 5-10줄 검사
-                    for j in range(i+1, min(i+10, len(lines))):
-                        line_j = lines[j]
-                        
-                        # Google/구글 비율 찾기
-                        if any(term in line_j for term in ["Google", "구글"]):
-                            for percent in range(5, 96, 5):  # 5% ~ 95% 스캔
-                                if f"{percent}%" in line_j or f"{percent} %" in line_j:
-                                    media_distribution["Google"] = percent
-                                    break
-                        
-                        # Meta/페이스북 비율 찾기
-                        if any(term in line_j for term in ["Meta", "페이스북", "Facebook", "인스타그램", "Instagram"]):
-                            for percent in range(5, 96, 5):
-                                if f"{percent}%" in line_j or f"{percent} %" in line_j:
-                                    media_distribution["Meta"] = percent
-                                    break
-                        
-                        # Naver/네이버 비율 찾기
-                        if any(term in line_j for term in ["Naver", "네이버"]):
-                            for percent in range(5, 96, 5):
-                                if f"{percent}%" in line_j or f"{percent} %" in line_j:
-                                    media_distribution["Naver"] = percent
-                                    break
-                        
-                        # Kakao/카카오 비율 찾기
-                        if any(term in line_j for term in ["Kakao", "카카오"]):
-                            for percent in range(5, 96, 5):
-                                if f"{percent}%" in line_j or f"{percent} %" in line_j:
-                                    media_distribution["Kakao"] = percent
-                                    break
-                        
-                        # TTD 비율 찾기
-                        if "TTD" in line_j:
-                            for percent in range(5, 96, 5):
-                                if f"{percent}%" in line_j or f"{percent} %" in line_j:
-                                    media_distribution["TTD"] = percent
-                                    break
-                    break
-        except Exception as e:
-            # 파싱 실패 시 기본값 유지
-            st.warning(f"매체 배분 비율 파싱 중 오류: {str(e)}")
-        
-        # 합이 100%가 되도록 조정
-        total = sum(media_distribution.values())
-        if total != 100:
-            scale_factor = 100 / total
-            for key in media_distribution:
-                media_distribution[key] = round(media_distribution[key] * scale_factor)
-            
-            # 반올림으로 인한 오차 보정
-            diff = 100 - sum(media_distribution.values())
-            if diff != 0:
-                # 가장 큰 값 찾아서 차이 더하기
-                max_key = max(media_distribution, key=media_distribution.get)
-                media_distribution[max_key] += diff
-        
-        return {
-            "ad_type": ad_type,
-            "media_distribution": media_distribution
-        }
-    except Exception as e:
-        st.error(f"분석 결과 파싱 중 오류 발생: {str(e)}")
-        return {
-            "ad_type": "균형적",
-            "media_distribution": {
-                "Google": 25,
-                "Meta": 25,
-                "Naver": 20,
-                "Kakao": 20,
-                "TTD": 10
-            }
-        }
-
-# 시뮬레이션 결과 생성
-def generate_simulation_results(campaign_data, ad_type):
-    # 광고 유형에 따라 시뮬레이션 결과 조정
-    if ad_type == "검색광고":
-        base_ctr = 0.05  # 클릭률 (평균 5%)
-        base_conversion = 0.04  # 전환율 (평균 4%)
-        base_reach = 0.4  # 도달률 (40%)
-    elif ad_type == "디스플레이광고":
-        base_ctr = 0.02  # 클릭률 (평균 2%)
-        base_conversion = 0.02  # 전환율 (평균 2%)
-        base_reach = 0.7  # 도달률 (70%)
+# 단계 3 차트/표 메모 - 입력 내용의 해시를 키로 세션에 보관해 rerun 사이에 재사용
+# (세션마다 따로 두므로 Styler처럼 화면 출력 시 상태가 바뀌는 객체도 다른 세션과 공유하지 않음)
+STEP_3_MEMO_ENTRIES = 32
+
+def content_hash(data):
+    """JSON으로 직렬화할 수 있는 데이터의 내용 해시 (SHA-256)"""
+    return hashlib.sha256(
+        json.dumps(data, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+def memoize_view(kind, key, build):
+    """(종류, 키)로 메모된 차트/표가 있으면 반환하고, 없으면 build()로 만들어 저장 (오래된 항목부터 정리)"""
+    memo = st.session_state.setdefault("step_3_memo", OrderedDict())
+    memo_key = (kind, key)
+    if memo_key in memo:
+        memo.move_to_end(memo_key)
+        return memo[memo_key]
+    view = build()
+    memo[memo_key] = view
+    while len(memo) > STEP_3_MEMO_ENTRIES:
+        memo.popitem(last=False)
+    return view
+
+# pandas와 plotly.express는 단계 3을 그릴 때 처음 불러옴 (콜드 스타트 약 1.0초 → 0.5초)
+# 매체별 예산 배분 도넛 차트
+@time_stage("chart_build")
+def build_distribution_pie(media_distribution):
+    import pandas as pd
+    import plotly.express as px
+    
+    media_data = pd.DataFrame({
+        '매체': list(media_distribution.keys()),
+        '비율(%)': list(media_distribution.values())
+    })
+    
+    # 다크 모드 대응 색상 팔레트
+    color_sequence = px.colors.qualitative.Pastel
+    
+    fig = px.pie(media_data, values='비율(%)', names='매체', 
+                color_discrete_sequence=color_sequence,
+                hole=0.4)
+    fig.update_layout(
+        margin=dict(t=0, b=0, l=0, r=0),
+        # 배경 투명하게 설정
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        # 글자색 설정 (다크모드 대응)
+        font=dict(color='rgba(255,255,255,0.85)')
+    )
+    return fig
+
+def render_distribution_pie(media_distribution):
+    fig = memoize_view(
+        "pie", content_hash(media_distribution), lambda: build_distribution_pie(media_distribution)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+# 신뢰 구간 리본 추가 (상한선 다음 하한선을 그려 사이를 채움)
+def add_band_traces(fig, x, upper, lower, color, name, scale=1):
+    fig.add_trace(go.Scattergl(
+        x=x,
+        y=upper * scale,
+        mode='lines',
+        line=dict(width=0, color=color),
+        showlegend=False,
+        hoverinfo='skip'
+    ))
+    fig.add_trace(go.Scattergl(
+        x=x,
+        y=lower * scale,
+        mode='lines',
+        line=dict(width=0, color=color),
+        fill='tonexty',
+        fillcolor=color,
+        name=name,
+        hoverinfo='skip'
+    ))
+
+@st.cache_data(show_spinner=False)
+def get_optimized_distribution(brand_description, ad_type, media_distribution, objective, horizon_days, granularity):
+    """화면 갱신마다 다시 계산하지 않도록 최적화 결과 캐시"""
+    return optimize_media_distribution(
+        {"brand_description": brand_description}, ad_type, media_distribution, objective,
+        horizon_days=horizon_days, granularity=granularity
+    )
+
+# 추천 배분과 최적화 배분 비교 표, 예상 지표 변화 문구 생성
+def build_optimization_view(brand_description, ad_type, media_distribution, objective, horizon_days, granularity):
+    import pandas as pd
+    
+    optimization = get_optimized_distribution(
+        brand_description, ad_type, media_distribution, objective, horizon_days, granularity
+    )
+    table = pd.DataFrame({
+        '매체': MEDIA_CHANNELS,
+        'AI 추천(%)': [media_distribution.get(channel, 0) for channel in MEDIA_CHANNELS],
+        '최적화(%)': [optimization['media_distribution'][channel] for channel in MEDIA_CHANNELS]
+    })
+    baseline_value = optimization['baseline_value']
+    expected_value = optimization['expected_value']
+    if objective == "reach":
+        change_text = f"{baseline_value:.1%} → {expected_value:.1%}"
     else:
-        base_ctr = 0.035  # 중간값
-        base_conversion = 0.03  # 중간값
-        base_reach = 0.55  # 중간값
+        change_text = f"{baseline_value:,.0f} → {expected_value:,.0f}"
+    if baseline_value > 0:
+        change_text += f" ({expected_value / baseline_value - 1:+.1%})"
+    return {
+        "optimization": optimization,
+        "table": table,
+        "caption": f"예상 {OPTIMIZATION_OBJECTIVES[objective]}: {change_text}"
+    }
+
+# 최적화 결과와 비교 표 (같은 입력이면 st.cache_data의 인자 해시와 표 생성 없이 세션 메모에서 재사용)
+def get_optimization_view(brand_description, ad_type, media_distribution, objective, horizon_days, granularity):
+    return memoize_view(
+        "optimization",
+        (content_hash([brand_description, ad_type, media_distribution]), objective, horizon_days, granularity),
+        lambda: build_optimization_view(
+            brand_description, ad_type, media_distribution, objective, horizon_days, granularity
+        )
+    )
+
+# 시뮬레이션 기간 선택지 (일 수 -> 표시 이름)
+SIMULATION_HORIZONS = {84: "12주", 182: "26주", 365: "1년", 730: "2년"}
+
+# 추세 차트에 보내는 최대 점 수 (기간이 길면 LTTB 방식으로 줄여 브라우저로 보내는 데이터와 그리기 시간을 일정하게 유지)
+CHART_MAX_POINTS = 400
+# 매체별 막대 차트의 최대 막대 묶음 수 (넘으면 연속한 기간을 합쳐서 표시)
+CHART_MAX_BARS = 60
+# 이 기간 수 이하일 때만 선 그래프에 점 표시
+CHART_MARKER_PERIODS = 60
+
+# 선택한 (시뮬레이션 기간, 집계 단위) - 위젯을 그리기 전에도 세션 상태의 현재 선택값 사용 (없으면 설정값)
+def get_simulation_period():
+    horizon_days = st.session_state.get("simulation_horizon", SIMULATION_HORIZON_DAYS)
+    granularity = st.session_state.get("simulation_granularity", SIMULATION_GRANULARITY)
+    if horizon_days not in SIMULATION_HORIZONS:
+        horizon_days = next(iter(SIMULATION_HORIZONS))
+    if granularity not in SIMULATION_GRANULARITIES:
+        granularity = next(iter(SIMULATION_GRANULARITIES))
+    return horizon_days, granularity
+
+# 기간별 점 중 차트에 그릴 점만 골라 (x, 선택 함수) 반환 - 밴드는 중앙값 선과 같은 점을 사용
+def downsample_period_series(x, y):
+    indices = downsample_lttb(x, y, CHART_MAX_POINTS)
+    return x[indices], lambda values: np.asarray(values)[indices]
+
+# 시뮬레이션 결과의 요약 지표, 추세/매체별 차트, 표 생성
+@time_stage("chart_build")
+def build_simulation_views(simulation_results, simulation_basis):
+    import pandas as pd
+    import plotly.express as px
     
-    # 브랜드 설명 길이에 따른 조정 (더 자세한 설명 = 더 좋은 타겟팅)
-    description_factor = min(1 + len(campaign_data["brand_description"]) / 1000, 1.2)
+    sim_data = simulation_results.to_dataframe()
+    series = simulation_results.periods
+    period = simulation_results.granularity
+    period_label = SIMULATION_GRANULARITIES[period]
+    period_numbers = series[period]
+    line_mode = 'lines+markers' if simulation_results.period_count <= CHART_MARKER_PERIODS else 'lines'
     
-    # 시뮬레이션 기간 (주)
-    weeks = 12
+    # 주요 지표 요약 (결과를 만들 때 계산해 둔 값 사용)
+    views = {
+        "total_impressions": simulation_results.total_impressions,
+        "avg_ctr": simulation_results.avg_ctr,
+        "total_conversions": simulation_results.total_conversions,
+        "final_reach": simulation_results.final_reach * 100
+    }
     
-    # 주별 데이터 생성
-    weekly_data = []
-    impressions_base = 100000  # 주당 기본 노출수
+    # 다크 모드 대응 색상
+    click_color = '#4285F4'  # 구글 블루
+    conversion_color = '#EA4335'  # 구글 레드
+    reach_color = '#34A853'  # 구글 그린
     
-    for week in range(1, weeks+1):
-        # 시간에 따른 성장 모델링
-        time_factor = 1 + 0.05 * (week - 1)  # 매주 5% 성능 향상
-        if week > 8:  # 8주 이후 점차 정체
-            time_factor = 1 + 0.05 * 7 + 0.02 * (week - 8)
-        
-        # 주요 지표 계산
-        impressions = int(impressions_base * time_factor * random.uniform(0.95, 1.05))
-        reach = base_reach * description_factor * time_factor * random.uniform(0.9, 1.1)
-        ctr = base_ctr * description_factor * time_factor * random.uniform(0.85, 1.15)
-        clicks = int(impressions * ctr)
-        conversions = int(clicks * base_conversion * description_factor * random.uniform(0.9, 1.1))
-        
-        weekly_data.append({
-            "week": week,
-            "impressions": impressions,
-            "reach": min(reach, 0.95),  # 도달률 최대 95%
-            "clicks": clicks,
-            "ctr": ctr,
-            "conversions": conversions,
-            "conversion_rate": conversions / clicks if clicks > 0 else 0
-        })
-    
-    return weekly_data
+    low, _, high = SIMULATION_PERCENTILES
+    band_label = f"{low}~{high} 백분위 구간"
+    
+    fig = go.Figure()
+    click_x, pick_clicks = downsample_period_series(period_numbers, series['clicks'])
+    conversion_x, pick_conversions = downsample_period_series(period_numbers, series['conversions'])
+    add_band_traces(fig, click_x, pick_clicks(series[f'clicks_p{high}']), pick_clicks(series[f'clicks_p{low}']),
+                    'rgba(66,133,244,0.2)', f'클릭 수 {band_label}')
+    add_band_traces(fig, conversion_x, pick_conversions(series[f'conversions_p{high}']),
+                    pick_conversions(series[f'conversions_p{low}']),
+                    'rgba(234,67,53,0.2)', f'전환 수 {band_label}')
+    fig.add_trace(go.Scattergl(
+        x=click_x, 
+        y=pick_clicks(series['clicks']),
+        mode=line_mode,
+        name='클릭 수',
+        marker=dict(color=click_color)
+    ))
+    fig.add_trace(go.Scattergl(
+        x=conversion_x, 
+        y=pick_conversions(series['conversions']),
+        mode=line_mode,
+        name='전환 수',
+        marker=dict(color=conversion_color)
+    ))
+    fig.update_layout(
+        title=f'{period_label}별 클릭 및 전환 추이',
+        xaxis_title=f'{period_label}차',
+        yaxis_title='수치',
+        hovermode='x unified',
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+        # 배경 투명하게 설정
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        # 글자색 설정 (다크모드 대응)
+        font=dict(color='rgba(255,255,255,0.85)')
+    )
+    views["clicks_figure"] = fig
+    
+    fig = go.Figure()
+    reach_x, pick_reach = downsample_period_series(period_numbers, series['reach'])
+    add_band_traces(fig, reach_x, pick_reach(series[f'reach_p{high}']), pick_reach(series[f'reach_p{low}']),
+                    'rgba(52,168,83,0.25)', f'도달률 {band_label}', scale=100)
+    fig.add_trace(go.Scattergl(
+        x=reach_x, 
+        y=pick_reach(series['reach'])*100,
+        mode=line_mode,
+        name='도달률',
+        marker=dict(color=reach_color)
+    ))
+    fig.update_layout(
+        title=f'{period_label}별 도달률 추이',
+        xaxis_title=f'{period_label}차',
+        yaxis_title='도달률 (%)',
+        hovermode='x unified',
+        # 배경 투명하게 설정
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        # 글자색 설정 (다크모드 대응)
+        font=dict(color='rgba(255,255,255,0.85)')
+    )
+    views["reach_figure"] = fig
+    
+    # 기간이 길면 연속한 기간을 묶어 합계로 표시 (막대 x 위치는 묶음의 첫 기간)
+    channels = simulation_results.channels
+    bin_size = -(-simulation_results.period_count // CHART_MAX_BARS)
+    bin_starts = np.arange(0, simulation_results.period_count, bin_size)
+    fig = go.Figure()
+    for channel, period_conversions in zip(channels['channel'], channels['period_conversions']):
+        fig.add_trace(go.Bar(
+            x=period_numbers[bin_starts],
+            y=np.add.reduceat(period_conversions, bin_starts),
+            name=channel
+        ))
+    fig.update_layout(
+        title=(
+            f'{simulation_basis} 추천 배분 기준 매체별 {period_label}별 전환 수'
+            + (f' ({bin_size}{period_label} 합계)' if bin_size > 1 else '')
+        ),
+        xaxis_title=f'{period_label}차',
+        yaxis_title='전환 수',
+        barmode='stack',
+        hovermode='x unified',
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+        colorway=px.colors.qualitative.Pastel,
+        # 배경 투명하게 설정
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        # 글자색 설정 (다크모드 대응)
+        font=dict(color='rgba(255,255,255,0.85)')
+    )
+    views["channels_figure"] = fig
+    
+    channel_table = pd.DataFrame([{
+        '매체': channel['channel'],
+        '예산 비중': channel['share'],
+        '집행 예산(원)': channel['spend'],
+        '노출 수': channel['impressions'],
+        '클릭 수': channel['clicks'],
+        '전환 수': channel['conversions'],
+        '전환 수 범위': f"{channel[f'conversions_p{low}']:,} ~ {channel[f'conversions_p{high}']:,}",
+        '전환 단가(원)': channel['spend'] / channel['conversions'] if channel['conversions'] > 0 else None
+    } for channel in simulation_results.channel_records()])
+    views["channel_table"] = channel_table.style.format({
+        '예산 비중': '{:.0%}',
+        '집행 예산(원)': '{:,.0f}',
+        '노출 수': '{:,.0f}',
+        '클릭 수': '{:,.0f}',
+        '전환 수': '{:,.0f}',
+        '전환 단가(원)': '{:,.0f}'
+    }, na_rep='-')
+    
+    # 먼저 DataFrame의 열 이름을 변경한 후 스타일 적용
+    renamed_data = sim_data[[
+        period, 'impressions', 'reach', 'clicks', 'ctr', 'conversions', 'conversion_rate'
+    ]].rename(columns={
+        period: f'{period_label}차',
+        'impressions': '노출 수',
+        'reach': '도달률',
+        'clicks': '클릭 수',
+        'ctr': '클릭률',
+        'conversions': '전환 수',
+        'conversion_rate': '전환율'
+    })
+    views["weekly_table"] = renamed_data.style.format({
+        '노출 수': '{:,.0f}',
+        '도달률': '{:.1%}',
+        '클릭 수': '{:,.0f}',
+        '클릭률': '{:.2%}',
+        '전환 수': '{:,.0f}',
+        '전환율': '{:.2%}'
+    })
+    return views
+
+# 시나리오 분석 히트맵에 함께 표시할 무작위 배분 후보 수 (지표가 좋은 순)
+SCENARIO_HEATMAP_CANDIDATES = 8
+
+def format_sweep_value(metric, value):
+    if np.isnan(value):
+        return "-"
+    if metric == "reach":
+        return f"{value:.1%}"
+    return f"{value:,.0f}"
+
+# 시나리오 분석 히트맵과 예산 수준별 최적 배분 표 생성
+@time_stage("chart_build")
+def build_scenario_views(sweep, metric, ad_type, description_index):
+    import pandas as pd
+    
+    values = sweep.metrics[metric]
+    scale = 100 if metric == "reach" else 1
+    ad_index = sweep.ad_types.index(ad_type)
+    budget_labels = [f"{budget:,.0f}원" for budget in sweep.weekly_budgets]
+    reference_budget = int(np.argmin(np.abs(sweep.weekly_budgets - SIMULATION_WEEKLY_BUDGET)))
+    colorscale = 'Viridis_r' if metric in SWEEP_LOWER_IS_BETTER else 'Viridis'
+    views = {}
+    
+    # 예산 수준 x 배분: 이름 있는 배분 전체와 기준 예산에서 지표가 좋은 무작위 후보
+    by_budget = values[ad_index, description_index]
+    sampled = by_budget[reference_budget, sweep.named_split_count:]
+    order = np.argsort(np.where(np.isnan(sampled), np.inf, sampled) if metric in SWEEP_LOWER_IS_BETTER else -sampled)
+    columns = list(range(sweep.named_split_count)) + [
+        sweep.named_split_count + i for i in order[:SCENARIO_HEATMAP_CANDIDATES]
+    ]
+    shares_text = [
+        " · ".join(f"{channel} {share:.0%}" for channel, share in zip(MEDIA_CHANNELS, sweep.splits[column]))
+        for column in columns
+    ]
+    fig = go.Figure(go.Heatmap(
+        z=by_budget[:, columns] * scale,
+        x=[sweep.split_labels[column] for column in columns],
+        y=budget_labels,
+        customdata=np.tile(shares_text, (len(budget_labels), 1)),
+        colorscale=colorscale,
+        hovertemplate='주간 예산 %{y}<br>%{x}: %{z:,.1f}<br>%{customdata}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=f'주간 예산과 매체 배분에 따른 {SWEEP_METRICS[metric]}',
+        xaxis_title='매체 배분',
+        yaxis_title='주간 예산',
+        # 배경 투명하게 설정
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        # 글자색 설정 (다크모드 대응)
+        font=dict(color='rgba(255,255,255,0.85)')
+    )
+    views["budget_figure"] = fig
+    
+    # 광고 유형 x 설명 길이: AI 추천 배분, 기준 예산
+    fig = go.Figure(go.Heatmap(
+        z=values[:, :, reference_budget, 0] * scale,
+        x=[f"{length}자" for length in sweep.description_lengths],
+        y=sweep.ad_types,
+        colorscale=colorscale,
+        hovertemplate='%{y}, 설명 %{x}: %{z:,.1f}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=f'광고 유형과 브랜드 설명 길이에 따른 {SWEEP_METRICS[metric]} (AI 추천 배분, 주간 {budget_labels[reference_budget]})',
+        xaxis_title='브랜드 설명 길이',
+        yaxis_title='광고 유형',
+        # 배경 투명하게 설정
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        # 글자색 설정 (다크모드 대응)
+        font=dict(color='rgba(255,255,255,0.85)')
+    )
+    views["ad_type_figure"] = fig
+    
+    best = sweep.best_split_indices(metric)[ad_index, description_index]
+    views["best_table"] = pd.DataFrame([{
+        '주간 예산': budget_labels[b],
+        '최적 배분': sweep.split_labels[split],
+        **{f'{channel}(%)': round(share * 100) for channel, share in zip(MEDIA_CHANNELS, sweep.splits[split])},
+        SWEEP_METRICS[metric]: format_sweep_value(metric, by_budget[b, split]),
+        f'AI 추천 {SWEEP_METRICS[metric]}': format_sweep_value(metric, by_budget[b, 0])
+    } for b, split in enumerate(best)])
+    return views
+
+def render_scenario_sweep(campaign_data, ad_type, media_distribution, objective, horizon_days, granularity):
+    """광고 유형 x 설명 길이 x 예산 수준 x 매체 배분 격자의 기대 성과를 히트맵으로 표시"""
+    optimization = get_optimization_view(
+        campaign_data["brand_description"], ad_type, media_distribution, objective, horizon_days, granularity
+    )["optimization"]
+    # 배분 후보 생성과 격자 해시도 rerun마다 반복하지 않도록 세션 메모에 보관
+    sweep = memoize_view(
+        "sweep",
+        (content_hash([media_distribution, optimization["media_distribution"]]), horizon_days, granularity),
+        lambda: run_scenario_sweep(
+            media_distribution, extra_splits={"최적화": optimization["media_distribution"]},
+            horizon_days=horizon_days, granularity=granularity
+        )
+    )
+    st.caption(
+        f"광고 유형 {len(sweep.ad_types)}종 x 설명 길이 {len(sweep.description_lengths)}단계 x "
+        f"예산 {len(sweep.weekly_budgets)}단계 x 배분 {len(sweep.split_labels)}개, "
+        f"총 {sweep.size:,}개 시나리오의 {SIMULATION_HORIZONS.get(horizon_days, f'{horizon_days}일')} "
+        f"기대 성과입니다 (도달률은 마지막 {SIMULATION_GRANULARITIES[granularity]} 기준)."
+    )
+    metric_col, ad_type_col = st.columns(2)
+    with metric_col:
+        metric = st.selectbox(
+            "지표", list(SWEEP_METRICS.keys()), format_func=lambda key: SWEEP_METRICS[key], key="sweep_metric"
+        )
+    with ad_type_col:
+        sweep_ad_type = st.selectbox(
+            "광고 유형", sweep.ad_types,
+            index=sweep.ad_types.index(ad_type) if ad_type in sweep.ad_types else 0,
+            key="sweep_ad_type"
+        )
+    # 현재 브랜드 설명 길이와 가장 가까운 격자 값 기준
+    description_index = int(np.argmin(np.abs(
+        sweep.description_lengths - min(len(campaign_data["brand_description"]), sweep.description_lengths[-1])
+    )))
+    views = memoize_view(
+        "scenario",
+        (sweep.digest, metric, sweep_ad_type, description_index),
+        lambda: build_scenario_views(sweep, metric, sweep_ad_type, description_index)
+    )
+    st.plotly_chart(views["budget_figure"], use_container_width=True)
+    st.plotly_chart(views["ad_type_figure"], use_container_width=True)
+    st.markdown(f"##### 예산 수준별 최적 배분 (설명 {sweep.description_lengths[description_index]}자 기준)")
+    st.dataframe(views["best_table"], use_container_width=True, hide_index=True)
+
+# 분석 요청 전 예상치 표시 (모델별 토큰 수, 비용, 응답 시간)
+def render_estimate(estimate, race_mode, shortened):
+    import pandas as pd
+    
+    st.markdown("#### 예상 비용 및 응답 시간")
+    st.dataframe(
+        pd.DataFrame([{
+            '모델': model['model'],
+            '입력 토큰': model['input_tokens'],
+            '예상 출력 토큰': model['output_tokens'],
+            '예상 비용(USD)': model['cost'],
+            '예상 응답 시간(초)': model['latency'],
+            '참고한 기록 수': model['samples']
+        } for model in estimate['models']]).style.format({
+            '입력 토큰': '{:,.0f}',
+            '예상 출력 토큰': '{:,.0f}',
+            '예상 비용(USD)': '${:,.4f}',
+            '예상 응답 시간(초)': '{:.1f}'
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+    cost_text = f"최대 ${estimate['total_cost']:,.4f}" if race_mode else f"${estimate['total_cost']:,.4f}"
+    st.caption(
+        f"프롬프트 약 {estimate['prompt_tokens']:,}토큰 · 총 예상 비용 {cost_text} · "
+        f"예상 대기 시간 약 {estimate['max_latency']:.0f}초. 토큰 수는 근사치이며, "
+        "비용과 응답 시간은 기록된 응답이 있으면 그 중앙값을 기준으로 예상합니다."
+    )
+    if shortened:
+        st.info(f"브랜드 설명이 길어 약 {DESCRIPTION_MAX_TOKENS:,}토큰 분량만 보냅니다.")
 
 # 단계 1: 캠페인 정보 입력 화면
 def render_step_1():
@@ -669,21 +811,63 @@ def render_step_1():
                 default=default_models
             )
             
-            submitted = st.form_submit_button("분석 시작", type="primary")
+            race_mode = st.radio(
+                "분석 방식",
+                ["선택한 모든 모델 비교", "가장 빠른 응답 하나만 사용"],
+                help="가장 빠른 응답 모드는 선택한 순서대로 모델을 호출하다가 먼저 도착한 응답 하나로 바로 다음 단계로 넘어갑니다"
+            ) == "가장 빠른 응답 하나만 사용"
             
-            if submitted:
+            bypass_cache = st.checkbox(
+                "저장된 결과를 사용하지 않고 새로 분석",
+                value=False,
+                help="같은 캠페인 정보로 분석한 결과가 있으면 API를 다시 호출하지 않고 저장된 결과를 보여줍니다"
+            )
+            
+            shorten_description = st.checkbox(
+                "긴 브랜드 설명은 줄여서 보내기",
+                value=True,
+                help=f"브랜드 설명이 약 {DESCRIPTION_MAX_TOKENS:,}토큰을 넘으면 앞부분만 문장 단위로 남겨 보냅니다"
+            )
+            
+            button_col1, button_col2 = st.columns([1, 1])
+            with button_col1:
+                submitted = st.form_submit_button("분석 시작", type="primary")
+            with button_col2:
+                estimate_requested = st.form_submit_button("예상 비용 확인")
+            
+            if submitted or estimate_requested:
                 if not brand_name or not brand_description or not campaign_goal or not selected_models:
                     st.error("모든 필드를 입력해주세요!")
                 else:
-                    # 데이터 저장 및 다음 단계로 이동
-                    st.session_state.campaign_data = {
+                    campaign_data = {
                         "brand_name": brand_name,
                         "brand_description": brand_description,
                         "campaign_goal": campaign_goal,
-                        "selected_models": selected_models
+                        "selected_models": selected_models,
+                        "bypass_cache": bypass_cache,
+                        "race_mode": race_mode
                     }
-                    st.session_state.step = 2
-                    st.rerun()
+                    shortened = False
+                    if shorten_description:
+                        campaign_data["brand_description"], shortened = trim_to_tokens(
+                            brand_description, DESCRIPTION_MAX_TOKENS
+                        )
+                    
+                    # API를 호출하기 전에 프롬프트 크기, 비용, 응답 시간 예상치 계산
+                    estimate = estimate_analysis(build_analysis_prompt(campaign_data), selected_models)
+                    if estimate["prompt_tokens"] > estimate["max_prompt_tokens"]:
+                        st.error(
+                            f"프롬프트가 너무 깁니다 (약 {estimate['prompt_tokens']:,}토큰, 최대 "
+                            f"{estimate['max_prompt_tokens']:,}토큰). 브랜드 설명을 줄여주세요."
+                        )
+                    elif submitted:
+                        # 데이터 저장 및 다음 단계로 이동
+                        st.session_state.campaign_data = campaign_data
+                        st.session_state.analysis_job_id = None
+                        st.session_state.step = 2
+                        st.rerun()
+                    else:
+                        render_estimate(estimate, race_mode, shortened)
     
     with col2:
         st.info("""
@@ -704,6 +888,107 @@ def render_step_1():
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+# 합의 결과 한 줄 요약
+def format_consensus(consensus_result):
+    distribution = " · ".join(
+        f"{channel} {share}%" for channel, share in consensus_result["media_distribution"].items()
+    )
+    return (
+        f"**현재 합의** ({len(consensus_result['weights'])}개 모델): "
+        f"{consensus_result['ad_type']} / {distribution}"
+    )
+
+# 선택한 모든 모델로 동시에 분석하는 작업의 진행 상황 표시 (작업이 끝날 때까지 주기적으로 조회)
+def watch_parallel_job(job, valid_models, consensus):
+    total_models = len(valid_models)
+    progress_bar = st.progress(0)
+    consensus_text = st.empty()
+    status_texts = {}
+    for model_name in valid_models:
+        status_texts[model_name] = st.empty()
+        status_texts[model_name].text(f"{model_name} 모델이 분석 중입니다...")
+    
+    # 스트리밍 모드에서는 모델별 탭에 응답을 실시간으로 표시
+    stream_placeholders = {}
+    if job.stream:
+        stream_tabs = st.tabs(valid_models)
+        for model_name, tab in zip(valid_models, stream_tabs):
+            with tab:
+                stream_placeholders[model_name] = st.empty()
+    
+    shown_text = {}
+    while True:
+        done = job.wait(JOB_POLL_INTERVAL)
+        snapshot = job.snapshot()
+        for model_name in valid_models:
+            status = snapshot["status"][model_name]
+            entry = snapshot["results"].get(model_name)
+            if status == "timeout":
+                status_texts[model_name].text(f"{model_name} 모델 응답 시간 초과")
+            elif status == "done":
+                if model_name in snapshot["failures"]:
+                    status_texts[model_name].error(
+                        f"{model_name} 모델 분석 실패 - {snapshot['failures'][model_name]}"
+                    )
+                elif entry is not None and entry["cached"]:
+                    status_texts[model_name].text(f"{model_name} 모델 분석 완료 (캐시된 결과)")
+                else:
+                    status_texts[model_name].text(
+                        f"{model_name} 모델 분석 완료 ({snapshot['latencies'][model_name]:.1f}초)"
+                    )
+            
+            # 완료된 결과는 전체 텍스트, 진행 중이면 지금까지 받은 텍스트를 바뀐 경우에만 다시 그림
+            # (JSON 형식 응답은 analysis 값만 꺼내 표시하고, 그 값이 시작되기 전에는 안내 문구 표시)
+            if entry is not None:
+                text = entry["raw_text"]
+            elif snapshot["partial"].get(model_name):
+                text = extract_partial_analysis(snapshot["partial"][model_name]) or STREAM_PENDING_TEXT
+            else:
+                text = None
+            if model_name in stream_placeholders and text and shown_text.get(model_name) != text:
+                stream_placeholders[model_name].markdown(text)
+                shown_text[model_name] = text
+        
+        # 도착한 결과를 끝난 순서대로 합의에 반영
+        for model_name, entry in snapshot["results"].items():
+            consensus.add(model_name, entry["parsed_data"], get_consensus_weight(entry))
+        if consensus.result():
+            consensus_text.markdown(format_consensus(consensus.result()))
+        
+        # 진행 상황 업데이트
+        finished = sum(status != "running" for status in snapshot["status"].values())
+        progress_bar.progress(finished / total_models)
+        if done:
+            break
+    
+    st.session_state.analysis_timeouts = snapshot["timed_out"]
+    st.session_state.analysis_failures = snapshot["failures"]
+    # 결과 탭 순서는 사용자가 선택한 모델 순서를 유지
+    return {
+        model_name: snapshot["results"][model_name]
+        for model_name in valid_models
+        if model_name in snapshot["results"]
+    }
+
+# 가장 빠른 응답 모드: 여러 모델 중 먼저 성공한 모델 하나의 결과만 사용
+def watch_race_job(job, valid_models, consensus):
+    status_text = st.empty()
+    status_text.text(f"{', '.join(valid_models)} 중 가장 빠른 모델의 응답을 기다리는 중입니다...")
+    while not job.wait(JOB_POLL_INTERVAL):
+        pass
+    snapshot = job.snapshot()
+    if not snapshot["results"]:
+        for failed_model, message in snapshot["failures"].items():
+            st.error(f"{failed_model} 모델 분석 실패 - {message}")
+        return {}
+    
+    st.session_state.analysis_timeouts = []
+    st.session_state.analysis_failures = snapshot["failures"]
+    model_name, entry = next(iter(snapshot["results"].items()))
+    status_text.text(f"{model_name} 모델이 가장 먼저 응답했습니다 ({entry['latency']:.1f}초)")
+    consensus.add(model_name, entry["parsed_data"], get_consensus_weight(entry))
+    return {model_name: entry}
+
 # 단계 2: AI 분석 결과 화면
 def render_step_2():
     campaign_data = st.session_state.campaign_data
@@ -712,18 +997,10 @@ def render_step_2():
     st.markdown("### AI 분석 중...")
     
     # 선택된, 초기화된 모델만 필터링
-    valid_models = []
-    for model_name in campaign_data["selected_models"]:
-        if model_name == "ChatGPT" and st.session_state.get('openai_available', False):
-            valid_models.append(model_name)
-        elif model_name == "Claude" and st.session_state.get('anthropic_available', False):
-            valid_models.append(model_name)
-        elif model_name == "Gemini" and st.session_state.get('gemini_available', False):
-            valid_models.append(model_name)
-        elif model_name == "DeepSeek" and st.session_state.get('deepseek_available', False):
-            valid_models.append(model_name)
-        elif model_name == "Grok" and st.session_state.get('grok_available', False):
-            valid_models.append(model_name)
+    valid_models = [
+        model_name for model_name in campaign_data["selected_models"]
+        if model_name in MODEL_STATE_KEYS and st.session_state.get(MODEL_STATE_KEYS[model_name], False)
+    ]
     
     # 유효한 모델이 없으면 경고 표시
     if not valid_models:
@@ -734,42 +1011,28 @@ def render_step_2():
         st.stop()
     
     # 프롬프트 생성
-    prompt = f"""
-    다음 브랜드/제품에 대한 광고 전략을 분석해 주세요:
-    
-    브랜드/제품명: {campaign_data['brand_name']}
-    브랜드 설명: {campaign_data['brand_description']}
-    캠페인 목표: {campaign_data['campaign_goal']}
-    
-    다음 내용을 포함해 분석해 주세요:
-    
-    1. 검색광고와 디스플레이 광고 중 어떤 것이 더 적합한지 구체적인 이유와 함께 추천해 주세요.
-    2. 주요 매체별 예산 배분 비율을 제안해 주세요 (Google, Meta, Naver, Kakao, TTD).
-    3. 필요한 광고 소재 유형과 개수를 추천해 주세요.
-    4. 효과적인 광고 문구 예시를 3개 이상 제공해 주세요.
+    prompt = build_analysis_prompt(campaign_data)
+    race_mode = bool(campaign_data.get("race_mode")) and len(valid_models) > 1
     
-    결과는 마케팅 초보자도 이해할 수 있도록 명확하게 설명해 주세요.
-    """
-    
-    # 각 선택된 모델에 대해 분석 실행
-    total_models = len(valid_models)
-    progress_bar = st.progress(0)
-    analysis_results = {}
+    # 분석은 백그라운드 작업으로 실행 - 이 세션의 작업이 있으면 다시 연결하고, 없으면 같은 캠페인으로
+    # 실행 중인 작업에 연결하거나 새로 시작 (rerun이나 새로고침으로 API를 다시 호출하지 않음)
+    manager = get_job_manager()
+    job = manager.get(st.session_state.get("analysis_job_id"))
+    if job is None:
+        job = manager.submit(
+            prompt, valid_models, race_mode,
+            bypass_cache=campaign_data.get("bypass_cache", False),
+            stream=STREAM_RESPONSES,
+            cache=get_analysis_cache(),
+            timeout=ANALYSIS_DEADLINE
+        )
+        st.session_state.analysis_job_id = job.job_id
     
-    for i, model_name in enumerate(valid_models):
-        status_text = st.empty()
-        status_text.text(f"{model_name} 모델이 분석 중입니다...")
-        
-        # AI 모델 호출
-        result = get_ai_analysis(prompt, model_name)
-        if result:
-            analysis_results[model_name] = {
-                "raw_text": result,
-                "parsed_data": parse_ad_recommendations(result)
-            }
-        
-        # 진행 상황 업데이트
-        progress_bar.progress((i + 1) / total_models)
+    consensus = ConsensusBuilder()
+    if job.race_mode:
+        analysis_results = watch_race_job(job, valid_models, consensus)
+    else:
+        analysis_results = watch_parallel_job(job, valid_models, consensus)
     
     # 결과가 비어있으면 에러 표시
     if not analysis_results:
@@ -780,11 +1043,14 @@ def render_step_2():
         st.stop()
     
     st.session_state.analysis_results = analysis_results
+    st.session_state.analysis_consensus = consensus
     st.session_state.step = 3
     st.rerun()
 
 # 단계 3: 분석 결과 및 시뮬레이션 화면
 def render_step_3():
+    import pandas as pd
+    
     if not st.session_state.analysis_results:
         st.error("분석 결과가 없습니다. 다시 시도해주세요.")
         if st.button("처음으로 돌아가기", type="primary", key="error_back_btn"):
@@ -799,43 +1065,114 @@ def render_step_3():
     st.markdown('<div class="step-container">', unsafe_allow_html=True)
     st.markdown("### 📊 AI 분석 결과")
     
-    # 각 모델별 분석 탭 표시
-    tabs = st.tabs([model_name for model_name in analysis_results.keys()])
+    if st.session_state.get("analysis_timeouts"):
+        st.warning(
+            f"{', '.join(st.session_state.analysis_timeouts)} 모델은 제한 시간({ANALYSIS_DEADLINE:.0f}초) 안에 "
+            "응답하지 않아 결과에서 제외했습니다."
+        )
+    # 분석 작업은 백그라운드 스레드에서 실행되어 제공자 오류가 로그에만 남으므로 작업 결과의 오류를 여기서 표시
+    for failed_model, message in st.session_state.get("analysis_failures", {}).items():
+        st.error(f"{failed_model} 모델 분석 실패 - {message}")
+    
+    # 최적화와 시나리오 분석도 시뮬레이션 기간 기준 (기간 위젯은 아래 시뮬레이션 섹션에 있으므로 현재 선택값을 먼저 읽음)
+    horizon_days, granularity = get_simulation_period()
+    
+    objective = st.radio(
+        "예산 배분 최적화 목표",
+        list(OPTIMIZATION_OBJECTIVES.keys()),
+        format_func=lambda key: OPTIMIZATION_OBJECTIVES[key],
+        horizontal=True,
+        key="optimize_objective"
+    )
+    
+    # 여러 모델의 결과가 있으면 합의 탭을 먼저 표시하고, 이어서 각 모델별 분석 탭 표시
+    consensus = st.session_state.analysis_consensus
+    consensus_method = st.session_state.get("consensus_method", "median")
+    consensus_result = consensus.result(consensus_method) if consensus is not None else None
+    show_consensus = consensus_result is not None and len(consensus_result["weights"]) > 1
+    tab_names = (["합의"] if show_consensus else []) + list(analysis_results.keys())
+    tabs = st.tabs(tab_names)
+    
+    if show_consensus:
+        with tabs[0]:
+            st.radio(
+                "합의 방식",
+                list(CONSENSUS_METHODS.keys()),
+                format_func=lambda key: CONSENSUS_METHODS[key],
+                horizontal=True,
+                key="consensus_method"
+            )
+            col1, col2 = st.columns([3, 2])
+            
+            with col1:
+                st.markdown("#### 모델별 예산 배분 비교")
+                comparison = {'매체': MEDIA_CHANNELS}
+                for model_name in consensus_result["weights"]:
+                    distribution = analysis_results[model_name]['parsed_data']['media_distribution']
+                    comparison[f'{model_name}(%)'] = [distribution.get(channel, 0) for channel in MEDIA_CHANNELS]
+                comparison['합의(%)'] = [consensus_result['media_distribution'][channel] for channel in MEDIA_CHANNELS]
+                st.dataframe(pd.DataFrame(comparison), use_container_width=True, hide_index=True)
+                
+                st.markdown("#### 광고 유형 투표")
+                for ad_type, votes in sorted(consensus_result["votes"].items(), key=lambda item: -item[1]):
+                    st.markdown(f"- {ad_type}: **{votes:g}표**")
+                st.caption(
+                    f"JSON 형식으로 응답한 모델은 가중치 1, 텍스트에서 추출한 결과는 가중치 "
+                    f"{CONSENSUS_TEXT_PARSE_WEIGHT:g}로 반영하며 오류 응답은 제외합니다."
+                )
+            
+            with col2:
+                st.markdown("#### 추천 광고 유형")
+                st.success(f"**{consensus_result['ad_type']}** 중심의 전략이 추천됩니다.")
+                st.markdown("#### 합의 예산 배분")
+                render_distribution_pie(consensus_result['media_distribution'])
     
+    model_tabs = tabs[1:] if show_consensus else tabs
     for i, model_name in enumerate(analysis_results.keys()):
-        with tabs[i]:
+        with model_tabs[i]:
             result = analysis_results[model_name]
             col1, col2 = st.columns([3, 2])
             
             with col1:
                 st.markdown("#### 전체 분석")
+                if result.get("race_winner"):
+                    st.caption(f"선택한 모델 중 가장 먼저 응답한 결과입니다 ({result['latency']:.1f}초)")
+                elif result.get("cached"):
+                    st.caption("저장된 분석 결과를 불러왔습니다 (API 호출 없음)")
+                elif result.get("ttft") is not None:
+                    st.caption(f"첫 토큰까지 {result['ttft']:.2f}초 · 전체 응답 {result['latency']:.1f}초")
+                elif result.get("latency") is not None:
+                    st.caption(f"전체 응답 {result['latency']:.1f}초")
                 st.markdown(result["raw_text"])
             
             with col2:
                 st.markdown("#### 추천 광고 유형")
                 st.success(f"**{result['parsed_data']['ad_type']}** 중심의 전략이 추천됩니다.")
                 
-                st.markdown("#### 매체별 예산 배분")
-                media_data = pd.DataFrame({
-                    '매체': list(result['parsed_data']['media_distribution'].keys()),
-                    '비율(%)': list(result['parsed_data']['media_distribution'].values())
-                })
+                if result['parsed_data'].get('creatives'):
+                    st.markdown("#### 추천 광고 소재")
+                    for creative in result['parsed_data']['creatives']:
+                        st.markdown(f"- {creative['type']}: **{creative['count']}개**")
                 
-                # 다크 모드 대응 색상 팔레트
-                color_sequence = px.colors.qualitative.Pastel
+                if result['parsed_data'].get('ad_copies'):
+                    st.markdown("#### 광고 문구 예시")
+                    for ad_copy in result['parsed_data']['ad_copies']:
+                        st.markdown(f"> {ad_copy}")
                 
-                fig = px.pie(media_data, values='비율(%)', names='매체', 
-                            color_discrete_sequence=color_sequence,
-                            hole=0.4)
-                fig.update_layout(
-                    margin=dict(t=0, b=0, l=0, r=0),
-                    # 배경 투명하게 설정
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    # 글자색 설정 (다크모드 대응)
-                    font=dict(color='rgba(255,255,255,0.85)')
+                st.markdown("#### 매체별 예산 배분")
+                render_distribution_pie(result['parsed_data']['media_distribution'])
+                
+                st.markdown("#### 최적화된 예산 배분")
+                optimization_view = get_optimization_view(
+                    campaign_data["brand_description"],
+                    result['parsed_data']['ad_type'],
+                    result['parsed_data']['media_distribution'],
+                    objective,
+                    horizon_days,
+                    granularity
                 )
-                st.plotly_chart(fig, use_container_width=True)
+                st.dataframe(optimization_view["table"], use_container_width=True, hide_index=True)
+                st.caption(optimization_view["caption"])
     
     st.markdown('</div>', unsafe_allow_html=True)
     
@@ -843,137 +1180,150 @@ def render_step_3():
     st.markdown('<div class="step-container">', unsafe_allow_html=True)
     st.markdown("### 📈 캠페인 시뮬레이션")
     
-    # 시뮬레이션 실행 버튼
-    sim_button_col, _ = st.columns([1, 3])
+    # 시뮬레이션 기간, 집계 단위와 실행 버튼
+    sim_button_col, horizon_col, granularity_col = st.columns([1, 1, 2])
     with sim_button_col:
         run_simulation = st.button("시뮬레이션 실행", type="primary", key="sim_button")
+    with horizon_col:
+        horizon_options = list(SIMULATION_HORIZONS.keys())
+        st.selectbox(
+            "시뮬레이션 기간",
+            horizon_options,
+            index=horizon_options.index(horizon_days),
+            format_func=lambda days: SIMULATION_HORIZONS[days],
+            key="simulation_horizon"
+        )
+    with granularity_col:
+        granularity_options = list(SIMULATION_GRANULARITIES.keys())
+        st.radio(
+            "집계 단위",
+            granularity_options,
+            index=granularity_options.index(granularity),
+            format_func=lambda key: f"{SIMULATION_GRANULARITIES[key]} 단위",
+            horizontal=True,
+            key="simulation_granularity"
+        )
     
     if run_simulation or st.session_state.simulation_results:
-        # 선택된 첫 번째 모델의 추천을 기반으로 시뮬레이션
-        first_model = list(analysis_results.keys())[0]
-        ad_type = analysis_results[first_model]["parsed_data"]["ad_type"]
+        # 모델 결과의 합의를 기반으로 시뮬레이션 (합의할 결과가 없으면 선택된 첫 번째 모델의 추천 사용)
+        if consensus_result is not None:
+            ad_type = consensus_result["ad_type"]
+            media_distribution = consensus_result["media_distribution"]
+            simulation_basis = "합의" if len(consensus_result["weights"]) > 1 else next(iter(consensus_result["weights"]))
+        else:
+            first_model = list(analysis_results.keys())[0]
+            ad_type = analysis_results[first_model]["parsed_data"]["ad_type"]
+            media_distribution = analysis_results[first_model]["parsed_data"]["media_distribution"]
+            simulation_basis = first_model
         
-        if not st.session_state.simulation_results:
+        # 합의 방식을 바꾸는 등 시뮬레이션 입력이 달라지면 다시 생성
+        simulation_inputs = (ad_type, tuple(media_distribution.items()), horizon_days, granularity)
+        if not st.session_state.simulation_results or st.session_state.get("simulation_inputs") != simulation_inputs:
             with st.spinner("시뮬레이션 데이터 생성 중..."):
-                st.session_state.simulation_results = generate_simulation_results(campaign_data, ad_type)
+                st.session_state.simulation_results = generate_simulation_results(
+                    campaign_data, ad_type, media_distribution, horizon_days=horizon_days, granularity=granularity
+                )
+            st.session_state.simulation_inputs = simulation_inputs
+        st.caption(
+            f"{simulation_basis} 추천({ad_type})을 기준으로 {SIMULATION_HORIZONS.get(horizon_days, f'{horizon_days}일')}간 "
+            f"{SIMULATION_GRANULARITIES[granularity]} 단위로 시뮬레이션했습니다."
+        )
         
-        # 시뮬레이션 결과 표시
-        sim_data = pd.DataFrame(st.session_state.simulation_results)
+        # 시뮬레이션 결과 표시 (같은 결과에 대해서는 이전 rerun에서 만든 차트와 표를 재사용)
+        views = memoize_view(
+            "simulation",
+            (st.session_state.simulation_results.digest, simulation_basis),
+            lambda: build_simulation_views(st.session_state.simulation_results, simulation_basis)
+        )
         
         # 주요 지표 요약
-        total_impressions = sum(week["impressions"] for week in st.session_state.simulation_results)
-        avg_ctr = sum(week["ctr"] for week in st.session_state.simulation_results) / len(st.session_state.simulation_results)
-        total_conversions = sum(week["conversions"] for week in st.session_state.simulation_results)
-        final_reach = st.session_state.simulation_results[-1]["reach"] * 100
-        
         metrics_col1, metrics_col2, metrics_col3, metrics_col4 = st.columns(4)
         with metrics_col1:
-            st.metric("총 노출 수", f"{total_impressions:,}", delta=None)
+            st.metric("총 노출 수", f"{views['total_impressions']:,}", delta=None)
         with metrics_col2:
-            st.metric("평균 클릭률", f"{avg_ctr:.2%}", delta=None)
+            st.metric("평균 클릭률", f"{views['avg_ctr']:.2%}", delta=None)
         with metrics_col3:
-            st.metric("총 전환 수", f"{total_conversions:,}", delta=None)
+            st.metric("총 전환 수", f"{views['total_conversions']:,}", delta=None)
         with metrics_col4:
-            st.metric("최종 도달률", f"{final_reach:.1f}%", delta=None)
+            st.metric(f"최종 {SIMULATION_GRANULARITIES[granularity]}간 도달률", f"{views['final_reach']:.1f}%", delta=None)
         
         # 추세 그래프
         st.markdown("#### 시간에 따른 성과 추이")
-        tab1, tab2, tab3 = st.tabs(["클릭 및 전환", "도달률", "세부 데이터"])
-        
-        # 다크 모드 대응 색상
-        click_color = '#4285F4'  # 구글 블루
-        conversion_color = '#EA4335'  # 구글 레드
-        reach_color = '#34A853'  # 구글 그린
+        st.caption(f"{st.session_state.simulation_results.runs:,}회 시뮬레이션의 중앙값이며, 음영은 {SIMULATION_PERCENTILES[0]}~{SIMULATION_PERCENTILES[-1]} 백분위 범위입니다.")
+        tab1, tab2, tab_channels, tab3, tab_sweep = st.tabs(
+            ["클릭 및 전환", "도달률", "매체별 기여도", "세부 데이터", "시나리오 분석"]
+        )
         
         with tab1:
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=sim_data['week'], 
-                y=sim_data['clicks'],
-                mode='lines+markers',
-                name='클릭 수',
-                marker=dict(color=click_color)
-            ))
-            fig.add_trace(go.Scatter(
-                x=sim_data['week'], 
-                y=sim_data['conversions'],
-                mode='lines+markers',
-                name='전환 수',
-                marker=dict(color=conversion_color)
-            ))
-            fig.update_layout(
-                title='주간 클릭 및 전환 추이',
-                xaxis_title='주차',
-                yaxis_title='수치',
-                hovermode='x unified',
-                legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
-                # 배경 투명하게 설정
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                # 글자색 설정 (다크모드 대응)
-                font=dict(color='rgba(255,255,255,0.85)')
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(views["clicks_figure"], use_container_width=True)
         
         with tab2:
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=sim_data['week'], 
-                y=sim_data['reach']*100,
-                mode='lines+markers',
-                name='도달률',
-                marker=dict(color=reach_color),
-                fill='tozeroy'
-            ))
-            fig.update_layout(
-                title='주간 도달률 추이',
-                xaxis_title='주차',
-                yaxis_title='도달률 (%)',
-                hovermode='x unified',
-                # 배경 투명하게 설정
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                # 글자색 설정 (다크모드 대응)
-                font=dict(color='rgba(255,255,255,0.85)')
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(views["reach_figure"], use_container_width=True)
+        
+        with tab_channels:
+            st.plotly_chart(views["channels_figure"], use_container_width=True)
+            st.dataframe(views["channel_table"], use_container_width=True, hide_index=True)
         
         with tab3:
-            # 스타일링 옵션 추가
-            # 먼저 DataFrame의 열 이름을 변경한 후 스타일 적용
-            renamed_data = sim_data.rename(columns={
-                'week': '주차',
-                'impressions': '노출 수',
-                'reach': '도달률',
-                'clicks': '클릭 수',
-                'ctr': '클릭률',
-                'conversions': '전환 수',
-                'conversion_rate': '전환율'
-            })
-            
-            st.dataframe(
-                renamed_data.style.format({
-                    '노출 수': '{:,.0f}',
-                    '도달률': '{:.1%}',
-                    '클릭 수': '{:,.0f}',
-                    '클릭률': '{:.2%}',
-                    '전환 수': '{:,.0f}',
-                    '전환율': '{:.2%}'
-                }),
-                use_container_width=True
-            )
+            st.dataframe(views["weekly_table"], use_container_width=True)
+        
+        with tab_sweep:
+            render_scenario_sweep(campaign_data, ad_type, media_distribution, objective, horizon_days, granularity)
     else:
         st.info("""
         💡 **시뮬레이션 안내**
         
-        '시뮬레이션 실행' 버튼을 클릭하면 AI가 추천한 광고 유형을 기반으로 
-        12주간의 캠페인 성과 예측 결과를 볼 수 있습니다.
+        '시뮬레이션 실행' 버튼을 클릭하면 AI가 추천한 광고 유형과 매체별 예산 배분을 기반으로 
+        선택한 기간(최대 2년, 주 또는 일 단위)의 캠페인 성과 예측 결과를 볼 수 있습니다.
         
         이 시뮬레이션은 브랜드 정보와 AI 추천을 바탕으로 예상 성과를 계산합니다.
         """)
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+# 관리자용 성능 지표 패널 (제공자별 응답 시간 백분위, 상태 코드 수, 단계별 소요 시간)
+def render_admin_panel():
+    import pandas as pd
+    
+    summary = METRICS.summary()
+    with st.sidebar:
+        st.markdown("### 성능 지표")
+        if summary["histograms"]:
+            st.dataframe(
+                pd.DataFrame([{
+                    '지표': row['metric'],
+                    '대상': ", ".join(str(value) for value in row['labels'].values()),
+                    '건수': row['count'],
+                    'p50': row['p50'],
+                    'p95': row['p95'],
+                    'p99': row['p99']
+                } for row in summary["histograms"]]).style.format({
+                    'p50': '{:,.3f}', 'p95': '{:,.3f}', 'p99': '{:,.3f}'
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+            st.caption("시간 지표는 초, 크기 지표는 바이트 단위이며 백분위는 시계열별 최근 측정값 기준입니다.")
+        else:
+            st.caption("아직 기록된 지표가 없습니다.")
+        if summary["counters"]:
+            st.markdown("#### API 응답 상태")
+            st.dataframe(
+                pd.DataFrame([{
+                    '제공자': row['labels'].get('provider'),
+                    '상태': row['labels'].get('status'),
+                    '건수': row['value']
+                } for row in summary["counters"]]),
+                use_container_width=True,
+                hide_index=True
+            )
+        st.download_button(
+            "Prometheus 형식으로 내려받기",
+            METRICS.render_prometheus(),
+            file_name="metrics.txt",
+            mime="text/plain"
+        )
+
 # 메인 앱 실행
 def main():
     render_header()
@@ -984,7 +1334,11 @@ def main():
     elif st.session_state.step == 2:
         render_step_2()
     elif st.session_state.step == 3:
-        render_step_3()
+        with time_stage("render_step_3"):
+            render_step_3()
+    
+    if ADMIN_PANEL:
+        render_admin_panel()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""캠페인 일괄 분석 CLI
+
+JSONL 파일의 캠페인을 Streamlit 없이 분석 → 파싱 → 시뮬레이션하고, 끝나는 순서대로
+결과를 JSONL 파일에 한 줄씩 기록합니다. 출력 파일은 체크포인트를 겸하므로 중단 후
+같은 명령을 다시 실행하면 성공한 (캠페인, 모델) 조합은 건너뛰고 나머지만 실행합니다.
+
+입력 한 줄 예시:
+    {"id": "c-001", "brand_name": "...", "brand_description": "...", "campaign_goal": "...", "models": ["ChatGPT"]}
+
+    python batch.py campaigns.jsonl results.jsonl --workers 8 --provider-limit 2
+    python batch.py campaigns.jsonl results.parquet
+
+Parquet 파일은 덧붙여 쓸 수 없으므로 결과를 `<출력>.checkpoint.jsonl`에 먼저 기록하고,
+모든 작업이 끝나면 체크포인트에서 Parquet 파일을 만듭니다.
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    from dotenv import load_dotenv
+except ImportError:
+    load_dotenv = None
+
+# pipeline 모듈이 불러올 때 설정값을 읽으므로 .env를 먼저 반영
+if load_dotenv is not None:
+    load_dotenv()
+
+import pandas as pd  # noqa: E402
+
+from pipeline import (  # noqa: E402
+    ANALYSIS_DEADLINE,
+    MEDIA_CHANNELS,
+    MODEL_CONFIG,
+    SIMULATION_RUNS,
+    get_analysis_cache,
+    is_model_available,
+    run_campaign_analysis
+)
+
+logger = logging.getLogger("batch")
+
+# 기본 동시 작업 수 (전체, 모델별)
+DEFAULT_WORKERS = 8
+DEFAULT_PROVIDER_LIMIT = 2
+
+# 입력 캠페인과 체크포인트 읽기
+def read_campaigns(path):
+    """JSONL 입력에서 (캠페인 ID, 캠페인 정보, 모델 목록)을 순서대로 반환"""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                logger.warning("%d번째 줄을 건너뜁니다 (JSON 오류: %s)", line_number, e)
+                continue
+            campaign_id = str(record.get("id") or record.get("campaign_id") or record.get("request_id") or f"line-{line_number}")
+            if not record.get("brand_name") or not record.get("brand_description"):
+                logger.warning("%s: brand_name과 brand_description이 필요해 건너뜁니다", campaign_id)
+                continue
+            campaign_data = {
+                "brand_name": record["brand_name"],
+                "brand_description": record["brand_description"],
+                "campaign_goal": record.get("campaign_goal", "")
+            }
+            yield campaign_id, campaign_data, record.get("models")
+
+def load_checkpoint(path):
+    """체크포인트 JSONL에서 (캠페인 ID, 모델)별 마지막 결과를 읽음 (파일이 없으면 빈 딕셔너리)"""
+    records = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 중단 시 마지막 줄이 잘렸을 수 있음
+                    continue
+                records[(record["campaign_id"], record["model"])] = record
+    except FileNotFoundError:
+        pass
+    return records
+
+# 결과 저장 (JSONL 체크포인트 → Parquet)
+def flatten_record(record):
+    """Parquet 저장용으로 결과 한 건을 평평한 행으로 변환"""
+    parsed_data = record.get("parsed_data") or {}
+    distribution = parsed_data.get("media_distribution") or {}
+    summary = record.get("summary") or {}
+    row = {
+        "campaign_id": record["campaign_id"],
+        "brand_name": record.get("brand_name"),
+        "model": record["model"],
+        "status": record["status"],
+        "error": record.get("error"),
+        "cached": record.get("cached"),
+        "latency": record.get("latency"),
+        "structured": record.get("structured"),
+        "ad_type": parsed_data.get("ad_type"),
+    }
+    for channel in MEDIA_CHANNELS:
+        row[f"media_{channel}"] = distribution.get(channel)
+    for metric in ["impressions", "clicks", "conversions", "final_reach"]:
+        row[metric] = summary.get(metric)
+    row["raw_text"] = record.get("raw_text")
+    row["simulation"] = json.dumps(record["simulation"], ensure_ascii=False) if "simulation" in record else None
+    return row
+
+def write_parquet(records, path):
+    pd.DataFrame([flatten_record(record) for record in records]).to_parquet(path, index=False)
+
+# 명령줄 진입점 - 캠페인 × 모델 조합을 작업 풀에서 실행하고 끝나는 순서대로 체크포인트에 기록
+def main():
+    parser = argparse.ArgumentParser(description="JSONL 캠페인 목록을 일괄 분석")
+    parser.add_argument("input", help="캠페인 JSONL 파일")
+    parser.add_argument("output", help="결과 파일 (.jsonl 또는 .parquet)")
+    parser.add_argument("--models", nargs="+", choices=list(MODEL_CONFIG),
+                        help="입력에 models가 없을 때 사용할 모델 (기본: API 키가 설정된 모든 모델)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="전체 동시 작업 수")
+    parser.add_argument("--provider-limit", type=int, default=DEFAULT_PROVIDER_LIMIT,
+                        help="모델(API 제공자)별 동시 요청 수")
+    parser.add_argument("--runs", type=int, default=SIMULATION_RUNS, help="시뮬레이션 반복 횟수")
+    parser.add_argument("--seed", type=int, default=None, help="시뮬레이션 난수 시드")
+    parser.add_argument("--timeout", type=float, default=ANALYSIS_DEADLINE,
+                        help="(캠페인, 모델) 조합 하나의 분석 응답 제한 시간 (초)")
+    parser.add_argument("--no-cache", action="store_true", help="저장된 분석 결과를 사용하지 않고 새로 분석")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    
+    default_models = args.models or [model_name for model_name in MODEL_CONFIG if is_model_available(model_name)]
+    to_parquet = args.output.endswith(".parquet")
+    # 모든 분석이 끝난 뒤에 Parquet 변환이 실패하지 않도록 시작 전에 확인
+    if to_parquet and importlib.util.find_spec("pyarrow") is None:
+        parser.error("Parquet 출력에는 pyarrow가 필요합니다 (pip install pyarrow)")
+    checkpoint_path = f"{args.output}.checkpoint.jsonl" if to_parquet else args.output
+    
+    # 이미 성공한 조합은 건너뛰고 실패한 조합은 다시 실행
+    done = {key for key, record in load_checkpoint(checkpoint_path).items() if record["status"] == "ok"}
+    tasks = []
+    for campaign_id, campaign_data, models in read_campaigns(args.input):
+        for model_name in models or default_models:
+            if model_name not in MODEL_CONFIG:
+                logger.warning("%s: 지원되지 않는 모델 %s를 건너뜁니다", campaign_id, model_name)
+            elif (campaign_id, model_name) not in done:
+                tasks.append((campaign_id, campaign_data, model_name))
+    if not tasks:
+        logger.info("실행할 작업이 없습니다 (체크포인트: %s)", checkpoint_path)
+    else:
+        logger.info("작업 %d개 시작 (체크포인트의 완료된 조합 %d개)", len(tasks), len(done))
+    
+    cache = get_analysis_cache()
+    provider_slots = {model_name: threading.BoundedSemaphore(args.provider_limit) for model_name in MODEL_CONFIG}
+    
+    def run_task(campaign_id, campaign_data, model_name):
+        with provider_slots[model_name]:
+            try:
+                result = run_campaign_analysis(
+                    campaign_data, model_name, cache, bypass_cache=args.no_cache, runs=args.runs, seed=args.seed,
+                    timeout=args.timeout
+                )
+            except Exception as e:
+                result = {"model": model_name, "status": "error", "error": f"오류: {e}"}
+        return {"campaign_id": campaign_id, "brand_name": campaign_data["brand_name"], **result}
+    
+    failed = 0
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+            ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [executor.submit(run_task, *task) for task in tasks]
+        for index, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+            checkpoint.flush()
+            if record["status"] != "ok":
+                failed += 1
+            logger.info("[%d/%d] %s %s: %s", index, len(tasks), record["campaign_id"], record["model"],
+                        record["status"] if record["status"] == "ok" else record["error"])
+    
+    if to_parquet:
+        write_parquet(load_checkpoint(checkpoint_path).values(), args.output)
+        logger.info("Parquet 저장 완료: %s", args.output)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""여러 세션 동시 부하 테스트
+
+Streamlit AppTest로 N개 세션을 한 프로세스에서 동시에 실행해, 각 세션이 단계 1(입력) → 단계 2(분석) →
+단계 3(결과, 시뮬레이션)을 거치는 동안의 재실행 시간을 측정합니다. AI 제공자는 같은 프로세스에서 띄운
+스텁 서버(provider_stub.py)로 대체하므로 API 비용이 들지 않습니다.
+
+동시 세션 수를 늘려 가며 다음을 출력합니다.
+
+- 단계별 재실행 시간 p50/p99
+- 서버 메모리: 모든 세션이 단계 3 화면을 유지한 상태의 RSS 증가량과, 세션 하나가 유지하는 메모리(tracemalloc)
+  (동시 세션 수마다 새 프로세스에서 측정)
+- 포화 지점: 단계 3 재실행 p99가 --slo를 넘거나 처리량이 더 이상 늘지 않는 첫 동시 세션 수
+
+AppTest는 브라우저로 화면을 전송하지 않으므로 서버에서 스크립트를 실행하는 시간만 측정합니다.
+
+    python benchmarks/load_test.py --sessions 1 4 8 16 --reruns 5 --latency-median 0.5
+"""
+import argparse
+import contextlib
+import gc
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from provider_stub import StubProviderServer, add_behavior_arguments, behavior_from_args  # noqa: E402
+
+STEPS = ["step_1", "step_2", "step_3_simulation", "step_3_rerun"]
+STEP_LABELS = {
+    "step_1": "단계 1 첫 화면",
+    "step_2": "단계 2 분석",
+    "step_3_simulation": "단계 3 시뮬레이션",
+    "step_3_rerun": "단계 3 재실행",
+}
+MEMORY_SAMPLE_SESSIONS = 3  # 세션당 메모리를 측정할 때 실행하는 세션 수
+THROUGHPUT_GAIN_MIN = 1.1  # 동시 세션 수를 늘렸을 때 처리량이 이 비율 이상 늘지 않으면 포화로 판단
+
+
+def current_rss():
+    """현재 프로세스의 상주 메모리 (바이트, /proc이 없으면 최대 사용량으로 대체)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def configure_environment(base_url, session_count, args):
+    """pipeline/app 모듈이 불러올 때 읽는 설정을 부하 테스트용으로 지정 (import 전에 호출)"""
+    os.environ["PROVIDER_BASE_URL"] = base_url
+    os.environ["HTTP_PREWARM"] = "false"
+    os.environ["HTTP_POOL_MAXSIZE"] = str(max(session_count * len(args.models), 10))
+    os.environ["PROVIDER_REQUESTS_PER_MINUTE"] = str(args.requests_per_minute)
+    os.environ["PROVIDER_BURST"] = str(session_count)
+    os.environ["SIMULATION_RUNS"] = str(args.simulation_runs)
+    os.environ["ANALYSIS_CACHE_DIR"] = tempfile.mkdtemp(prefix="adtech-load-")
+    os.environ["ANALYSIS_HISTORY_PATH"] = os.path.join(os.environ["ANALYSIS_CACHE_DIR"], "history.json")
+    os.environ["ADMIN_PANEL"] = "false"
+
+
+def prepare_concurrent_sessions():
+    """AppTest를 여러 스레드에서 동시에 실행할 수 있도록 전역 상태를 고정
+
+    AppTest는 run()마다 전역 Runtime 대역과 global.appTest 설정을 새로 설치했다가 끝나면 되돌리므로,
+    동시에 실행하면 다른 세션이 실행 중인데 Runtime이 지워지거나 설정이 바뀜. 실제 서버처럼 모든 세션이
+    Runtime(캐시 저장소 포함) 하나를 공유하고 설정은 켠 채로 유지. 스크립트 바이트코드 캐시도 실제 서버처럼
+    하나를 공유함 (세션마다 app.py를 동시에 컴파일하면 CPython 3.11에서 SystemError가 나기도 함)."""
+    from unittest.mock import MagicMock
+
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+    config.set_option("global.appTest", True)
+    app_test.patch_config_options = lambda options: contextlib.nullcontext()
+    script_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: script_cache
+    # 세션 스레드 밖에서 AppTest를 만들 때 나오는 ScriptRunContext 경고 숨김
+    logging.getLogger("streamlit.runtime.scriptrunner.script_run_context").setLevel(logging.ERROR)
+
+
+def click_button(at, label):
+    next(button for button in at.button if button.label == label).click()
+
+
+def drop_stale_widgets(node, session_state):
+    """st.rerun으로 한 번의 run() 안에서 화면이 바뀌면 AppTest 요소 트리에 이전 화면의 위젯이 남는데,
+    브라우저와 달리 이를 지우지 않아 다음 run()에서 위젯 상태 조회가 실패하므로 직접 제거"""
+    for index, child in list(getattr(node, "children", {}).items()):
+        widget_id = getattr(child, "id", None)
+        if isinstance(widget_id, str) and widget_id.startswith("$$WIDGET_ID") and widget_id not in session_state:
+            del node.children[index]
+        else:
+            drop_stale_widgets(child, session_state)
+
+
+def check(at, step):
+    if at.exception:
+        raise RuntimeError(f"{step}: {at.exception[0].value}")
+
+
+class SessionWalk:
+    """세션 하나가 단계 1 → 2 → 3을 거치며 단계별 재실행 시간(초)을 기록"""
+
+    def __init__(self, session_id, models, reruns, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.session_id = session_id
+        self.models = models
+        self.reruns = reruns
+        self.at = AppTest.from_file(APP, default_timeout=timeout)
+        self.timings = {step: [] for step in STEPS}
+
+    def timed_run(self, step):
+        start = time.perf_counter()
+        self.at.run()
+        self.timings[step].append(time.perf_counter() - start)
+        check(self.at, step)
+
+    def walk(self):
+        at = self.at
+        self.timed_run("step_1")
+
+        at.text_input[0].input(f"부하 테스트 브랜드 {self.session_id}")
+        at.text_area[0].input("20~30대 직장인을 위한 스페셜티 커피 구독 서비스입니다. 매달 새로운 원두를 보내 드립니다.")
+        at.text_input[1].input("구독 전환")
+        at.multiselect[0].set_value(self.models)
+        click_button(at, "분석 시작")
+        # 단계 2의 분석이 끝나면 같은 실행 안에서 단계 3으로 다시 실행됨
+        self.timed_run("step_2")
+        if at.session_state.step != 3:
+            errors = "; ".join(str(element.value) for element in [*at.error, *at.warning])
+            raise RuntimeError(f"세션 {self.session_id}: 분석 후 단계 3으로 넘어가지 않았습니다 (단계 {at.session_state.step}) {errors}")
+        drop_stale_widgets(at._tree, at.session_state)
+
+        at.button(key="sim_button").click()
+        self.timed_run("step_3_simulation")
+        for _ in range(self.reruns):
+            self.timed_run("step_3_rerun")
+        return self
+
+
+def run_level(session_count, args):
+    """동시 세션 session_count개를 실행하고 (단계별 측정값, 처리량, 서버 RSS 증가량) 반환"""
+    gc.collect()
+    rss_before = current_rss()
+    barrier = threading.Barrier(session_count)
+
+    def walk(session_id):
+        session = SessionWalk(session_id, args.models, args.reruns, args.timeout)
+        barrier.wait()
+        return session.walk()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=session_count) as executor:
+        sessions = list(executor.map(walk, [f"{session_count}-{i}" for i in range(session_count)]))
+    elapsed = time.perf_counter() - start
+
+    # 모든 세션이 단계 3 화면 상태를 유지한 채로 메모리 측정
+    gc.collect()
+    rss_growth = max(current_rss() - rss_before, 0)
+    timings = {step: [value for session in sessions for value in session.timings[step]] for step in STEPS}
+    del sessions
+    return timings, session_count / elapsed, rss_growth
+
+
+def measure_session_memory(args, count=MEMORY_SAMPLE_SESSIONS):
+    """세션 count개를 차례로 단계 3까지 실행해 세션이 유지하는 메모리(tracemalloc 기준, 바이트)의 평균 반환
+
+    RSS는 해제된 메모리를 할당기가 재사용해 세션별 증가분이 잘 드러나지 않으므로 응답 시간 측정과 따로,
+    세션 상태(분석/시뮬레이션 결과, 차트 메모 등)로 남는 메모리만 추적"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        sessions = [SessionWalk(f"memory-{i}", args.models, 0, args.timeout).walk() for i in range(count)]
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    del sessions
+    return max(retained, 0) / count
+
+
+def report_level(session_count, timings, throughput, rss_growth, memory_per_session):
+    print(f"\n[동시 세션 {session_count}개] 처리량 {throughput:.2f}세션/초, 서버 RSS 증가 {rss_growth / 2**20:.1f} MiB, "
+          f"세션당 유지 메모리 {memory_per_session / 2**20:.2f} MiB")
+    for step in STEPS:
+        values = timings[step]
+        if not values:
+            continue
+        p50, p99 = np.percentile(values, [50, 99]) * 1000
+        print(f"  {STEP_LABELS[step]:<14} p50 {p50:9.1f} ms   p99 {p99:9.1f} ms   ({len(values)}회)")
+
+
+def find_saturation(results, slo):
+    """단계 3 재실행 p99가 slo(초)를 넘거나 처리량 증가가 멈춘 첫 동시 세션 수 (없으면 None)"""
+    previous_throughput = None
+    for session_count, timings, throughput in results:
+        if timings["step_3_rerun"] and np.percentile(timings["step_3_rerun"], 99) > slo:
+            return session_count, f"단계 3 재실행 p99가 {slo:.2f}초를 넘음"
+        if previous_throughput is not None and throughput < previous_throughput * THROUGHPUT_GAIN_MIN:
+            return session_count, "처리량이 더 이상 늘지 않음"
+        previous_throughput = throughput
+    return None, None
+
+
+def measure_level(session_count, args):
+    """새 프로세스에서 스텁 서버를 띄우고 동시 세션 session_count개를 측정해 결과를 JSON 한 줄로 출력"""
+    with StubProviderServer(behavior_from_args(args)) as server:
+        configure_environment(server.base_url, session_count, args)
+        import pipeline
+
+        for model_name in pipeline.PROVIDERS:
+            os.environ[pipeline.PROVIDERS[model_name].api_key_name] = "stub-key"
+        os.chdir(ROOT)
+        prepare_concurrent_sessions()
+
+        # 첫 실행의 import/캐시 준비 시간이 측정에 섞이지 않도록 세션 하나로 미리 실행 (이 세션이 쓰고
+        # 해제한 메모리를 측정 세션이 재사용하지 않도록 측정이 끝날 때까지 유지)
+        warmup = SessionWalk("warmup", args.models, 0, args.timeout).walk()
+        timings, throughput, rss_growth = run_level(session_count, args)
+        del warmup
+        memory_per_session = measure_session_memory(args)
+    print(json.dumps({
+        "timings": timings, "throughput": throughput, "rss_growth": rss_growth, "memory_per_session": memory_per_session
+    }))
+
+
+def run_level_process(session_count):
+    """동시 세션 수마다 새 프로세스에서 측정 (앞 단계에서 늘어난 메모리가 세션당 메모리에 섞이지 않도록)"""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *sys.argv[1:], "--level", str(session_count)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if output.returncode != 0:
+        raise RuntimeError(f"동시 세션 {session_count}개 측정 실패:\n{output.stderr[-2000:]}")
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    return result["timings"], result["throughput"], result["rss_growth"], result["memory_per_session"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="여러 세션 동시 부하 테스트")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 8, 16], help="측정할 동시 세션 수 (작은 수부터)")
+    parser.add_argument("--reruns", type=int, default=5, help="세션마다 단계 3 화면을 다시 실행하는 횟수")
+    parser.add_argument("--models", nargs="+", default=["ChatGPT", "Claude", "Gemini"], help="세션마다 선택할 모델")
+    parser.add_argument("--simulation-runs", type=int, default=10000, help="시뮬레이션 반복 횟수")
+    parser.add_argument("--requests-per-minute", type=int, default=100000, help="제공자별 호출 제한 (분당 요청 수)")
+    parser.add_argument("--slo", type=float, default=1.0, help="단계 3 재실행 p99 목표 (초)")
+    parser.add_argument("--timeout", type=float, default=180, help="재실행 한 번의 최대 대기 시간 (초)")
+    parser.add_argument("--level", type=int, default=None, help=argparse.SUPPRESS)  # 측정용 하위 프로세스 내부 인자
+    add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    if args.level is not None:
+        measure_level(args.level, args)
+        return
+
+    print(f"[부하 테스트] 동시 세션 {sorted(args.sessions)}, 모델 {', '.join(args.models)}, "
+          f"스텁 응답 시간 중앙값 {args.latency_median}s")
+    results = []
+    for session_count in sorted(args.sessions):
+        timings, throughput, rss_growth, memory_per_session = run_level_process(session_count)
+        report_level(session_count, timings, throughput, rss_growth, memory_per_session)
+        results.append((session_count, timings, throughput))
+
+    saturation, reason = find_saturation(results, args.slo)
+    if saturation is None:
+        print(f"\n포화 지점: 측정한 범위(최대 {results[-1][0]}개 세션)에서는 포화되지 않음")
+    else:
+        print(f"\n포화 지점: 동시 세션 {saturation}개 ({reason})")
+
+
+if __name__ == "__main__":
+    main()
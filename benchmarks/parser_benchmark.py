@@ -0,0 +1,140 @@
+"""parse_ad_recommendations 마이크로 벤치마크
+
+기존 줄 단위 스캔 파서(5% 단위 후보 비율을 부분 문자열로 검사)와 현재의 정규식 기반
+파서를 여러 모델 출력 묶음에 대해 비교합니다. 실행 시간과 함께 정답 배분을 정확히
+추출한 출력 수도 출력합니다.
+
+    python benchmarks/parser_benchmark.py --repeat 5
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import parse_ad_recommendations  # noqa: E402
+
+
+def legacy_parse_ad_recommendations(analysis_text):
+    """비교 기준: 정규식 파서 도입 전의 parse_ad_recommendations (Streamlit 호출만 제거)"""
+    lines = analysis_text.strip().split('\n')
+    ad_type = "균형적"
+    media_distribution = {"Google": 25, "Meta": 25, "Naver": 20, "Kakao": 20, "TTD": 10}
+
+    for line in lines:
+        if "검색광고" in line and ("추천" in line or "적합" in line or "적절" in line):
+            ad_type = "검색광고"
+            break
+        elif "디스플레이광고" in line and ("추천" in line or "적합" in line or "적절" in line):
+            ad_type = "디스플레이광고"
+            break
+
+    media_terms = {
+        "Google": ["Google", "구글"],
+        "Meta": ["Meta", "페이스북", "Facebook", "인스타그램", "Instagram"],
+        "Naver": ["Naver", "네이버"],
+        "Kakao": ["Kakao", "카카오"],
+        "TTD": ["TTD"]
+    }
+    for i, line in enumerate(lines):
+        if ("예산 배분" in line or "예산 분배" in line or "비율" in line) and ("매체" in line or "Google" in line or "Meta" in line):
+            for j in range(i+1, min(i+10, len(lines))):
+                line_j = lines[j]
+                for media, terms in media_terms.items():
+                    if any(term in line_j for term in terms):
+                        for percent in range(5, 96, 5):
+                            if f"{percent}%" in line_j or f"{percent} %" in line_j:
+                                media_distribution[media] = percent
+                                break
+            break
+
+    total = sum(media_distribution.values())
+    if total != 100:
+        scale_factor = 100 / total
+        for key in media_distribution:
+            media_distribution[key] = round(media_distribution[key] * scale_factor)
+        diff = 100 - sum(media_distribution.values())
+        if diff != 0:
+            max_key = max(media_distribution, key=media_distribution.get)
+            media_distribution[max_key] += diff
+
+    return {"ad_type": ad_type, "media_distribution": media_distribution}
+
+
+FILLER = (
+    "이 브랜드는 20대와 30대 직장인을 주요 타깃으로 하며, 업계 평균 클릭률 3.5%와 "
+    "전환율 2% 수준을 기대할 수 있습니다. 시즌별 프로모션과 연계하면 효과가 커집니다.\n"
+)
+
+BUDGET_FORMATS = {
+    "bullet": lambda d: "## 2. 매체별 예산 배분\n" + "".join(
+        f"- {media}: {value}%\n" for media, value in d.items()
+    ),
+    "table": lambda d: "| 매체 | 예산 비율 |\n|---|---|\n" + "".join(
+        f"| {media} | {value}% |\n" for media, value in d.items()
+    ),
+    "inline": lambda d: "예산 배분 제안: " + ", ".join(
+        f"{media} {value}%" for media, value in d.items()
+    ) + "\n",
+}
+
+# 예산 배분 목록 앞에 나오는 본문 문장 - "비율"과 매체 이름, 퍼센트가 함께 있지만 예산 배분이 아님
+DECOY_LINES = [
+    "Google 검색광고의 클릭 비율은 보통 3.5% 수준입니다.\n",
+    "전환 비율을 보면 Meta 광고가 가장 안정적입니다 (전환율 2%).\n",
+    "네이버와 카카오의 노출 비율은 모바일이 80% 이상을 차지합니다.\n",
+]
+
+DISTRIBUTIONS = [
+    {"Google": 35, "Meta": 25, "Naver": 20, "Kakao": 15, "TTD": 5},
+    {"Google": 30, "Meta": 33, "Naver": 17, "Kakao": 12, "TTD": 8},
+    {"Google": 40, "Meta": 20, "Naver": 25, "Kakao": 10, "TTD": 5},
+    {"Google": 22, "Meta": 28, "Naver": 26, "Kakao": 16, "TTD": 8},
+    {"Google": 45, "Meta": 15, "Naver": 20, "Kakao": 15, "TTD": 5},
+]
+
+
+def build_outputs(filler_lines, decoys=False):
+    """모델 5개의 분석 결과를 흉내 낸 (텍스트, 정답 배분) 목록 생성 (decoys면 예산 배분 바로 앞에 혼동 문장 추가)"""
+    outputs = []
+    for i, distribution in enumerate(DISTRIBUTIONS):
+        budget_format = list(BUDGET_FORMATS.values())[i % len(BUDGET_FORMATS)]
+        text = (
+            FILLER * filler_lines
+            + "## 1. 광고 유형\n이 캠페인에는 검색광고가 더 적합합니다.\n"
+            + FILLER * filler_lines
+            + ("".join(DECOY_LINES) if decoys else "")
+            + budget_format(distribution)
+            + FILLER * filler_lines
+        )
+        outputs.append((text, distribution))
+    return outputs
+
+
+def run_scenario(name, outputs, repeat, number):
+    print(f"\n[{name}] 모델 출력 {len(outputs)}개, 출력당 평균 {sum(len(t) for t, _ in outputs) // len(outputs):,}자")
+    timings = {}
+    for label, parser in [("legacy", legacy_parse_ad_recommendations), ("regex", parse_ad_recommendations)]:
+        best = min(timeit.repeat(
+            lambda: [parser(text) for text, _ in outputs], repeat=repeat, number=number
+        )) / number
+        correct = sum(parser(text)["media_distribution"] == expected for text, expected in outputs)
+        timings[label] = best
+        print(f"  {label:>6}: 묶음당 {best * 1000:8.3f} ms  정확도 {correct}/{len(outputs)}")
+    print(f"  속도 비율 (legacy / regex): {timings['legacy'] / timings['regex']:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="parse_ad_recommendations 마이크로 벤치마크")
+    parser.add_argument("--repeat", type=int, default=5, help="반복 측정 횟수 (최솟값 사용)")
+    parser.add_argument("--number", type=int, default=50, help="측정 1회당 실행 횟수")
+    args = parser.parse_args()
+
+    run_scenario("일반 출력", build_outputs(filler_lines=20), args.repeat, args.number)
+    run_scenario("대용량 출력", build_outputs(filler_lines=1000), args.repeat, max(1, args.number // 10))
+    run_scenario("혼동 문장 포함", build_outputs(filler_lines=20, decoys=True), args.repeat, args.number)
+
+
+if __name__ == "__main__":
+    main()
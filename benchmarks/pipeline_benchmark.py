@@ -0,0 +1,160 @@
+"""분석 경로 전체(오프라인) 벤치마크
+
+같은 프로세스에서 스텁 제공자 서버(provider_stub.py)를 띄우고 PROVIDER_BASE_URL을 그쪽으로 돌린 뒤,
+캠페인마다 get_ai_analysis → parse_ad_recommendations → generate_simulation_results 를 동시에 실행해
+처리량과 단계별 응답 시간 백분위(p50/p95/p99)를 출력합니다. 실제 API를 호출하지 않으므로 과금 없이
+성능 변경 전후를 비교할 수 있습니다.
+
+    python benchmarks/pipeline_benchmark.py --requests 200 --concurrency 16 --latency-median 0.3
+    python benchmarks/pipeline_benchmark.py --stream --structured --burst-every 40 --burst-length 4
+"""
+import argparse
+import itertools
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from provider_stub import StubProviderServer, add_behavior_arguments, behavior_from_args  # noqa: E402
+
+STAGES = ["analysis", "parse", "simulation", "total"]
+STAGE_LABELS = {"analysis": "AI 분석 호출", "parse": "응답 파싱", "simulation": "시뮬레이션", "total": "전체"}
+
+BRANDS = ["빈하우스 커피", "데일리핏", "모아북스", "그린테이블", "루미에르 스킨"]
+DESCRIPTIONS = [
+    "20~30대 직장인을 위한 스페셜티 커피 구독 서비스",
+    "집에서 하는 홈트레이닝 앱으로, 맞춤 운동 계획과 식단 관리를 함께 제공합니다.",
+    "전자책과 오디오북을 월정액으로 무제한 이용할 수 있는 독서 플랫폼입니다. 베스트셀러와 독립 출판물을 함께 큐레이션합니다.",
+    "유기농 채소 정기 배송",
+    "민감성 피부를 위한 저자극 스킨케어 브랜드로, 피부과 테스트를 거친 성분만 사용합니다. 온라인 단독 판매 중입니다.",
+]
+GOALS = ["구독 전환", "앱 설치", "브랜드 인지도 향상", "첫 구매 전환"]
+
+
+def build_campaigns(count):
+    """브랜드/설명/목표 조합을 돌아가며 만든 캠페인 목록 (같은 프롬프트가 반복되지 않도록 번호 부여)"""
+    combos = itertools.cycle(itertools.product(BRANDS, DESCRIPTIONS, GOALS))
+    return [
+        {"brand_name": f"{brand} #{i}", "brand_description": description, "campaign_goal": goal}
+        for i, (brand, description, goal) in zip(range(count), combos)
+    ]
+
+
+def configure_environment(base_url, args):
+    """pipeline 모듈이 불러올 때 읽는 설정을 벤치마크용으로 지정 (import 전에 호출)"""
+    os.environ["PROVIDER_BASE_URL"] = base_url
+    os.environ["HTTP_PREWARM"] = "false"
+    os.environ["HTTP_POOL_MAXSIZE"] = str(max(args.concurrency, 10))
+    os.environ["PROVIDER_REQUESTS_PER_MINUTE"] = str(args.requests_per_minute)
+    os.environ["PROVIDER_BURST"] = str(args.concurrency)
+    os.environ["SIMULATION_RUNS"] = str(args.simulation_runs)
+
+
+def run_campaign(pipeline, campaign, model_name, structured, stream):
+    """캠페인 하나를 분석 → 파싱 → 시뮬레이션까지 실행하고 단계별 소요 시간(초) 반환"""
+    timings = {}
+    start = time.perf_counter()
+    prompt = pipeline.build_analysis_prompt(campaign, structured=structured)
+    on_token = (lambda text: None) if stream else None
+    deadline = time.monotonic() + pipeline.ANALYSIS_DEADLINE
+    text = pipeline.get_ai_analysis(prompt, model_name, on_token=on_token, deadline=deadline)
+    timings["analysis"] = time.perf_counter() - start
+    if pipeline.is_error_result(text):
+        return timings, False
+
+    stage_start = time.perf_counter()
+    if structured:
+        parsed_data = pipeline.build_analysis_entry(text)["parsed_data"]
+    else:
+        parsed_data = pipeline.parse_ad_recommendations(text)
+    timings["parse"] = time.perf_counter() - stage_start
+
+    stage_start = time.perf_counter()
+    pipeline.generate_simulation_results(campaign, parsed_data["ad_type"], parsed_data["media_distribution"])
+    timings["simulation"] = time.perf_counter() - stage_start
+    timings["total"] = time.perf_counter() - start
+    return timings, True
+
+
+def report(samples, succeeded, failed, elapsed):
+    print(f"\n  완료 {succeeded}건, 실패 {failed}건, 경과 {elapsed:.2f}초, 처리량 {succeeded / elapsed:.1f}건/초")
+    print(f"  {'단계':<12}{'p50 (ms)':>12}{'p95 (ms)':>12}{'p99 (ms)':>12}{'최대 (ms)':>12}")
+    for stage in STAGES:
+        values = samples[stage]
+        if not values:
+            continue
+        p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+        print(f"  {STAGE_LABELS[stage]:<12}{p50:12.1f}{p95:12.1f}{p99:12.1f}{max(values) * 1000:12.1f}")
+
+
+def report_provider_metrics(metrics):
+    """pipeline 성능 지표 중 제공자 응답 상태 코드 수"""
+    counters = [row for row in metrics.summary()["counters"] if row["metric"] == "provider_responses_total"]
+    if not counters:
+        return
+    print("\n  제공자 응답 상태")
+    for row in counters:
+        print(f"    {row['labels']['provider']:<10} {row['labels']['status']:<18} {row['value']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="분석 경로 전체(오프라인) 벤치마크")
+    parser.add_argument("--requests", type=int, default=200, help="실행할 캠페인 분석 수")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시에 실행할 분석 수")
+    parser.add_argument("--models", nargs="+", default=["ChatGPT", "Claude", "Gemini", "DeepSeek", "Grok"],
+                        help="돌아가며 호출할 모델")
+    parser.add_argument("--stream", action="store_true", help="스트리밍 응답으로 호출")
+    parser.add_argument("--structured", action="store_true",
+                        help="JSON 형식 응답을 요청하고 build_analysis_entry로 파싱 (기본은 텍스트 응답을 parse_ad_recommendations로 파싱)")
+    parser.add_argument("--simulation-runs", type=int, default=2000, help="시뮬레이션 반복 횟수")
+    parser.add_argument("--requests-per-minute", type=int, default=100000, help="제공자별 호출 제한 (분당 요청 수)")
+    add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    with StubProviderServer(behavior_from_args(args)) as server:
+        configure_environment(server.base_url, args)
+        import pipeline
+
+        for model_name in args.models:
+            os.environ[pipeline.PROVIDERS[model_name].api_key_name] = "stub-key"
+        errors = []
+        pipeline.set_error_handler(errors.append)
+
+        campaigns = build_campaigns(args.requests)
+        samples = {stage: [] for stage in STAGES}
+        samples_lock = threading.Lock()
+        outcomes = {"succeeded": 0, "failed": 0}
+
+        def task(index):
+            timings, succeeded = run_campaign(
+                pipeline, campaigns[index], args.models[index % len(args.models)], args.structured, args.stream
+            )
+            with samples_lock:
+                for stage, value in timings.items():
+                    samples[stage].append(value)
+                outcomes["succeeded" if succeeded else "failed"] += 1
+
+        print(f"[분석 경로 벤치마크] 캠페인 {args.requests}건, 동시 {args.concurrency}개, 모델 {', '.join(args.models)}")
+        print(f"  스텁 서버 {server.base_url}: 응답 시간 중앙값 {args.latency_median}s, 오류율 {args.error_rate:.0%}, "
+              f"429 구간 {args.burst_length}/{args.burst_every or '-'}, "
+              f"{'스트리밍' if args.stream else '일반'} 응답, {'JSON' if args.structured else '텍스트'} 형식")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(task, range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+        report(samples, outcomes["succeeded"], outcomes["failed"], elapsed)
+        report_provider_metrics(pipeline.METRICS)
+        if errors:
+            print(f"\n  오류 메시지 {len(errors)}건 (예: {errors[0]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""오프라인 AI 제공자 스텁 서버
+
+실제 API 대신 로컬에서 OpenAI 호환 chat completions(OpenAI, DeepSeek, Grok), Anthropic messages,
+Gemini generateContent/streamGenerateContent 형식으로 응답합니다. 응답 시간 분포(로그정규),
+오류율, 주기적인 429 응답 구간, 한국어 분석 응답을 설정할 수 있어 과금 없이 분석 경로를
+테스트하고 성능을 측정할 수 있습니다.
+
+    python benchmarks/provider_stub.py --port 8900 --latency-median 1.0 --error-rate 0.02 \\
+        --burst-every 50 --burst-length 5
+
+앱이나 batch.py에서 사용할 때는 PROVIDER_BASE_URL=http://127.0.0.1:8900 과 임의의 API 키를 설정합니다.
+다른 벤치마크에서는 StubProviderServer를 같은 프로세스에서 띄워 사용합니다.
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STREAM_CHUNK_CHARS = 24  # 스트리밍 응답 조각 하나의 글자 수
+TTFB_RATIO = 0.3  # 스트리밍 응답에서 첫 조각까지 걸리는 시간 비율 (나머지는 조각 사이에 나눠 대기)
+
+AD_TYPE_LINES = {
+    "검색광고": "이 캠페인에는 검색광고가 더 적합합니다. 구매 의도가 분명한 키워드 검색 사용자를 바로 전환으로 연결할 수 있습니다.",
+    "디스플레이광고": "이 캠페인에는 디스플레이광고를 추천합니다. 브랜드 인지도를 넓히고 관심사 기반 타깃에게 반복 노출하기 좋습니다.",
+    "균형적": "검색광고와 디스플레이광고를 균형 있게 집행하는 것이 적절합니다. 인지도 확보와 전환을 함께 노릴 수 있습니다.",
+}
+
+DISTRIBUTIONS = [
+    {"Google": 35, "Meta": 25, "Naver": 20, "Kakao": 15, "TTD": 5},
+    {"Google": 30, "Meta": 33, "Naver": 17, "Kakao": 12, "TTD": 8},
+    {"Google": 40, "Meta": 20, "Naver": 25, "Kakao": 10, "TTD": 5},
+    {"Google": 22, "Meta": 28, "Naver": 26, "Kakao": 16, "TTD": 8},
+    {"Google": 45, "Meta": 15, "Naver": 20, "Kakao": 15, "TTD": 5},
+]
+
+BUDGET_FORMATS = [
+    lambda d: "## 2. 매체별 예산 배분\n" + "".join(f"- {media}: {value}%\n" for media, value in d.items()),
+    lambda d: "## 2. 매체별 예산 배분\n| 매체 | 예산 비율 |\n|---|---|\n" + "".join(
+        f"| {media} | {value}% |\n" for media, value in d.items()
+    ),
+    lambda d: "## 2. 예산 배분\n예산 배분 제안: " + ", ".join(f"{media} {value}%" for media, value in d.items()) + "\n",
+]
+
+CREATIVES = [{"type": "반응형 검색광고", "count": 3}, {"type": "배너 이미지", "count": 4}, {"type": "숏폼 영상", "count": 2}]
+AD_COPIES = ["매일 아침, 새로 볶은 커피가 문 앞에", "첫 달 50% 할인으로 시작하세요", "당신의 취향을 아는 구독 서비스"]
+
+FILLER = (
+    "주요 타깃은 20대와 30대 직장인이며, 업계 평균 클릭률과 전환율을 기준으로 보면 초기 4주 동안은 "
+    "학습 기간으로 보고 입찰가를 보수적으로 운영하는 것이 좋습니다.\n"
+)
+
+
+def build_analysis_text(ad_type, distribution, budget_format, filler_lines):
+    """마크다운 형식의 한국어 분석 응답"""
+    return (
+        "## 1. 광고 유형\n" + AD_TYPE_LINES[ad_type] + "\n\n"
+        + FILLER * filler_lines
+        + budget_format(distribution) + "\n"
+        + "## 3. 광고 소재\n" + "".join(f"- {c['type']} {c['count']}개\n" for c in CREATIVES) + "\n"
+        + "## 4. 광고 문구 예시\n" + "".join(f"- \"{copy}\"\n" for copy in AD_COPIES)
+        + FILLER * filler_lines
+    )
+
+
+def build_canned_response(prompt, model, filler_lines=2):
+    """프롬프트와 모델로 정해지는 한국어 분석 응답 (같은 요청에는 항상 같은 응답, JSON을 요청하면 JSON으로)"""
+    digest = int(hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest(), 16)
+    ad_type = list(AD_TYPE_LINES)[digest % len(AD_TYPE_LINES)]
+    distribution = DISTRIBUTIONS[(digest >> 8) % len(DISTRIBUTIONS)]
+    budget_format = BUDGET_FORMATS[(digest >> 16) % len(BUDGET_FORMATS)]
+    text = build_analysis_text(ad_type, distribution, budget_format, filler_lines)
+    if "JSON" not in prompt:
+        return text
+    return json.dumps({
+        "analysis": text,
+        "ad_type": ad_type,
+        "media_distribution": distribution,
+        "creatives": CREATIVES,
+        "ad_copies": AD_COPIES
+    }, ensure_ascii=False)
+
+
+class StubBehavior:
+    """스텁 서버의 응답 시간/오류 설정
+
+    - 응답 시간: 중앙값 latency_median, 로그 표준편차 latency_sigma인 로그정규 분포
+    - 오류: error_rate 확률로 503 응답
+    - 429 구간: 모델별 요청 burst_every개마다 처음 burst_length개는 Retry-After와 함께 429 응답
+    """
+
+    def __init__(self, latency_median=0.5, latency_sigma=0.4, error_rate=0.0, burst_every=0, burst_length=0,
+                 retry_after=1, filler_lines=2, seed=None):
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.filler_lines = filler_lines
+        self._random = random.Random(seed)
+        self._request_counts = {}
+        self._lock = threading.Lock()
+
+    def next_outcome(self, model):
+        """요청 하나의 (결과, 응답 시간) - 결과는 "ok", "throttled", "error" 중 하나"""
+        with self._lock:
+            index = self._request_counts.get(model, 0)
+            self._request_counts[model] = index + 1
+            latency = self.latency_median * math.exp(self._random.gauss(0, self.latency_sigma)) if self.latency_median else 0.0
+            failed = self._random.random() < self.error_rate
+        if self.burst_every and index % self.burst_every < self.burst_length:
+            return "throttled", 0.0
+        if failed:
+            return "error", latency * 0.1
+        return "ok", latency
+
+    def request_counts(self):
+        with self._lock:
+            return dict(self._request_counts)
+
+
+def split_chunks(text, size=STREAM_CHUNK_CHARS):
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+def chat_response(model, text):
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(text) // 2, "total_tokens": len(text) // 2}
+    }
+
+
+def chat_events(model, chunks):
+    for chunk in chunks:
+        yield None, {"object": "chat.completion.chunk", "model": model, "choices": [{"index": 0, "delta": {"content": chunk}}]}
+    yield None, "[DONE]"
+
+
+def anthropic_response(model, text):
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:12]}",
+        "type": "message",
+        "role": "assistant",
+        "model": model,
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "usage": {"input_tokens": 0, "output_tokens": len(text) // 2}
+    }
+
+
+def anthropic_events(model, chunks):
+    yield "message_start", {"type": "message_start", "message": {"model": model, "role": "assistant", "content": []}}
+    yield "content_block_start", {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}
+    for chunk in chunks:
+        yield "content_block_delta", {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk}}
+    yield "content_block_stop", {"type": "content_block_stop", "index": 0}
+    yield "message_stop", {"type": "message_stop"}
+
+
+def gemini_response(model, text):
+    return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}]}
+
+
+def gemini_events(model, chunks):
+    for chunk in chunks:
+        yield None, {"candidates": [{"content": {"role": "model", "parts": [{"text": chunk}]}}]}
+
+
+def parse_route(path, payload):
+    """요청 경로와 본문에서 (API 형식, 모델, 프롬프트, 스트리밍 여부) 추출 (알 수 없는 경로면 None)"""
+    path = path.split("?", 1)[0]
+    if path.endswith("/chat/completions"):
+        return "chat", payload.get("model", ""), payload["messages"][-1]["content"], bool(payload.get("stream"))
+    if path.endswith("/messages"):
+        return "anthropic", payload.get("model", ""), payload["messages"][-1]["content"], bool(payload.get("stream"))
+    if ":generateContent" in path or ":streamGenerateContent" in path:
+        model = path.rsplit("/", 1)[-1].split(":", 1)[0]
+        stream = ":streamGenerateContent" in path
+        return "gemini", model, payload["contents"][0]["parts"][0]["text"], stream
+    return None
+
+
+API_FORMATS = {
+    "chat": (chat_response, chat_events),
+    "anthropic": (anthropic_response, anthropic_events),
+    "gemini": (gemini_response, gemini_events),
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive 연결 재사용을 실제 API와 같게 유지
+
+    def do_HEAD(self):
+        # 앱 시작 시 연결 미리 맺기 요청
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        behavior = self.server.behavior
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            route = parse_route(self.path, payload)
+        except (ValueError, KeyError, IndexError, TypeError):
+            self.send_json(400, {"error": {"message": "잘못된 요청 형식입니다"}})
+            return
+        if route is None:
+            self.send_json(404, {"error": {"message": f"알 수 없는 경로: {self.path}"}})
+            return
+        api_format, model, prompt, stream = route
+
+        outcome, latency = behavior.next_outcome(model)
+        if outcome == "throttled":
+            self.send_json(429, {"error": {"message": "Rate limit exceeded"}}, {"Retry-After": str(behavior.retry_after)})
+            return
+        if outcome == "error":
+            time.sleep(latency)
+            self.send_json(503, {"error": {"message": "Service temporarily unavailable"}})
+            return
+
+        text = build_canned_response(prompt, model, behavior.filler_lines)
+        build_response, build_events = API_FORMATS[api_format]
+        if not stream:
+            time.sleep(latency)
+            self.send_json(200, build_response(model, text))
+            return
+
+        chunks = split_chunks(text)
+        time.sleep(latency * TTFB_RATIO)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        interval = latency * (1 - TTFB_RATIO) / len(chunks)
+        for event, data in build_events(model, chunks):
+            body = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+            message = (f"event: {event}\n" if event else "") + f"data: {body}\n\n"
+            self.write_chunk(message.encode("utf-8"))
+            if interval:
+                time.sleep(interval)
+        self.write_chunk(b"")
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def write_chunk(self, data):
+        """chunked 전송 조각 하나 쓰기 (빈 데이터면 응답 끝)"""
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 클라이언트가 재시도 전에 연결을 먼저 닫는 경우는 정상 동작이므로 무시
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubProviderServer:
+    """백그라운드 스레드에서 도는 스텁 서버 (with 문으로 시작/종료)"""
+
+    def __init__(self, behavior=None, host="127.0.0.1", port=0):
+        self.behavior = behavior or StubBehavior()
+        self._server = _StubHTTPServer((host, port), _StubHandler)
+        self._server.behavior = self.behavior
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        """현재 스레드에서 실행 (Ctrl+C로 종료)"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def add_behavior_arguments(parser):
+    """스텁 서버 응답 설정용 명령행 인자 (다른 벤치마크에서도 공통으로 사용)"""
+    group = parser.add_argument_group("스텁 서버 설정")
+    group.add_argument("--latency-median", type=float, default=0.5, help="응답 시간 중앙값 (초)")
+    group.add_argument("--latency-sigma", type=float, default=0.4, help="응답 시간 로그정규 분포의 표준편차")
+    group.add_argument("--error-rate", type=float, default=0.0, help="503 오류 응답 비율 (0~1)")
+    group.add_argument("--burst-every", type=int, default=0, help="모델별 요청 N개마다 429 구간 시작 (0이면 없음)")
+    group.add_argument("--burst-length", type=int, default=0, help="429 구간의 요청 수")
+    group.add_argument("--retry-after", type=int, default=1, help="429 응답의 Retry-After (초)")
+    group.add_argument("--filler-lines", type=int, default=2, help="응답에 덧붙이는 설명 문단 수 (응답 크기 조절)")
+    group.add_argument("--seed", type=int, default=None, help="응답 시간/오류 난수 시드")
+
+
+def behavior_from_args(args):
+    return StubBehavior(
+        latency_median=args.latency_median, latency_sigma=args.latency_sigma, error_rate=args.error_rate,
+        burst_every=args.burst_every, burst_length=args.burst_length, retry_after=args.retry_after,
+        filler_lines=args.filler_lines, seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 AI 제공자 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    server = StubProviderServer(behavior_from_args(args), args.host, args.port)
+    print(f"스텁 서버 실행 중: {server.base_url}  (PROVIDER_BASE_URL={server.base_url})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
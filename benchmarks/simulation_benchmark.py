@@ -0,0 +1,89 @@
+"""성과 시뮬레이션 기간/집계 단위별 벤치마크와 일관성 검사
+
+시뮬레이션 기간(12주~2년)과 집계 단위(주/일)마다 generate_simulation_results 실행 시간을 측정하고,
+같은 기간을 일 단위로 계산한 합계(노출 수, 클릭 수, 전환 수, 집행 예산)가 주 단위 합계와 맞는지,
+마지막 7일 일별 도달률의 합집합이 마지막 주 도달률과 맞는지 검사합니다. 어긋나면 종료 코드 1로 끝납니다.
+
+    python benchmarks/simulation_benchmark.py --runs 10000 --repeat 3
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pipeline  # noqa: E402
+
+CAMPAIGN = {"brand_description": "20~30대 직장인을 위한 스페셜티 커피 구독 서비스로, 매달 새로운 원두를 보내 드립니다."}
+HORIZONS = [84, 182, 364, 728]  # 주 단위와 비교할 수 있도록 7의 배수
+TOTAL_METRICS = ["impressions", "clicks", "conversions"]
+
+
+def simulate(horizon_days, granularity, runs, seed=0):
+    return pipeline.generate_simulation_results(
+        CAMPAIGN, pipeline.AD_TYPES[0], None, runs=runs, seed=seed,
+        horizon_days=horizon_days, granularity=granularity
+    )
+
+
+def measure(horizon_days, granularity, runs, repeat):
+    """(가장 짧은 실행 시간(초), 마지막 결과)"""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = simulate(horizon_days, granularity, runs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def check_consistency(daily, weekly, tolerance):
+    """일 단위와 주 단위 결과를 비교해 어긋난 항목 설명 목록 반환"""
+    problems = []
+    for metric in TOTAL_METRICS:
+        daily_total, weekly_total = daily.periods[metric].sum(), weekly.periods[metric].sum()
+        if abs(daily_total / weekly_total - 1) > tolerance:
+            problems.append(f"{metric} 합계 {daily_total:,} (일) / {weekly_total:,} (주)")
+    if daily.channels["spend"].sum() != weekly.channels["spend"].sum():
+        problems.append(f"집행 예산 {daily.channels['spend'].sum():,} (일) / {weekly.channels['spend'].sum():,} (주)")
+    # 기간별 도달률은 중앙값이므로 합집합은 근사치 - 같은 허용 오차로 비교
+    week_union = 1 - np.prod(1 - daily.periods["reach"][-7:])
+    weekly_reach = weekly.periods["reach"][-1]
+    if abs(min(week_union, 0.95) - weekly_reach) > tolerance * weekly_reach:
+        problems.append(f"마지막 주 도달률 {week_union:.3f} (일별 합집합) / {weekly_reach:.3f} (주)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="성과 시뮬레이션 기간/집계 단위별 벤치마크와 일관성 검사")
+    parser.add_argument("--runs", type=int, default=pipeline.SIMULATION_RUNS, help="시뮬레이션 반복 횟수")
+    parser.add_argument("--repeat", type=int, default=3, help="측정 반복 횟수 (최솟값 사용)")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="일/주 합계 허용 오차 (비율)")
+    args = parser.parse_args()
+
+    print(f"[시뮬레이션 벤치마크] 반복 {args.runs:,}회")
+    print(f"  {'기간':>6}{'단위':>6}{'기간 수':>8}{'반복':>8}{'시간 (ms)':>12}{'전환 수':>12}{'최종 도달률':>12}")
+    failures = []
+    for horizon_days in HORIZONS:
+        results = {}
+        for granularity in pipeline.SIMULATION_GRANULARITIES:
+            elapsed, result = measure(horizon_days, granularity, args.runs, args.repeat)
+            results[granularity] = result
+            print(f"  {horizon_days:>5}일{pipeline.SIMULATION_GRANULARITIES[granularity]:>6}{result.period_count:>8}{result.runs:>8,}"
+                  f"{elapsed * 1000:12.1f}{result.total_conversions:12,}{result.final_reach:12.1%}")
+        for problem in check_consistency(results["day"], results["week"], args.tolerance):
+            failures.append(f"{horizon_days}일: {problem}")
+
+    if failures:
+        print("\n  일/주 결과 불일치")
+        for failure in failures:
+            print(f"    {failure}")
+        sys.exit(1)
+    print(f"\n  일/주 합계와 마지막 주 도달률이 {args.tolerance:.0%} 안에서 일치합니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""app.py 시작/재실행 시간 벤치마크
+
+Streamlit AppTest로 앱 스크립트를 실행해 다음을 측정합니다.
+
+- 콜드 스타트: 새 프로세스에서 첫 화면(단계 1)을 처음 실행하는 시간 (Streamlit 자체 import 시간 제외)
+- 재실행: 같은 세션에서 단계 1과 단계 3(분석 결과 화면, 기본 기간과 2년 일 단위)을 다시 실행하는 시간
+  (실제 서버처럼 스크립트 바이트코드 캐시를 공유하므로 app.py 컴파일 시간은 제외)
+
+    python benchmarks/startup_benchmark.py --cold 5 --reruns 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+# 재실행 측정은 같은 프로세스에서 AppTest로 app.py를 실행하므로 pipeline을 찾을 수 있도록 저장소 경로 추가
+sys.path.insert(0, ROOT)
+
+COLD_START_SCRIPT = f"""
+import time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({APP!r}, default_timeout=120)
+start = time.perf_counter()
+at.run()
+print(time.perf_counter() - start)
+"""
+
+ANALYSIS_TEXT = (
+    "검색광고를 추천합니다.\n매체별 예산 배분 비율\n"
+    "- Google: 40%\n- Meta: 20%\n- Naver: 25%\n- Kakao: 10%\n- TTD: 5%\n"
+)
+
+
+def measure_cold_start(count):
+    """새 프로세스에서 첫 실행 시간 (초) 목록"""
+    timings = []
+    for _ in range(count):
+        output = subprocess.run(
+            [sys.executable, "-c", COLD_START_SCRIPT], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+def make_step_3_state(at):
+    """분석이 끝난 단계 3 화면 상태 설정"""
+    at.session_state.step = 3
+    at.session_state.campaign_data = {
+        "brand_name": "테스트",
+        "brand_description": "20~30대 직장인을 위한 스페셜티 커피 구독 서비스",
+        "campaign_goal": "구독 전환",
+        "selected_models": ["ChatGPT"]
+    }
+    at.session_state.analysis_results = {
+        "ChatGPT": {
+            "raw_text": ANALYSIS_TEXT,
+            "parsed_data": {
+                "ad_type": "검색광고",
+                "media_distribution": {"Google": 40, "Meta": 20, "Naver": 25, "Kakao": 10, "TTD": 5}
+            },
+            "latency": 3.0,
+            "cached": False
+        }
+    }
+
+
+def share_script_cache():
+    """AppTest는 run()마다 새 ScriptCache를 만들어 app.py를 매번 다시 컴파일(약 0.1초)하지만, 실제 서버는
+    Runtime의 ScriptCache 하나를 모든 재실행에서 재사용하므로 같은 방식으로 하나를 공유"""
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import local_script_runner
+
+    script_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: script_cache
+
+
+def measure_reruns(count, step_3=False, horizon=None):
+    """같은 세션에서 재실행 시간 (초) 목록 (첫 실행은 제외, horizon은 단계 3의 (기간 일 수, 집계 단위))"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    if step_3:
+        make_step_3_state(at)
+    if horizon is not None:
+        at.session_state.simulation_horizon, at.session_state.simulation_granularity = horizon
+    at.run()
+    if step_3:
+        at.button(key="sim_button").click()
+        at.run()
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return timings
+
+
+def report(name, timings):
+    print(f"  {name:<22} 중앙값 {statistics.median(timings) * 1000:8.1f} ms  "
+          f"최소 {min(timings) * 1000:8.1f} ms  ({len(timings)}회)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="app.py 시작/재실행 시간 벤치마크")
+    parser.add_argument("--cold", type=int, default=5, help="콜드 스타트 측정 횟수")
+    parser.add_argument("--reruns", type=int, default=20, help="재실행 측정 횟수")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    share_script_cache()
+    print("[app.py 실행 시간]")
+    report("콜드 스타트", measure_cold_start(args.cold))
+    report("재실행 (단계 1)", measure_reruns(args.reruns))
+    report("재실행 (단계 3)", measure_reruns(args.reruns, step_3=True))
+    report("재실행 (단계 3, 2년 일 단위)", measure_reruns(args.reruns, step_3=True, horizon=(730, "day")))
+
+
+if __name__ == "__main__":
+    main()
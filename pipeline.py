@@ -0,0 +1,2453 @@
+"""광고 분석 파이프라인 (AI 분석 → 결과 파싱 → 성과 시뮬레이션 → 예산 배분 최적화)
+
+Streamlit 없이도 동작하도록 화면과 분리한 모듈입니다. app.py와 일괄 처리 CLI(batch.py)가
+함께 사용합니다.
+"""
+import json
+import time
+import os
+import sys
+import hashlib
+import re
+import bisect
+import math
+import logging
+import random
+import threading
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from itertools import accumulate
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit, urlunsplit
+
+try:
+    import tomllib
+except ImportError:  # Python 3.10 이하 - Streamlit과 함께 설치되는 toml 패키지 사용
+    try:
+        import toml as tomllib
+    except ImportError:
+        tomllib = None
+
+logger = logging.getLogger(__name__)
+
+# 비밀 값/설정 파일 (Streamlit과 같은 위치의 secrets.toml, 프로젝트 파일이 우선)
+SECRETS_FILES = [
+    os.path.join(os.path.expanduser("~"), ".streamlit", "secrets.toml"),
+    os.path.join(".streamlit", "secrets.toml")
+]
+
+def load_secrets(paths=SECRETS_FILES):
+    """secrets.toml 파일들을 읽어 하나의 딕셔너리로 병합 (없거나 읽을 수 없는 파일은 건너뜀)
+    
+    Streamlit 앱에서 불러온 경우에는 st.secrets(배포 환경의 시크릿 포함)도 병합한다. 아래의 모듈 수준 설정은
+    이 모듈을 불러올 때 한 번 읽으므로, app.py에서 init_pipeline을 실행하기 전에 시크릿이 반영되어 있어야 한다.
+    """
+    secrets = {}
+    if tomllib is not None:
+        for path in paths:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    secrets.update(tomllib.loads(f.read()))
+            except (OSError, ValueError):
+                continue
+    # Streamlit을 이미 불러온 경우에만 사용 (batch.py 등에서 Streamlit을 새로 불러오지 않음)
+    streamlit = sys.modules.get("streamlit")
+    if streamlit is not None:
+        try:
+            secrets.update(dict(streamlit.secrets))
+        except Exception:
+            pass
+    return secrets
+
+SECRETS = load_secrets()
+
+def configure_secrets(mapping):
+    """외부에서 읽은 비밀 값(예: st.secrets)을 설정 저장소에 반영
+    
+    모듈 수준 설정은 불러올 때 이미 읽었으므로, 이 호출로 값이 바뀌는 설정은 경고로 남긴다.
+    """
+    SECRETS.update(mapping)
+    for name, (default, value) in list(_settings_read.items()):
+        if get_setting(name, default) != value:
+            logger.warning("%s 설정이 모듈을 불러온 뒤에 바뀌어 반영되지 않을 수 있습니다", name)
+
+def get_secret(name, default=None):
+    """환경 변수, secrets.toml 순서로 비밀 값 조회"""
+    value = os.environ.get(name)
+    if value is None:
+        value = SECRETS.get(name, default)
+    return value
+
+# 설정값 조회 (환경 변수나 secrets.toml에 없으면 기본값 사용)
+def get_setting(name, default):
+    value = _convert_setting(get_secret(name), default)
+    _settings_read[name] = (default, value)
+    return value
+
+def _convert_setting(value, default):
+    if value is None:
+        return default
+    try:
+        if isinstance(default, bool) and isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        return type(default)(value)
+    except (TypeError, ValueError):
+        return default
+
+# 읽은 설정 {이름: (기본값, 값)} - configure_secrets에서 나중에 바뀐 설정을 찾을 때 사용
+_settings_read = {}
+
+# 오류 알림 - 기본은 로그로 남기고, 앱에서는 set_error_handler(st.error)로 화면에 표시
+_error_handler = logger.error
+
+def set_error_handler(handler):
+    global _error_handler
+    _error_handler = handler
+
+def report_error(message):
+    _error_handler(message)
+
+# 성능 지표 - 제공자별 응답 시간/첫 바이트 시간/상태 코드/요청·응답 크기와 파이프라인 단계별 소요 시간을
+# 히스토그램과 카운터로 모아 Prometheus 텍스트 형식으로 내보냄
+METRICS_PORT = get_setting("METRICS_PORT", 0)  # 0이면 /metrics HTTP 서버를 띄우지 않음
+METRICS_HOST = get_setting("METRICS_HOST", "127.0.0.1")  # 기본은 로컬에서만 접근 - 외부 수집기가 있으면 "0.0.0.0"
+ADMIN_PANEL = get_setting("ADMIN_PANEL", False)  # 앱 사이드바에 성능 지표 관리 패널을 표시할지 여부
+METRICS_WINDOW = 1000  # 백분위(p50/p95/p99) 계산에 쓰는 시계열별 최근 측정값 수
+METRICS_PREFIX = "adtech_"
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+# 지표 이름: (종류, 설명, 히스토그램 구간)
+METRIC_DEFINITIONS = {
+    "provider_request_seconds": ("histogram", "API 요청 1회(재시도는 각각)의 전체 소요 시간 (초)", LATENCY_BUCKETS),
+    "provider_ttfb_seconds": ("histogram", "API 요청을 보낸 뒤 응답 헤더를 받기까지의 시간 (초)", LATENCY_BUCKETS),
+    "provider_request_bytes": ("histogram", "API 요청 본문 크기 (바이트)", SIZE_BUCKETS),
+    "provider_response_bytes": ("histogram", "API 응답 본문 크기 (바이트, 스트리밍은 받은 텍스트 기준)", SIZE_BUCKETS),
+    "provider_responses_total": ("counter", "상태 코드(또는 timeout, connection_error)별 API 응답 수", None),
+    "provider_coalesced_total": ("counter", "진행 중인 같은 요청의 결과를 함께 받아 API를 호출하지 않은 수", None),
+    "stage_seconds": ("histogram", "파이프라인 단계별 소요 시간 (초)", STAGE_BUCKETS)
+}
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels) + "}"
+
+class MetricsRegistry:
+    """히스토그램(구간별 누적 수, 합계, 최근 측정값)과 카운터를 레이블 조합별로 보관"""
+    
+    def __init__(self, definitions=METRIC_DEFINITIONS, window=METRICS_WINDOW):
+        self.definitions = definitions
+        self.window = window
+        self._histograms = {}  # (이름, 레이블) -> {"buckets": [...], "sum": 합계, "count": 개수, "recent": deque}
+        self._counters = {}  # (이름, 레이블) -> 값
+        self._lock = threading.Lock()
+    
+    def observe(self, name, value, **labels):
+        """히스토그램에 측정값 하나 추가"""
+        buckets = self.definitions[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = {"buckets": [0] * len(buckets), "sum": 0.0, "count": 0, "recent": deque(maxlen=self.window)}
+                self._histograms[key] = series
+            index = bisect.bisect_left(buckets, value)
+            if index < len(buckets):
+                series["buckets"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+            series["recent"].append(value)
+    
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+    
+    @contextmanager
+    def timer(self, name, **labels):
+        """with 블록의 소요 시간을 히스토그램에 기록"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+    
+    def summary(self):
+        """관리 화면용 요약 - 히스토그램별 개수와 최근 측정값의 p50/p95/p99, 카운터 값"""
+        with self._lock:
+            histograms = [(key, series["count"], list(series["recent"])) for key, series in self._histograms.items()]
+            counters = list(self._counters.items())
+        rows = []
+        for (name, labels), count, recent in sorted(histograms):
+            p50, p95, p99 = np.percentile(recent, [50, 95, 99]) if recent else (0.0, 0.0, 0.0)
+            rows.append({
+                "metric": name, "labels": dict(labels), "count": count,
+                "p50": float(p50), "p95": float(p95), "p99": float(p99)
+            })
+        return {
+            "histograms": rows,
+            "counters": [
+                {"metric": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters)
+            ]
+        }
+    
+    def render_prometheus(self):
+        """Prometheus 텍스트 형식(0.0.4)으로 모든 지표 출력"""
+        with self._lock:
+            histograms = {key: (list(s["buckets"]), s["sum"], s["count"]) for key, s in self._histograms.items()}
+            counters = dict(self._counters)
+        lines = []
+        for name, (kind, description, buckets) in self.definitions.items():
+            full_name = METRICS_PREFIX + name
+            lines.append(f"# HELP {full_name} {description}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            if kind == "counter":
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{full_name}{_format_labels(labels)} {value}")
+                continue
+            for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {total:.6f}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+METRICS = MetricsRegistry()
+
+def time_stage(stage):
+    """파이프라인 단계 소요 시간 측정 (with time_stage("parse"): ... 또는 함수 데코레이터로 사용)"""
+    return METRICS.timer("stage_seconds", stage=stage)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = METRICS.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        # 수집 요청마다 로그를 남기지 않음
+        pass
+
+_metrics_server = None
+_metrics_server_lock = threading.Lock()
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """/metrics 경로로 Prometheus 지표를 제공하는 HTTP 서버를 백그라운드에서 시작 (프로세스당 한 번, port가 0이면 무시)"""
+    global _metrics_server
+    with _metrics_server_lock:
+        if _metrics_server is not None or not port:
+            return _metrics_server
+        try:
+            _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            logger.warning("지표 서버를 시작하지 못했습니다 (%s:%s): %s", host, port, e)
+            return None
+        threading.Thread(target=_metrics_server.serve_forever, daemon=True).start()
+    return _metrics_server
+
+# HTTP 연결 풀 설정 (호스트별 풀 개수와 풀당 최대 연결 수)
+HTTP_POOL_CONNECTIONS = get_setting("HTTP_POOL_CONNECTIONS", 10)
+HTTP_POOL_MAXSIZE = get_setting("HTTP_POOL_MAXSIZE", 10)
+# 앱 시작 시 API 서버와 미리 연결을 맺어 둘지 여부
+HTTP_PREWARM = get_setting("HTTP_PREWARM", True)
+# 지정하면 모든 제공자 요청을 이 주소(scheme://host:port)로 보냄 - 로컬 스텁 서버로 오프라인 테스트/벤치마크할 때 사용
+PROVIDER_BASE_URL = get_setting("PROVIDER_BASE_URL", "")
+
+# 모델별 호출 설정 (API 모델 ID, 온도, 시스템 프롬프트 등)
+SYSTEM_PROMPT = "당신은 광고 및 마케팅 전략 전문가입니다."
+MODEL_CONFIG = {
+    "ChatGPT": {"model": "gpt-4", "temperature": 0.7, "system": SYSTEM_PROMPT},
+    "Claude": {"model": "claude-3-opus-20240229", "temperature": 0.7, "max_tokens": 2000, "system": SYSTEM_PROMPT},
+    "Gemini": {"model": "gemini-pro", "temperature": 0.7, "max_tokens": 2048},
+    "DeepSeek": {"model": "deepseek-chat", "temperature": 0.7, "system": SYSTEM_PROMPT},
+    "Grok": {
+        "model": "grok-1",
+        "temperature": 0.8,
+        "system": f"{SYSTEM_PROMPT} 독특하고 창의적인 시각으로 분석해주세요."
+    }
+}
+
+# 분석 결과 캐시 설정
+ANALYSIS_CACHE_DIR = get_setting("ANALYSIS_CACHE_DIR", ".cache/analysis")
+ANALYSIS_CACHE_TTL = get_setting("ANALYSIS_CACHE_TTL", 7 * 24 * 3600)  # 초 단위 유효 기간
+ANALYSIS_CACHE_MAX_ENTRIES = get_setting("ANALYSIS_CACHE_MAX_ENTRIES", 500)  # 디스크 최대 항목 수
+ANALYSIS_CACHE_MEMORY_ENTRIES = get_setting("ANALYSIS_CACHE_MEMORY_ENTRIES", 128)  # 메모리 LRU 크기
+
+# 몬테카를로 시뮬레이션 반복 횟수와 표시할 신뢰 구간 백분위
+SIMULATION_RUNS = get_setting("SIMULATION_RUNS", 10000)
+SIMULATION_PERCENTILES = (5, 50, 95)
+# 신뢰 구간을 계산하는 지표
+SIMULATION_BAND_METRICS = ["impressions", "reach", "clicks", "ctr", "conversions"]
+# 시뮬레이션에 사용하는 주간 광고 예산 (원)
+SIMULATION_WEEKLY_BUDGET = get_setting("SIMULATION_WEEKLY_BUDGET", 500000)
+# 시뮬레이션 기간(일)과 집계 단위 - 단위 키는 결과의 기간 열 이름, 이름은 to_dict()의 키 접두어로 사용
+SIMULATION_HORIZON_DAYS = get_setting("SIMULATION_HORIZON_DAYS", 84)
+SIMULATION_MAX_HORIZON_DAYS = 730
+SIMULATION_GRANULARITY = get_setting("SIMULATION_GRANULARITY", "week")
+SIMULATION_GRANULARITIES = {"week": "주", "day": "일"}
+SIMULATION_PERIOD_DAYS = {"week": 7, "day": 1}
+SIMULATION_PERIOD_NAMES = {"week": "weekly", "day": "daily"}
+# 한 번에 만드는 (매체 x 기간 x 반복) 텐서의 최대 원소 수 - 기간이 길면 기간 축을 나눠 계산해 메모리 사용량을 제한
+SIMULATION_CHUNK_ELEMENTS = 2 ** 21
+
+# 매체별 시뮬레이션 파라미터
+# cpm: 1,000회 노출당 비용(원), ctr/cvr/reach: 광고 유형별 기준값 대비 배수
+# saturation: 주간 예산(원)이 이 값을 넘어서면 추가 예산 대비 노출 효율이 빠르게 감소
+CHANNEL_PARAMS = {
+    "Google": {"cpm": 5000, "ctr": 1.2, "cvr": 1.1, "reach": 0.9, "saturation": 400000},
+    "Meta": {"cpm": 4000, "ctr": 0.9, "cvr": 0.9, "reach": 1.1, "saturation": 300000},
+    "Naver": {"cpm": 6000, "ctr": 1.3, "cvr": 1.2, "reach": 0.8, "saturation": 250000},
+    "Kakao": {"cpm": 4500, "ctr": 0.8, "cvr": 0.8, "reach": 1.0, "saturation": 200000},
+    "TTD": {"cpm": 3000, "ctr": 0.5, "cvr": 0.6, "reach": 1.2, "saturation": 150000}
+}
+MEDIA_CHANNELS = list(CHANNEL_PARAMS.keys())
+DEFAULT_MEDIA_DISTRIBUTION = {"Google": 25, "Meta": 25, "Naver": 20, "Kakao": 20, "TTD": 10}
+
+# 분석 텍스트에서 매체를 찾을 때 사용하는 별칭
+MEDIA_ALIASES = {
+    "Google": ["Google", "구글", "유튜브", "YouTube"],
+    "Meta": ["Meta", "메타", "페이스북", "Facebook", "인스타그램", "Instagram"],
+    "Naver": ["Naver", "네이버"],
+    "Kakao": ["Kakao", "카카오"],
+    "TTD": ["TTD", "The Trade Desk", "트레이드 데스크"]
+}
+# 예산 배분 섹션 제목 다음으로 매체 비율을 찾는 줄 수
+BUDGET_SECTION_LINES = 12
+# 예산 배분 섹션 후보로 인정하는 최소 매체 수와 합계가 100%에 가깝다고 보는 허용 오차(%p)
+BUDGET_SECTION_MIN_CHANNELS = 2
+BUDGET_SECTION_SUM_TOLERANCE = 10
+
+# 구조화된(JSON) 응답을 요청하고 스키마 검증 후 사용할지 여부
+STRUCTURED_OUTPUT = get_setting("STRUCTURED_OUTPUT", True)
+# 응답을 스트리밍으로 받아 분석 중에 실시간으로 표시할지 여부
+STREAM_RESPONSES = get_setting("STREAM_RESPONSES", True)
+AD_TYPES = ["검색광고", "디스플레이광고", "균형적"]
+
+# 예산 배분 최적화 설정 (배치당 후보 수, 반복 횟수)
+OPTIMIZER_BATCH_SIZE = 4096
+OPTIMIZER_ITERATIONS = 6
+OPTIMIZATION_OBJECTIVES = {"conversions": "전환 수", "reach": "도달률"}
+
+# 시나리오 분석 설정 - 광고 유형 x 브랜드 설명 길이 x 예산 수준 x 매체 배분 격자의 기대 성과
+SWEEP_DESCRIPTION_LENGTHS = (0, 50, 100, 150, 200)  # 브랜드 설명 길이 (자, 200자 이상은 효과가 같음)
+SWEEP_BUDGET_MULTIPLIERS = (0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 3.0)  # 주간 예산 대비 배수
+SWEEP_SAMPLED_SPLITS = get_setting("SWEEP_SAMPLED_SPLITS", 120)  # 추천 배분 주변에서 추가로 뽑는 배분 후보 수
+SWEEP_SAMPLE_CONCENTRATION = 30.0  # 배분 후보를 추천 배분에 얼마나 가깝게 뽑을지 (디리클레 집중도)
+SWEEP_CHUNK_SIZE = 256  # 한 번에 계산하는 배분 후보 수 (격자가 커져도 중간 배열 크기를 제한)
+SWEEP_CACHE_ENTRIES = 32  # 프로세스 전체에서 보관하는 시나리오 분석 결과 수
+SWEEP_METRICS = {"conversions": "전환 수", "reach": "최종 도달률", "cpa": "전환 단가(원)"}
+SWEEP_LOWER_IS_BETTER = {"cpa"}
+
+# 여러 모델 결과의 합의 방식, 절사 평균에서 양 끝에서 버리는 가중치 비율,
+# 텍스트 파싱으로 얻은 결과의 가중치 (JSON 검증을 통과한 결과는 1)
+CONSENSUS_METHODS = {"median": "가중 중앙값", "trimmed_mean": "절사 평균"}
+CONSENSUS_TRIM_RATIO = 0.2
+CONSENSUS_TEXT_PARSE_WEIGHT = 0.5
+
+# API 제공자별 호출 제한 (분당 요청 수와 한 번에 보낼 수 있는 최대 요청 수)
+PROVIDER_REQUESTS_PER_MINUTE = get_setting("PROVIDER_REQUESTS_PER_MINUTE", 60)
+PROVIDER_BURST = get_setting("PROVIDER_BURST", 5)
+# 요청 한도 초과 시 줄일 수 있는 최저 속도(설정 대비 비율)와 성공 시 회복 비율
+RATE_LIMIT_MIN_RATIO = 0.1
+RATE_LIMIT_RECOVERY = 0.05
+
+# API 재시도 설정 (최대 재시도 횟수, 지수 백오프 기본/최대 대기 초)
+API_MAX_RETRIES = get_setting("API_MAX_RETRIES", 3)
+API_BACKOFF_BASE = 1.0
+API_BACKOFF_MAX = 30.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# API 요청 타임아웃 (초) - 연결 수립과 응답 데이터 사이 대기 시간, 분석 1회 전체 마감 시간
+API_CONNECT_TIMEOUT = get_setting("API_CONNECT_TIMEOUT", 5.0)
+API_READ_TIMEOUT = get_setting("API_READ_TIMEOUT", 60.0)
+ANALYSIS_DEADLINE = get_setting("ANALYSIS_DEADLINE", 120.0)
+TIMEOUT_ERROR_MESSAGE = "응답 시간이 초과되었습니다."
+# 분석 마감 시각이 지난 뒤 요청 타임아웃이 처리되기를 추가로 기다리는 시간 (초)
+DEADLINE_GRACE = 1.0
+
+# 가장 빠른 응답 모드에서 다음 예비 모델 요청을 보내기 전 기다리는 시간 (초, 0이면 모두 동시에 요청)
+RACE_HEDGE_DELAY = get_setting("RACE_HEDGE_DELAY", 2.0)
+RACE_UNPARSED_MESSAGE = "응답에서 예산 배분을 찾을 수 없습니다."
+# 같은 (모델, 프롬프트) 요청이 동시에 들어오면 API를 한 번만 호출해 결과를 나눠 받을지 여부
+SINGLE_FLIGHT = get_setting("SINGLE_FLIGHT", True)
+
+# 요청 전 예상치 설정 - 프롬프트 최대 토큰 수(넘으면 보내지 않음), 브랜드 설명을 줄이는 기준 토큰 수,
+# 응답 기록 파일과 모델별 보관 개수
+PROMPT_MAX_TOKENS = get_setting("PROMPT_MAX_TOKENS", 6000)
+DESCRIPTION_MAX_TOKENS = get_setting("DESCRIPTION_MAX_TOKENS", 1500)
+ANALYSIS_HISTORY_PATH = get_setting("ANALYSIS_HISTORY_PATH", ".cache/history.json")
+ANALYSIS_HISTORY_SAMPLES = 200
+# 기록이 없을 때 쓰는 예상 출력 토큰 수와 출력 토큰당 응답 시간 (초)
+DEFAULT_OUTPUT_TOKENS = 1500
+DEFAULT_SECONDS_PER_OUTPUT_TOKEN = 0.03
+# 모델별 가격 (USD / 100만 토큰, 입력과 출력) - 공개 가격 기준 근사치
+MODEL_PRICING = {
+    "ChatGPT": (30.0, 60.0),
+    "Claude": (15.0, 75.0),
+    "Gemini": (0.5, 1.5),
+    "DeepSeek": (0.14, 0.28),
+    "Grok": (5.0, 15.0)
+}
+
+# 백그라운드 분석 작업 설정 - 작업 하나에서 동시에 호출하는 최대 모델 수, 끝난 작업 결과를 보관하는 시간 (초)
+ANALYSIS_JOB_WORKERS = 5
+ANALYSIS_JOB_RETENTION = get_setting("ANALYSIS_JOB_RETENTION", 1800.0)
+
+# HTTP 세션 - 호스트별 연결 풀을 프로세스 전체(모든 세션, 모든 rerun)에서 재사용
+_http_sessions = {}
+_http_sessions_lock = threading.Lock()
+
+def get_http_session(host):
+    """호스트별 keep-alive 연결 풀을 가진 HTTP 세션 반환 (처음 요청 시 생성)"""
+    with _http_sessions_lock:
+        session = _http_sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_CONNECTIONS,
+                pool_maxsize=HTTP_POOL_MAXSIZE
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_sessions[host] = session
+    return session
+
+def http_post(url, **kwargs):
+    """URL 호스트에 해당하는 공유 세션으로 POST 요청"""
+    parts = urlsplit(url)
+    return get_http_session(f"{parts.scheme}://{parts.netloc}").post(url, **kwargs)
+
+def resolve_provider_url(url):
+    """PROVIDER_BASE_URL이 설정되어 있으면 URL의 scheme/호스트만 바꾸고 경로와 쿼리는 유지"""
+    if not PROVIDER_BASE_URL:
+        return url
+    base = urlsplit(PROVIDER_BASE_URL)
+    return urlunsplit(urlsplit(url)._replace(scheme=base.scheme, netloc=base.netloc))
+
+def _prewarm_host(session, host):
+    try:
+        session.head(host, timeout=5)
+    except Exception:
+        # 사전 연결 실패는 무시 (실제 호출 시 다시 연결)
+        pass
+
+_prewarmed_hosts = set()
+
+def prewarm_connections(model_names):
+    """사용 가능한 모델의 API 서버와 TCP/TLS 연결을 백그라운드에서 미리 수립 (호스트당 한 번)"""
+    for model_name in model_names:
+        host = resolve_provider_url(PROVIDERS[model_name].host)
+        with _http_sessions_lock:
+            if host in _prewarmed_hosts:
+                continue
+            _prewarmed_hosts.add(host)
+        threading.Thread(target=_prewarm_host, args=(get_http_session(host), host), daemon=True).start()
+
+# 마감 시각(time.monotonic 기준)까지 응답을 받지 못했을 때 발생
+class DeadlineExceeded(Exception):
+    pass
+
+def get_request_timeout(deadline=None):
+    """(연결, 읽기) 타임아웃 - 마감 시각이 있으면 남은 시간보다 길지 않게 줄임"""
+    if deadline is None:
+        return API_CONNECT_TIMEOUT, API_READ_TIMEOUT
+    remaining = max(deadline - time.monotonic(), 0.01)
+    return min(API_CONNECT_TIMEOUT, remaining), min(API_READ_TIMEOUT, remaining)
+
+def has_time_for(deadline, seconds):
+    """마감 시각 전에 주어진 시간만큼 기다릴 여유가 있는지 확인"""
+    return deadline is None or time.monotonic() + seconds < deadline
+
+# 스트리밍(SSE) 응답 처리
+def iter_sse_events(response):
+    """SSE 응답의 data 필드를 JSON으로 파싱해 순서대로 반환"""
+    for line in response.iter_lines():
+        if not line:
+            continue
+        line = line.decode("utf-8") if isinstance(line, bytes) else line
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        try:
+            yield json.loads(data)
+        except ValueError:
+            continue
+
+def read_stream(response, extract_delta, on_token, deadline=None):
+    """스트리밍 응답 조각을 이어 붙이면서 누적 텍스트를 on_token으로 전달 (마감 시각이 지나면 중단)"""
+    text = ""
+    for event in iter_sse_events(response):
+        if deadline is not None and time.monotonic() > deadline:
+            response.close()
+            raise DeadlineExceeded()
+        delta = extract_delta(event)
+        if delta:
+            text += delta
+            on_token(text)
+    return text
+
+def extract_chat_delta(event):
+    """OpenAI 호환(chat completions) 스트리밍 이벤트에서 텍스트 조각 추출"""
+    choices = event.get("choices") or [{}]
+    return choices[0].get("delta", {}).get("content")
+
+def extract_anthropic_delta(event):
+    """Anthropic messages 스트리밍 이벤트에서 텍스트 조각 추출"""
+    if event.get("type") == "content_block_delta":
+        return event.get("delta", {}).get("text")
+    return None
+
+def extract_gemini_delta(event):
+    """Gemini streamGenerateContent 이벤트에서 텍스트 조각 추출"""
+    candidates = event.get("candidates") or [{}]
+    parts = candidates[0].get("content", {}).get("parts") or [{}]
+    return parts[0].get("text")
+
+# API 제공자 정의와 호출 - 제공자별 요청 생성/응답 추출 함수를 등록해 공통 로직으로 호출
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 토큰 버킷 호출 제한기
+    
+    요청 한도 초과(429) 응답을 받으면 채움 속도를 절반으로 줄이고 Retry-After 동안 모든 호출을
+    멈췄다가, 이후 성공할 때마다 설정된 속도까지 조금씩 회복한다.
+    """
+    
+    def __init__(self, rate, capacity):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+    
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def acquire(self, deadline=None):
+        """토큰 하나를 얻을 때까지 대기 (마감 시각 전에 얻지 못하면 False)"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return True
+                    wait = (1 - self.tokens) / self.rate
+            if not has_time_for(deadline, wait):
+                return False
+            time.sleep(wait)
+    
+    def on_success(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_LIMIT_RECOVERY)
+    
+    def on_throttled(self, retry_after=None):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.max_rate * RATE_LIMIT_MIN_RATIO, self.rate / 2)
+            self.tokens = 0.0
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+class Provider:
+    """AI 모델 API 제공자 (엔드포인트/요청 생성, 응답 텍스트 추출, 호출 제한기)"""
+    
+    def __init__(self, label, api_key_name, host, build_request, extract_text, extract_delta,
+                 requests_per_minute=PROVIDER_REQUESTS_PER_MINUTE, burst=PROVIDER_BURST):
+        self.label = label
+        self.api_key_name = api_key_name
+        self.host = host
+        self.build_request = build_request  # (prompt, config, api_key, stream) -> (url, headers, payload)
+        self.extract_text = extract_text  # 일반 응답 JSON -> 텍스트
+        self.extract_delta = extract_delta  # 스트리밍 이벤트 -> 텍스트 조각
+        self.limiter = TokenBucket(requests_per_minute / 60, burst)
+
+PROVIDERS = {}
+
+def register_provider(model_name, provider):
+    """모델 이름으로 API 제공자 등록 (같은 이름이면 교체)"""
+    PROVIDERS[model_name] = provider
+
+def is_model_available(model_name):
+    """모델의 API 키가 설정되어 있는지 확인"""
+    provider = PROVIDERS.get(model_name)
+    return provider is not None and bool(get_secret(provider.api_key_name))
+
+def make_chat_request_builder(url):
+    """OpenAI 호환 chat completions API(OpenAI, DeepSeek, Grok)용 요청 생성 함수"""
+    def build_request(prompt, config, api_key, stream):
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        }
+        payload = {
+            "model": config["model"],
+            "messages": [
+                {"role": "system", "content": config["system"]},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": config["temperature"],
+            "stream": stream
+        }
+        return url, headers, payload
+    return build_request
+
+def extract_chat_text(result):
+    return result["choices"][0]["message"]["content"]
+
+def build_anthropic_request(prompt, config, api_key, stream):
+    headers = {
+        "Content-Type": "application/json",
+        "X-API-Key": api_key,
+        "anthropic-version": "2023-01-01"
+    }
+    payload = {
+        "model": config["model"],
+        "max_tokens": config["max_tokens"],
+        "temperature": config["temperature"],
+        "system": config["system"],
+        "messages": [
+            {"role": "user", "content": prompt}
+        ],
+        "stream": stream
+    }
+    return "https://api.anthropic.com/v1/messages", headers, payload
+
+def extract_anthropic_text(result):
+    return result["content"][0]["text"]
+
+def build_gemini_request(prompt, config, api_key, stream):
+    base_url = f"https://generativelanguage.googleapis.com/v1beta/models/{config['model']}"
+    if stream:
+        url = f"{base_url}:streamGenerateContent?alt=sse&key={api_key}"
+    else:
+        url = f"{base_url}:generateContent?key={api_key}"
+    payload = {
+        "contents": [{
+            "parts": [{
+                "text": prompt
+            }]
+        }],
+        "generationConfig": {
+            "temperature": config["temperature"],
+            "maxOutputTokens": config["max_tokens"]
+        }
+    }
+    return url, {"Content-Type": "application/json"}, payload
+
+def extract_gemini_text(result):
+    return result["candidates"][0]["content"]["parts"][0]["text"]
+
+register_provider("ChatGPT", Provider(
+    "OpenAI", "OPENAI_API_KEY", "https://api.openai.com",
+    make_chat_request_builder("https://api.openai.com/v1/chat/completions"),
+    extract_chat_text, extract_chat_delta,
+    requests_per_minute=get_setting("OPENAI_REQUESTS_PER_MINUTE", PROVIDER_REQUESTS_PER_MINUTE)
+))
+register_provider("Claude", Provider(
+    "Anthropic", "ANTHROPIC_API_KEY", "https://api.anthropic.com",
+    build_anthropic_request, extract_anthropic_text, extract_anthropic_delta,
+    requests_per_minute=get_setting("ANTHROPIC_REQUESTS_PER_MINUTE", PROVIDER_REQUESTS_PER_MINUTE)
+))
+register_provider("Gemini", Provider(
+    "Gemini", "GOOGLE_API_KEY", "https://generativelanguage.googleapis.com",
+    build_gemini_request, extract_gemini_text, extract_gemini_delta,
+    requests_per_minute=get_setting("GOOGLE_REQUESTS_PER_MINUTE", PROVIDER_REQUESTS_PER_MINUTE)
+))
+register_provider("DeepSeek", Provider(
+    "DeepSeek", "DEEPSEEK_API_KEY", "https://api.deepseek.com",
+    make_chat_request_builder("https://api.deepseek.com/v1/chat/completions"),
+    extract_chat_text, extract_chat_delta,
+    requests_per_minute=get_setting("DEEPSEEK_REQUESTS_PER_MINUTE", PROVIDER_REQUESTS_PER_MINUTE)
+))
+register_provider("Grok", Provider(
+    "Grok", "GROK_API_KEY", "https://api.x.ai",
+    make_chat_request_builder("https://api.x.ai/v1/chat/completions"),
+    extract_chat_text, extract_chat_delta,
+    requests_per_minute=get_setting("GROK_REQUESTS_PER_MINUTE", PROVIDER_REQUESTS_PER_MINUTE)
+))
+
+def parse_retry_after(value):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 대기 초로 변환 (없거나 해석할 수 없으면 None)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def get_backoff_delay(attempt, retry_after=None):
+    """재시도 대기 시간 - Retry-After가 있으면 그만큼, 없으면 지수 백오프 (동시 재시도가 몰리지 않도록 지터 추가)"""
+    if retry_after is not None:
+        return retry_after + random.uniform(0, API_BACKOFF_BASE)
+    cap = min(API_BACKOFF_MAX, API_BACKOFF_BASE * 2 ** attempt)
+    return cap / 2 + random.uniform(0, cap / 2)
+
+def describe_api_error(provider, response):
+    """실패한 API 응답의 상태 코드를 사용자용 오류 메시지로 변환"""
+    if response.status_code in (401, 403):
+        return f"{provider.label} API 키가 유효하지 않거나 권한이 없습니다. API 키를 확인해주세요."
+    if response.status_code == 400:
+        try:
+            error_details = response.json().get("error", {}).get("message", "알 수 없는 오류")
+        except ValueError:
+            error_details = "알 수 없는 오류"
+        return f"{provider.label} API 요청 오류: {error_details}"
+    if response.status_code == 429:
+        return f"{provider.label} API 요청 한도를 초과했습니다. 잠시 후 다시 시도해주세요."
+    return f"{provider.label} API 호출 오류: {response.status_code}"
+
+def call_provider_api(model_name, prompt, on_token=None, deadline=None):
+    """등록된 제공자 API를 호출 (호출 제한기 통과 후 요청, 429/5xx/연결 오류는 마감 시각 안에서 백오프 후 재시도)"""
+    provider = PROVIDERS[model_name]
+    stream = bool(on_token)
+    try:
+        url, headers, payload = provider.build_request(
+            prompt, MODEL_CONFIG[model_name], get_secret(provider.api_key_name), stream
+        )
+        url = resolve_provider_url(url)
+        request_bytes = len(json.dumps(payload).encode("utf-8"))
+        for attempt in range(API_MAX_RETRIES + 1):
+            if not provider.limiter.acquire(deadline):
+                raise DeadlineExceeded()
+            attempt_start = time.perf_counter()
+            METRICS.observe("provider_request_bytes", request_bytes, provider=provider.label)
+            try:
+                response = http_post(
+                    url, headers=headers, json=payload, stream=stream, timeout=get_request_timeout(deadline)
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                METRICS.increment(
+                    "provider_responses_total", provider=provider.label,
+                    status="timeout" if isinstance(e, requests.Timeout) else "connection_error"
+                )
+                delay = get_backoff_delay(attempt)
+                if attempt == API_MAX_RETRIES or not has_time_for(deadline, delay):
+                    raise
+                time.sleep(delay)
+                continue
+            METRICS.increment("provider_responses_total", provider=provider.label, status=str(response.status_code))
+            METRICS.observe("provider_ttfb_seconds", response.elapsed.total_seconds(), provider=provider.label)
+            
+            if response.status_code == 200:
+                provider.limiter.on_success()
+                if stream:
+                    text = read_stream(response, provider.extract_delta, on_token, deadline)
+                    response_bytes = len(text.encode("utf-8"))
+                else:
+                    response_bytes = len(response.content)
+                METRICS.observe("provider_request_seconds", time.perf_counter() - attempt_start, provider=provider.label)
+                METRICS.observe("provider_response_bytes", response_bytes, provider=provider.label)
+                if stream:
+                    return text
+                try:
+                    return provider.extract_text(response.json())
+                except (KeyError, IndexError, ValueError) as e:
+                    report_error(f"{provider.label} API 응답 파싱 오류: {str(e)}")
+                    return f"{provider.label} API 응답 파싱 오류: {str(e)}"
+            
+            METRICS.observe("provider_request_seconds", time.perf_counter() - attempt_start, provider=provider.label)
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if response.status_code == 429:
+                provider.limiter.on_throttled(retry_after)
+            # 서버가 너무 오래 기다리라고 하거나 마감 시각 전에 재시도할 수 없으면 바로 오류 표시
+            delay = get_backoff_delay(attempt, retry_after)
+            if (response.status_code in RETRY_STATUS_CODES and attempt < API_MAX_RETRIES
+                    and (retry_after is None or retry_after <= API_BACKOFF_MAX)
+                    and has_time_for(deadline, delay)):
+                response.close()
+                time.sleep(delay)
+                continue
+            
+            error_message = describe_api_error(provider, response)
+            report_error(error_message)
+            return f"오류: {error_message}"
+    except (DeadlineExceeded, requests.Timeout):
+        error_message = f"{provider.label} API {TIMEOUT_ERROR_MESSAGE}"
+        report_error(error_message)
+        return f"오류: {error_message}"
+    except Exception as e:
+        report_error(f"{provider.label} API 호출 중 오류 발생: {str(e)}")
+        return f"오류: {str(e)}"
+
+# 동일 요청 합치기(single-flight) - 여러 세션/탭에서 같은 (모델, 프롬프트) 분석이 동시에 들어오면
+# API는 한 번만 호출하고 모두 같은 결과를 받음
+class _Flight:
+    """진행 중인 API 호출 하나 (완료 이벤트, 결과, 스트리밍 중간 텍스트와 구독자)"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.partial = ""
+        self.listeners = []
+
+class SingleFlight:
+    """키가 같은 호출이 진행 중이면 새로 호출하지 않고 그 결과를 기다려 함께 받음"""
+    
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key, call, on_token=None, deadline=None, retry=None):
+        """key로 진행 중인 호출이 있으면 결과를 기다리고, 없으면 call(on_token)을 직접 실행.
+        (결과, 다른 호출의 결과를 받았는지 여부) 반환 - 기다리다 마감 시각이 지나면 DeadlineExceeded.
+        retry(결과)가 참이면 (예: 먼저 시작된 호출이 자기 마감 시각에 걸린 경우) 이 호출의 마감 시각이
+        남아 있는 동안 다시 합류하거나 직접 호출"""
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+                if on_token:
+                    flight.listeners.append(on_token)
+                partial = flight.partial
+            if leader:
+                break
+            
+            # 나중에 합류한 호출도 지금까지 받은 스트리밍 텍스트부터 이어서 표시
+            # (마감 시각 초과, 오류, 재시도로 이 호출을 떠나면 더 이상 중간 텍스트를 받지 않음)
+            try:
+                if on_token and partial:
+                    on_token(partial)
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                if not flight.done.wait(timeout):
+                    raise DeadlineExceeded()
+            finally:
+                if on_token:
+                    with self._lock:
+                        flight.listeners.remove(on_token)
+            if flight.error is not None:
+                raise flight.error
+            if retry is not None and retry(flight.result) and has_time_for(deadline, 0):
+                continue
+            # 먼저 시작된 호출이 스트리밍이 아니었으면 중간 텍스트 없이 끝나므로 최종 결과를 한 번 전달
+            if on_token and flight.result and flight.result != flight.partial:
+                on_token(flight.result)
+            return flight.result, True
+        
+        def fan_out(text):
+            with self._lock:
+                flight.partial = text
+                listeners = list(flight.listeners)
+            for listener in listeners:
+                listener(text)
+        
+        try:
+            flight.result = call(fan_out if on_token else None)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+_single_flight = SingleFlight()
+
+def get_ai_analysis_shared(prompt, model_name, on_token=None, deadline=None):
+    """get_ai_analysis와 같지만 (결과, 진행 중인 같은 요청의 결과를 받았는지 여부)를 반환"""
+    provider = PROVIDERS.get(model_name)
+    if provider is None:
+        report_error(f"지원되지 않는 모델: {model_name}")
+        return f"지원되지 않는 모델: {model_name}", False
+    if not is_model_available(model_name):
+        report_error(f"{provider.label} API 설정이 필요합니다.")
+        return f"{provider.label} API 설정이 필요합니다. API 키를 확인해주세요.", False
+    if not SINGLE_FLIGHT:
+        return call_provider_api(model_name, prompt, on_token, deadline), False
+    
+    try:
+        text, shared = _single_flight.do(
+            make_cache_key(prompt, model_name),
+            lambda fan_out: call_provider_api(model_name, prompt, fan_out, deadline),
+            on_token, deadline, retry=is_timeout_result
+        )
+    except DeadlineExceeded:
+        # 먼저 시작된 같은 요청이 이 호출의 마감 시각까지 끝나지 않음
+        error_message = f"{provider.label} API {TIMEOUT_ERROR_MESSAGE}"
+        report_error(error_message)
+        return f"오류: {error_message}", True
+    if shared:
+        METRICS.increment("provider_coalesced_total", provider=provider.label)
+    return text, shared
+
+# AI 모델 호출 함수 (통합 인터페이스)
+def get_ai_analysis(prompt, model_name, on_token=None, deadline=None):
+    """등록된 제공자 중 모델에 맞는 API를 호출 (같은 요청이 진행 중이면 그 결과를 함께 받음)"""
+    return get_ai_analysis_shared(prompt, model_name, on_token, deadline)[0]
+
+# 분석 결과 캐시 - 메모리 LRU 앞단 + 디스크(JSON 파일) 저장
+def is_error_result(text):
+    """AI 분석 결과가 오류 메시지인지 확인 (오류 응답은 캐시하지 않음)"""
+    return (
+        not text
+        or text.startswith("오류:")
+        or text.startswith("지원되지 않는 모델")
+        or "API 설정이 필요합니다" in text
+        or "응답 파싱 오류" in text
+    )
+
+def is_timeout_result(text):
+    """AI 분석 결과가 응답 시간 초과 오류인지 확인"""
+    return is_error_result(text) and TIMEOUT_ERROR_MESSAGE in text
+
+def normalize_prompt(prompt):
+    """줄마다 앞뒤 공백과 빈 줄을 없애고 연속 공백을 하나로 줄인 프롬프트"""
+    return "\n".join(
+        " ".join(line.split()) for line in prompt.strip().splitlines() if line.strip()
+    )
+
+def make_cache_key(prompt, model_name):
+    """공백을 정규화한 프롬프트와 모델 호출 설정으로 캐시 키(SHA-256) 생성"""
+    key_source = json.dumps({
+        "model_name": model_name,
+        "config": MODEL_CONFIG.get(model_name, {}),
+        "prompt": normalize_prompt(prompt)
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+class AnalysisCache:
+    """유효 기간(TTL)과 항목 수 제한이 있는 분석 결과 캐시"""
+    
+    def __init__(self, directory, ttl, max_entries, memory_entries):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+    
+    def _is_fresh(self, entry):
+        return time.time() - entry.get("created", 0) < self.ttl
+    
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+    
+    def _remove_file(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    def get(self, key):
+        """캐시된 텍스트 반환 (없거나 만료되었으면 None)"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._is_fresh(entry):
+                    self._memory.move_to_end(key)
+                    return entry["text"]
+                del self._memory[key]
+        
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not self._is_fresh(entry):
+            self._remove_file(self._path(key))
+            return None
+        self._remember(key, entry)
+        return entry["text"]
+    
+    def set(self, key, model_name, text):
+        """결과를 메모리와 디스크에 저장하고 필요하면 오래된 항목 정리"""
+        entry = {"created": time.time(), "model_name": model_name, "text": text}
+        self._remember(key, entry)
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+            self._evict()
+        except OSError:
+            # 디스크 저장 실패 시 메모리 캐시만 사용
+            self._remove_file(tmp_path)
+    
+    def _evict(self):
+        """만료된 파일을 지우고, 최대 항목 수를 넘으면 오래된 파일부터 삭제"""
+        files = []
+        for item in os.scandir(self.directory):
+            if not item.name.endswith(".json"):
+                continue
+            mtime = item.stat().st_mtime
+            if time.time() - mtime >= self.ttl:
+                self._remove_file(item.path)
+            else:
+                files.append((mtime, item.path))
+        overflow = len(files) - self.max_entries
+        if overflow > 0:
+            files.sort()
+            for _, path in files[:overflow]:
+                self._remove_file(path)
+
+_analysis_cache = None
+_analysis_cache_lock = threading.Lock()
+
+def get_analysis_cache():
+    """프로세스 전체에서 공유하는 분석 결과 캐시"""
+    global _analysis_cache
+    with _analysis_cache_lock:
+        if _analysis_cache is None:
+            _analysis_cache = AnalysisCache(
+                ANALYSIS_CACHE_DIR,
+                ANALYSIS_CACHE_TTL,
+                ANALYSIS_CACHE_MAX_ENTRIES,
+                ANALYSIS_CACHE_MEMORY_ENTRIES
+            )
+    return _analysis_cache
+
+def get_ai_analysis_cached(cache, prompt, model_name, on_token=None, bypass_cache=False, deadline=None):
+    """캐시에 결과가 있으면 바로 반환하고, 없으면 AI 분석 후 저장. (결과, 캐시 적중 여부) 반환"""
+    key = make_cache_key(prompt, model_name)
+    if not bypass_cache:
+        text = cache.get(key)
+        if text is not None:
+            if on_token:
+                on_token(text)
+            return text, True
+    
+    start = time.perf_counter()
+    text, shared = get_ai_analysis_shared(prompt, model_name, on_token, deadline)
+    if not is_error_result(text):
+        cache.set(key, model_name, text)
+        # 함께 받은 결과는 대기 시간이 실제 응답 시간보다 짧으므로 기록하지 않음
+        if not shared:
+            get_analysis_history().record(
+                model_name, estimate_tokens(prompt), estimate_tokens(text), time.perf_counter() - start
+            )
+    return text, False
+
+# 요청 전 예상치 - 네트워크 없이 토큰 수를 근사하고, 기록된 응답으로 모델별 비용과 응답 시간을 예측
+_HANGUL_RE = re.compile(r"[\uac00-\ud7a3\u3131-\u318e]")
+_TOKEN_PIECE_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d\uac00-\ud7a3\u3131-\u318e]")
+# 한글 한 글자와 영문/숫자 글자 수당 토큰 수 (BPE 토크나이저 기준으로 조금 넉넉하게 잡은 근사치)
+HANGUL_TOKENS_PER_CHAR = 1.0
+LATIN_CHARS_PER_TOKEN = 4
+DIGITS_PER_TOKEN = 3
+
+def estimate_tokens(text):
+    """텍스트의 토큰 수 근사치 (한글은 글자당, 영문/숫자는 길이 비례, 기호는 하나당 1토큰)"""
+    if not text:
+        return 0
+    tokens = len(_HANGUL_RE.findall(text)) * HANGUL_TOKENS_PER_CHAR
+    for piece in _TOKEN_PIECE_RE.findall(text):
+        if piece.isdigit():
+            tokens += math.ceil(len(piece) / DIGITS_PER_TOKEN)
+        elif piece.isascii() and piece.isalpha():
+            tokens += math.ceil(len(piece) / LATIN_CHARS_PER_TOKEN)
+        else:
+            tokens += 1
+    return int(math.ceil(tokens))
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?。])\s+|\n+")
+
+def trim_to_tokens(text, max_tokens):
+    """텍스트가 max_tokens를 넘으면 문장 단위로 앞부분만 남겨 줄임. (텍스트, 줄였는지 여부) 반환"""
+    if estimate_tokens(text) <= max_tokens:
+        return text, False
+    max_tokens -= 1  # 끝에 붙이는 말줄임표
+    kept = []
+    used = 0
+    for sentence in _SENTENCE_END_RE.split(text.strip()):
+        sentence_tokens = estimate_tokens(sentence)
+        if used + sentence_tokens > max_tokens:
+            break
+        kept.append(sentence)
+        used += sentence_tokens
+    if not kept:
+        # 첫 문장부터 너무 길면 글자 단위로 자름 (이진 탐색)
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if estimate_tokens(text[:middle]) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        kept = [text[:low]]
+    return " ".join(kept).rstrip() + " …", True
+
+class AnalysisHistory:
+    """모델별 최근 응답 기록 (입력 토큰, 출력 토큰, 응답 시간) - JSON 파일에 보관"""
+    
+    def __init__(self, path, max_samples=ANALYSIS_HISTORY_SAMPLES):
+        self.path = path
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._samples = json.load(f)
+        except (OSError, ValueError):
+            self._samples = {}
+    
+    def record(self, model_name, input_tokens, output_tokens, latency):
+        with self._lock:
+            samples = self._samples.setdefault(model_name, [])
+            samples.append([input_tokens, output_tokens, round(latency, 3)])
+            del samples[:-self.max_samples]
+            data = json.dumps(self._samples)
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # 저장 실패 시 메모리 기록만 사용
+            pass
+    
+    def samples(self, model_name):
+        """[(입력 토큰, 출력 토큰, 응답 시간)] 목록"""
+        with self._lock:
+            return [tuple(sample) for sample in self._samples.get(model_name, [])]
+
+_analysis_history = None
+_analysis_history_lock = threading.Lock()
+
+def get_analysis_history():
+    """프로세스 전체에서 공유하는 응답 기록"""
+    global _analysis_history
+    with _analysis_history_lock:
+        if _analysis_history is None:
+            _analysis_history = AnalysisHistory(ANALYSIS_HISTORY_PATH)
+    return _analysis_history
+
+def estimate_model_call(prompt, model_name, history=None):
+    """모델 하나를 호출할 때의 입력/출력 토큰 수, 비용(USD), 응답 시간(초) 예상치"""
+    config = MODEL_CONFIG.get(model_name, {})
+    input_tokens = estimate_tokens(prompt) + estimate_tokens(config.get("system", ""))
+    samples = (history or get_analysis_history()).samples(model_name)
+    if samples:
+        output_tokens = float(np.median([sample[1] for sample in samples]))
+        seconds_per_token = float(np.median([sample[2] / max(sample[1], 1) for sample in samples]))
+    else:
+        output_tokens = float(config.get("max_tokens", DEFAULT_OUTPUT_TOKENS))
+        seconds_per_token = DEFAULT_SECONDS_PER_OUTPUT_TOKEN
+    output_tokens = min(output_tokens, config.get("max_tokens", output_tokens))
+    input_price, output_price = MODEL_PRICING.get(model_name, (0.0, 0.0))
+    return {
+        "model": model_name,
+        "input_tokens": input_tokens,
+        "output_tokens": int(round(output_tokens)),
+        "cost": (input_tokens * input_price + output_tokens * output_price) / 1_000_000,
+        "latency": output_tokens * seconds_per_token,
+        "samples": len(samples)
+    }
+
+def estimate_analysis(prompt, model_names, history=None):
+    """선택한 모델 전체의 예상치 - 프롬프트 토큰 수, 모델별 예상치, 총 비용, 가장 긴 응답 시간"""
+    models = [estimate_model_call(prompt, model_name, history) for model_name in model_names]
+    return {
+        "prompt_tokens": estimate_tokens(prompt),
+        "max_prompt_tokens": PROMPT_MAX_TOKENS,
+        "models": models,
+        "total_cost": sum(model["cost"] for model in models),
+        "max_latency": max((model["latency"] for model in models), default=0.0)
+    }
+
+# 가장 빠른 응답 모드 - 여러 모델에 순차적으로(지연 후) 요청을 보내고 먼저 성공한 응답을 사용
+def race_ai_analysis(analyze, model_names, hedge_delay=RACE_HEDGE_DELAY, deadline=None,
+                     initializer=None, initargs=(), accept=None):
+    """analyze(model_name) -> (텍스트, 캐시 적중 여부)를 경주시켜 (모델, 텍스트, 캐시 적중 여부, 실패 결과) 반환
+    
+    첫 모델을 바로 호출하고, hedge_delay 안에 성공 응답이 없거나 진행 중인 요청이 실패하면 다음 모델을
+    호출한다. 오류가 아니고 accept(텍스트)가 참인 응답(기본은 오류가 아닌 모든 응답)을 성공으로 보고,
+    성공 응답이 오면 아직 시작하지 않은 요청은 취소하고 진행 중인 요청의 결과는 무시한다.
+    모두 실패하거나 마감 시각까지 성공 응답이 없으면 모델은 None이다.
+    """
+    pending = list(model_names)
+    failures = {}
+    futures = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, len(pending)), initializer=initializer, initargs=initargs)
+    
+    def launch():
+        model_name = pending.pop(0)
+        futures[executor.submit(analyze, model_name)] = model_name
+    
+    try:
+        launch()
+        while pending and hedge_delay <= 0:
+            launch()
+        while futures:
+            timeout = hedge_delay if pending else None
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0)
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done and deadline is not None and time.monotonic() >= deadline:
+                for model_name in futures.values():
+                    failures[model_name] = f"오류: {TIMEOUT_ERROR_MESSAGE}"
+                break
+            if not done:
+                # 지연 시간 안에 응답이 없으면 예비 요청 추가 (남은 모델이 없으면 마감 시각 확인부터 다시)
+                if pending:
+                    launch()
+                continue
+            for future in done:
+                model_name = futures.pop(future)
+                try:
+                    text, cached = future.result()
+                except Exception as e:
+                    text, cached = f"오류: {str(e)}", False
+                if not is_error_result(text):
+                    if accept is None or accept(text):
+                        return model_name, text, cached, failures
+                    text = f"오류: {RACE_UNPARSED_MESSAGE}"
+                failures[model_name] = text
+                # 실패한 요청 대신 다음 예비 요청을 바로 시작
+                if pending:
+                    launch()
+        return None, None, False, failures
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+# 광고 분석 결과 처리 및 파싱
+# 1) 광고 유형 추천과 예산 배분 섹션 제목은 키워드("광고", "예산", "비율")가 있는 줄만 부분 문자열 검색으로 찾음
+#    (정규식의 문자 집합 스캔보다 str.find가 훨씬 빨라 본문이 길어도 키워드가 없는 줄은 거의 비용이 없음)
+_AD_TYPE_RE = re.compile(r"검색\s*광고|디스플레이\s*광고")
+_SEARCH_AD_RE = re.compile(r"검색\s*광고")
+_RECOMMEND_RE = re.compile(r"추천|적합|적절")
+_BUDGET_HEADER_RE = re.compile(r"예산\s*(?:배분|분배)")
+_BUDGET_KEYWORDS = ("예산", "비율")
+
+# 2) 예산 배분 섹션을 한 번만 훑어 줄바꿈, 매체 별칭, 퍼센트 기호를 함께 찾는 토큰 패턴
+#    - 모든 대안이 글자 하나로 시작해야 정규식 엔진이 첫 글자 집합으로 건너뛰어 빠르므로, 영문 별칭은 첫 글자를
+#      대/소문자 대안으로 펼치고 나머지 글자는 [xX]로 씀 (IGNORECASE나 텍스트 전체 lower()보다 훨씬 빠름)
+#    - 숫자로 시작하는 대안을 넣으면 본문의 숫자마다 매칭을 시도하므로 퍼센트는 기호만 찾고, 값은 매체가 있는 줄에서만 읽음
+_MEDIA_BY_ALIAS = {
+    alias.lower(): media for media, aliases in MEDIA_ALIASES.items() for alias in aliases
+}
+
+def _case_insensitive_alternatives(words):
+    """words를 대/소문자 구분 없이 찾는 정규식 대안 목록 (긴 단어 먼저, 모든 대안은 글자 하나로 시작)"""
+    alternatives = []
+    for word in sorted(words, key=len, reverse=True):
+        rest = "".join(
+            f"[{char.lower()}{char.upper()}]" if char.lower() != char.upper() else re.escape(char)
+            for char in word[1:]
+        )
+        for first in dict.fromkeys((word[0].lower(), word[0].upper())):
+            alternatives.append(re.escape(first) + rest)
+    return alternatives
+
+_MEDIA_ALIAS_PATTERN = "|".join(_case_insensitive_alternatives(_MEDIA_BY_ALIAS))
+_MEDIA_ALIAS_RE = re.compile(_MEDIA_ALIAS_PATTERN)
+_BUDGET_TOKEN_RE = re.compile("\n|%|" + _MEDIA_ALIAS_PATTERN)
+_PERCENT_RE = re.compile(r"(\d+(?:\.\d+)?)(?:\s*[~\-–]\s*(\d+(?:\.\d+)?))?\s*%")
+_PERCENT_VALUE_RE = re.compile(r"(\d+(?:\.\d+)?)(?:\s*[~\-–]\s*(\d+(?:\.\d+)?))?\s*$")
+_SECTION_LINES_RE = re.compile(f"[^\n]*(?:\n[^\n]*){{0,{BUDGET_SECTION_LINES - 1}}}")
+
+def _keyword_lines(text, keyword):
+    """keyword가 있는 줄의 (시작, 끝) 위치를 순서대로 반환 (한 줄에 여러 번 있어도 한 번만)"""
+    position = text.find(keyword)
+    while position != -1:
+        line_start = text.rfind("\n", 0, position) + 1
+        line_end = text.find("\n", position)
+        if line_end == -1:
+            line_end = len(text)
+        yield line_start, line_end
+        position = text.find(keyword, line_end)
+
+def _tokenize_budget_lines(text):
+    """텍스트를 토큰 패턴으로 한 번 훑어 줄마다 토큰 목록 반환 (매체가 없는 줄은 None)"""
+    lines = []
+    tokens, has_media = [], False
+    for token in _BUDGET_TOKEN_RE.findall(text):
+        if token == "\n":
+            lines.append(tokens if has_media else None)
+            tokens, has_media = [], False
+        else:
+            tokens.append(token)
+            has_media = has_media or token != "%"
+    lines.append(tokens if has_media else None)
+    return lines
+
+def _pair_media_percents(tokens, line):
+    """한 줄의 토큰 목록에서 [(매체, 비율)] 짝 목록 반환 (매체별로 처음 나온 별칭만 사용)
+    
+    퍼센트 값은 기호 앞의 숫자 또는 범위(범위는 중간값)이고 100%를 넘는 값은 무시한다. 매체와 값의 개수가 같으면
+    순서대로 짝짓고, 다르면 매체마다 뒤에 오는 첫 번째 남은 값을, 없으면 앞에 나온 남은 값 중 가장 가까운 값을 사용한다.
+    """
+    matches = _PERCENT_RE.findall(line)
+    if len(matches) != tokens.count("%"):
+        # 숫자 없이 쓰인 기호가 있으면 기호마다 앞부분에서 값을 읽음
+        matches = [match.groups() if match else ("", "")
+                   for match in map(_PERCENT_VALUE_RE.search, line.split("%")[:-1])]
+    media_tokens = []  # (매체 앞에 나온 값 수 = 매체 뒤 첫 번째 값의 번호, 매체)
+    values = []
+    seen = set()
+    percent_index = 0
+    for token in tokens:
+        if token == "%":
+            low, high = matches[percent_index]
+            percent_index += 1
+            if low:
+                value = (float(low) + float(high)) / 2 if high else float(low)
+                if value <= 100:
+                    values.append(value)
+            continue
+        media = _MEDIA_BY_ALIAS[token.lower()]
+        if media not in seen:
+            seen.add(media)
+            media_tokens.append((len(values), media))
+    if len(media_tokens) == len(values):
+        return [(media, value) for (_, media), value in zip(media_tokens, values)]
+    
+    pairs = []
+    skipped = []  # 앞의 매체가 가져가지 않고 지나친 값의 번호 (마지막이 가장 가까운 값)
+    next_value = 0
+    for first_after, media in media_tokens:
+        while next_value < first_after:
+            skipped.append(next_value)
+            next_value += 1
+        if next_value < len(values):
+            pairs.append((media, values[next_value]))
+            next_value += 1
+        elif skipped:
+            pairs.append((media, values[skipped.pop()]))
+    return pairs
+
+def _score_budget_section(distribution):
+    """예산 배분 섹션 후보의 점수 (합계가 100%에 가까운지, 포함한 매체 수, 100%와의 차이 순, 후보가 아니면 None)"""
+    if len(distribution) < BUDGET_SECTION_MIN_CHANNELS:
+        return None
+    gap = abs(sum(distribution.values()) - 100)
+    return (gap <= BUDGET_SECTION_SUM_TOLERANCE, len(distribution), -gap)
+
+def _find_ad_type(text):
+    """"검색/디스플레이 광고"와 추천/적합/적절 표현이 같은 줄에 처음 나온 광고 유형 (검색광고 우선, 없으면 균형적)"""
+    for line_start, line_end in _keyword_lines(text, "광고"):
+        line = text[line_start:line_end]
+        if _AD_TYPE_RE.search(line) and _RECOMMEND_RE.search(line):
+            return "검색광고" if _SEARCH_AD_RE.search(line) else "디스플레이광고"
+    return "균형적"
+
+def _section_pairs(text, line_start, line_pairs):
+    """제목 줄부터 BUDGET_SECTION_LINES줄의 줄별 (매체, 비율) 짝 목록
+    
+    line_pairs(줄 시작 위치 -> 짝 목록)에 없는 줄만 하나의 구간으로 이어 토큰 패턴으로 한 번 훑고 결과를 저장하므로,
+    겹치는 후보 섹션의 줄은 다시 훑지 않는다.
+    """
+    lines = _SECTION_LINES_RE.match(text, line_start).group().split("\n")
+    starts = list(accumulate([len(line) + 1 for line in lines[:-1]], initial=line_start))
+    missing = [i for i, start in enumerate(starts) if start not in line_pairs]
+    if missing:
+        span = slice(missing[0], missing[-1] + 1)
+        span_lines = zip(starts[span], _tokenize_budget_lines("\n".join(lines[span])), lines[span])
+        for start, tokens, line in span_lines:
+            line_pairs[start] = _pair_media_percents(tokens, line) if tokens else []
+    return [line_pairs[start] for start in starts]
+
+def _find_budget_section(text):
+    """예산 배분 섹션 후보 중 점수가 가장 높은 섹션의 ({매체: 비율}, 점수), 후보가 없으면 (None, None)
+    
+    "예산 배분/분배" 또는 "비율"과 매체(이름)가 함께 있는 줄을 섹션 제목으로 보고, 제목 줄부터
+    BUDGET_SECTION_LINES줄 안에서 매체별로 처음 나온 비율을 모은다. "예산"이 있는 줄을 먼저 확인하고,
+    모든 매체가 있고 합계가 정확히 100%인 섹션을 찾으면 나머지 텍스트는 더 찾지 않는다.
+    """
+    perfect_score = (True, len(MEDIA_CHANNELS), 0)
+    line_pairs = {}
+    checked = set()
+    best_section, best_score = None, None
+    for keyword in _BUDGET_KEYWORDS:
+        for line_start, line_end in _keyword_lines(text, keyword):
+            if line_start in checked:
+                continue
+            checked.add(line_start)
+            line = text[line_start:line_end]
+            if not (_BUDGET_HEADER_RE.search(line)
+                    or ("비율" in line and ("매체" in line or _MEDIA_ALIAS_RE.search(line)))):
+                continue
+            distribution = {}
+            for pairs in _section_pairs(text, line_start, line_pairs):
+                for media, value in pairs:
+                    distribution.setdefault(media, value)
+            score = _score_budget_section(distribution)
+            if score is not None and (best_score is None or score > best_score):
+                best_section, best_score = distribution, score
+                if score == perfect_score:
+                    return best_section, best_score
+    return best_section, best_score
+
+def parse_ad_recommendations(analysis_text):
+    """AI 분석 텍스트에서 키 정보를 추출합니다."""
+    try:
+        text = analysis_text.strip()
+        ad_type = _find_ad_type(text)
+        
+        # 후보 중 합계가 100%에 가깝고 매체를 많이 포함한 섹션 사용 (본문 속 클릭 비율 같은 문장 배제)
+        # 합계가 맞는 섹션은 그 섹션만으로 배분을 만들고 (빠진 매체와 0%는 0), 맞지 않으면 기본값 위에 덮어씀
+        section, score = _find_budget_section(text)
+        if section and score[0]:
+            media_distribution = section
+        else:
+            media_distribution = dict(DEFAULT_MEDIA_DISTRIBUTION)
+            if section:
+                media_distribution.update(section)
+        
+        # 합이 100%가 되도록 정수 비율로 조정
+        media_distribution = round_distribution(
+            media_distribution.get(channel, 0) for channel in MEDIA_CHANNELS
+        )
+        
+        return {
+            "ad_type": ad_type,
+            "media_distribution": media_distribution
+        }
+    except Exception as e:
+        report_error(f"분석 결과 파싱 중 오류 발생: {str(e)}")
+        return {
+            "ad_type": "균형적",
+            "media_distribution": dict(DEFAULT_MEDIA_DISTRIBUTION)
+        }
+
+# 분석 요청 프롬프트 생성
+def build_analysis_prompt(campaign_data, structured=STRUCTURED_OUTPUT):
+    prompt = f"""
+    다음 브랜드/제품에 대한 광고 전략을 분석해 주세요:
+    
+    브랜드/제품명: {campaign_data['brand_name']}
+    브랜드 설명: {campaign_data['brand_description']}
+    캠페인 목표: {campaign_data['campaign_goal']}
+    
+    다음 내용을 포함해 분석해 주세요:
+    
+    1. 검색광고와 디스플레이 광고 중 어떤 것이 더 적합한지 구체적인 이유와 함께 추천해 주세요.
+    2. 주요 매체별 예산 배분 비율을 제안해 주세요 (Google, Meta, Naver, Kakao, TTD).
+    3. 필요한 광고 소재 유형과 개수를 추천해 주세요.
+    4. 효과적인 광고 문구 예시를 3개 이상 제공해 주세요.
+    
+    결과는 마케팅 초보자도 이해할 수 있도록 명확하게 설명해 주세요.
+    """
+    if structured:
+        prompt += f"""
+    응답은 반드시 아래 형식의 JSON 객체 하나로만 작성해 주세요. JSON 앞뒤에 다른 텍스트를 쓰지 마세요.
+    {{
+        "analysis": "위 1~4번 내용을 마크다운으로 정리한 전체 분석",
+        "ad_type": "{' / '.join(AD_TYPES)} 중 하나",
+        "media_distribution": {{{", ".join(f'"{channel}": 비율' for channel in MEDIA_CHANNELS)}}},
+        "creatives": [{{"type": "광고 소재 유형", "count": 개수}}],
+        "ad_copies": ["광고 문구 예시"]
+    }}
+    media_distribution의 비율은 합이 100인 퍼센트 숫자로 작성해 주세요.
+    """
+    return prompt
+
+# 구조화된(JSON) 응답 파싱 및 검증
+def extract_json_object(text):
+    """응답에서 JSON 객체 부분만 꺼내 파싱 (코드 블록 표시나 앞뒤 설명이 붙어 있어도 처리)"""
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("JSON 객체를 찾을 수 없습니다")
+    return json.loads(text[start:end + 1])
+
+_ANALYSIS_FIELD_RE = re.compile(r'"analysis"\s*:\s*"')
+_JSON_STRING_BODY_RE = re.compile(r'(?:[^"\\]|\\.)*')
+
+def extract_partial_analysis(text):
+    """스트리밍 중인 응답에서 화면에 보여 줄 분석 텍스트
+    
+    JSON 형식 응답이면 지금까지 받은 "analysis" 문자열 값을 풀어서 반환하고, 아직 그 값이 시작되지 않았으면
+    None을 반환한다. JSON이 아닌 응답은 그대로 반환한다.
+    """
+    stripped = text.lstrip()
+    if not stripped.startswith(("{", "```")):
+        return text
+    match = _ANALYSIS_FIELD_RE.search(text)
+    if match is None:
+        return None
+    body = _JSON_STRING_BODY_RE.match(text, match.end()).group(0)
+    # 끝에 잘린 이스케이프(\, \u00 등)가 남아 있으면 완전한 문자까지만 사용
+    for cut in range(min(len(body), 6) + 1):
+        try:
+            return json.loads(f'"{body[:len(body) - cut]}"')
+        except ValueError:
+            continue
+    return None
+
+def validate_structured_analysis(data):
+    """JSON 응답을 스키마에 맞춰 검증하고 화면에서 쓰는 형태로 정리 (형식이 틀리면 ValueError)"""
+    if not isinstance(data, dict):
+        raise ValueError("응답이 JSON 객체가 아닙니다")
+    
+    analysis = data.get("analysis")
+    if not isinstance(analysis, str) or not analysis.strip():
+        raise ValueError("analysis 항목이 비어 있습니다")
+    
+    ad_type = data.get("ad_type")
+    if ad_type not in AD_TYPES:
+        raise ValueError(f"ad_type 값이 올바르지 않습니다: {ad_type}")
+    
+    distribution = data.get("media_distribution")
+    if not isinstance(distribution, dict):
+        raise ValueError("media_distribution 항목이 객체가 아닙니다")
+    values = []
+    for channel in MEDIA_CHANNELS:
+        value = distribution.get(channel, 0)
+        if isinstance(value, str):
+            value = value.strip().rstrip("%")
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{channel} 비율이 숫자가 아닙니다: {value}")
+        if value < 0:
+            raise ValueError(f"{channel} 비율이 음수입니다: {value}")
+        values.append(value)
+    if sum(values) <= 0:
+        raise ValueError("media_distribution 비율의 합이 0입니다")
+    
+    creatives = []
+    for creative in data.get("creatives") or []:
+        if not isinstance(creative, dict) or not isinstance(creative.get("type"), str):
+            raise ValueError("creatives 항목 형식이 올바르지 않습니다")
+        try:
+            count = int(creative.get("count", 0))
+        except (TypeError, ValueError):
+            raise ValueError(f"creatives 개수가 숫자가 아닙니다: {creative.get('count')}")
+        creatives.append({"type": creative["type"], "count": max(count, 0)})
+    
+    ad_copies = data.get("ad_copies") or []
+    if not isinstance(ad_copies, list) or not all(isinstance(copy, str) for copy in ad_copies):
+        raise ValueError("ad_copies 항목은 문자열 목록이어야 합니다")
+    
+    return {
+        "raw_text": analysis,
+        "parsed_data": {
+            "ad_type": ad_type,
+            "media_distribution": round_distribution(values),
+            "creatives": creatives,
+            "ad_copies": ad_copies
+        }
+    }
+
+def build_analysis_entry(result_text):
+    """모델 응답을 화면 표시용 텍스트와 파싱 결과로 변환 (JSON 검증 실패 시 텍스트 파싱으로 대체)"""
+    if STRUCTURED_OUTPUT and not is_error_result(result_text):
+        try:
+            with time_stage("parse_structured"):
+                entry = validate_structured_analysis(extract_json_object(result_text))
+            entry["structured"] = True
+            return entry
+        except ValueError:
+            pass
+    with time_stage("parse_text"):
+        parsed_data = parse_ad_recommendations(result_text)
+    return {
+        "raw_text": result_text,
+        "parsed_data": parsed_data,
+        "structured": False
+    }
+
+def is_parsed_analysis(text):
+    """응답에서 예산 배분을 읽을 수 있는지 확인 (JSON 검증 통과 또는 텍스트에서 예산 배분 섹션 발견)
+    
+    parse_ad_recommendations는 섹션을 찾지 못해도 기본 배분을 돌려주므로, 가장 빠른 응답 모드에서는
+    같은 섹션 탐색으로 실제로 파싱된 응답만 성공으로 본다."""
+    if STRUCTURED_OUTPUT:
+        try:
+            validate_structured_analysis(extract_json_object(text))
+            return True
+        except ValueError:
+            pass
+    return _find_budget_section(text.strip())[0] is not None
+
+# 광고 유형별 기준 클릭률, 전환율, 도달률
+def get_ad_type_rates(ad_type):
+    if ad_type == "검색광고":
+        base_ctr = 0.05  # 클릭률 (평균 5%)
+        base_conversion = 0.04  # 전환율 (평균 4%)
+        base_reach = 0.4  # 도달률 (40%)
+    elif ad_type == "디스플레이광고":
+        base_ctr = 0.02  # 클릭률 (평균 2%)
+        base_conversion = 0.02  # 전환율 (평균 2%)
+        base_reach = 0.7  # 도달률 (70%)
+    else:
+        base_ctr = 0.035  # 중간값
+        base_conversion = 0.03  # 중간값
+        base_reach = 0.55  # 중간값
+    return base_ctr, base_conversion, base_reach
+
+# 브랜드 설명 길이에 따른 조정 (더 자세한 설명 = 더 좋은 타겟팅)
+def get_description_factor(campaign_data):
+    return float(get_description_factor_for_length(len(campaign_data["brand_description"])))
+
+def get_description_factor_for_length(length):
+    """설명 길이(자, 배열 가능)에 따른 타기팅 계수 - 200자에서 최대 1.2"""
+    return np.minimum(1 + np.asarray(length, dtype=float) / 1000, 1.2)
+
+# 시간에 따른 성장 모델링: 매주 5% 성능 향상, 8주 이후 점차 정체
+def get_time_factor(week_numbers):
+    return np.where(
+        week_numbers > 8,
+        1 + 0.05 * 7 + 0.02 * (week_numbers - 8),
+        1 + 0.05 * (week_numbers - 1)
+    )
+
+# 시뮬레이션 기간 - 시간 계수는 주 번호 기준이므로 일 단위에서는 기간 중앙의 소수 주 번호를 사용
+# (1주차의 1~7일차는 0.57~1.43주차로, 7일 평균이 주 단위의 1주차 값과 같음)
+def get_simulation_periods(horizon_days, granularity):
+    """(기간 번호 배열, 기간별 시간 계수, 주간 대비 기간 길이) - horizon_days는 최대 SIMULATION_MAX_HORIZON_DAYS일,
+    주 단위에서는 남는 날을 버림"""
+    if granularity not in SIMULATION_GRANULARITIES:
+        raise ValueError(f"지원하지 않는 집계 단위입니다: {granularity}")
+    period_days = SIMULATION_PERIOD_DAYS[granularity]
+    period_count = max(min(int(horizon_days), SIMULATION_MAX_HORIZON_DAYS) // period_days, 1)
+    period_numbers = np.arange(1, period_count + 1)
+    time_factor = get_time_factor((period_numbers - 0.5) * period_days / 7 + 0.5)
+    return period_numbers, time_factor, period_days / 7
+
+# 매체 배분 비율을 MEDIA_CHANNELS 순서의 비중 배열(합 1)로 변환
+def get_channel_shares(media_distribution):
+    shares = np.array([media_distribution.get(channel, 0) for channel in MEDIA_CHANNELS], dtype=float)
+    return shares / shares.sum() if shares.sum() > 0 else np.full(len(MEDIA_CHANNELS), 1 / len(MEDIA_CHANNELS))
+
+# 매체별 파라미터를 MEDIA_CHANNELS 순서의 배열로 반환
+def get_channel_param(name):
+    return np.array([CHANNEL_PARAMS[channel][name] for channel in MEDIA_CHANNELS], dtype=float)
+
+# 매체별 주간 예산 대비 기본 노출 수 (수확 체감 반응 곡선)
+def get_response_impressions(channel_budget):
+    """예산이 작을 때는 예산/CPM에 비례하고 saturation 부근부터 포화되는 노출 수 계산"""
+    saturation = get_channel_param("saturation")
+    return saturation / get_channel_param("cpm") * 1000 * (1 - np.exp(-channel_budget / saturation))
+
+# 매체별 주간 예산에 따른 도달 기여 비율 (적은 예산에서 빠르게 오르고 전체 예산 집행 시 1)
+def get_reach_response(channel_budget, weekly_budget):
+    saturation = get_channel_param("saturation")
+    return (1 - np.exp(-channel_budget / saturation)) / (1 - np.exp(-weekly_budget / saturation))
+
+# 시뮬레이션 결과 - 지표별 NumPy 배열 묶음(열 형식)으로 보관하고 요약 지표는 생성 시 한 번만 계산
+class SimulationResult:
+    """기간별 지표 열(periods)과 매체별 지표 열(channels)을 가진 시뮬레이션 결과
+    
+    periods는 {열 이름: 길이가 기간 수인 배열}로 첫 열은 집계 단위 이름("week" 또는 "day")의 기간 번호이고,
+    channels는 {열 이름: 길이가 매체 수인 배열}이며 channels["period_conversions"]만 (매체 수 x 기간 수) 배열이다.
+    배열은 만든 뒤 바꾸지 않는다.
+    """
+    
+    def __init__(self, periods, channels, granularity="week", runs=None):
+        self.periods = periods
+        self.channels = channels
+        self.granularity = granularity
+        self.runs = runs
+        self.period_count = len(periods[granularity])
+        self.total_impressions = int(periods["impressions"].sum())
+        self.total_clicks = int(periods["clicks"].sum())
+        self.total_conversions = int(periods["conversions"].sum())
+        self.avg_ctr = float(periods["ctr"].mean())
+        self.final_reach = float(periods["reach"][-1])
+        # 화면에서 차트/표를 재사용할 때 쓰는 내용 해시
+        digest = hashlib.sha256(granularity.encode("utf-8"))
+        for columns in (periods, channels):
+            for name in sorted(columns):
+                digest.update(name.encode("utf-8"))
+                digest.update(np.ascontiguousarray(columns[name]).tobytes())
+        self.digest = digest.hexdigest()
+    
+    def to_dataframe(self):
+        """기간별 지표 DataFrame (배열을 복사하지 않음)"""
+        import pandas as pd
+        return pd.DataFrame(self.periods, copy=False)
+    
+    def to_arrow(self):
+        """기간별 지표 Arrow 테이블 (숫자 배열은 복사하지 않음)"""
+        import pyarrow as pa
+        return pa.table(self.periods)
+    
+    def summary(self):
+        return {
+            "impressions": self.total_impressions,
+            "clicks": self.total_clicks,
+            "conversions": self.total_conversions,
+            "final_reach": self.final_reach
+        }
+    
+    def channel_records(self):
+        """매체별 기여도를 매체 하나당 딕셔너리 하나인 목록으로 변환 (기간별 전환 수는 weekly_conversions 또는 daily_conversions)"""
+        names = [name for name in self.channels if name != "period_conversions"]
+        period_key = f"{SIMULATION_PERIOD_NAMES[self.granularity]}_conversions"
+        return [
+            {
+                **{name: self.channels[name][c].item() for name in names},
+                period_key: self.channels["period_conversions"][c].tolist()
+            }
+            for c in range(len(self.channels["channel"]))
+        ]
+    
+    def to_dict(self):
+        """JSON으로 저장할 수 있는 {"weekly"(또는 "daily"): [기간별 딕셔너리], "channels": [매체별 딕셔너리]} 형태로 변환"""
+        columns = {name: values.tolist() for name, values in self.periods.items()}
+        return {
+            SIMULATION_PERIOD_NAMES[self.granularity]: [dict(zip(columns, row)) for row in zip(*columns.values())],
+            "channels": self.channel_records()
+        }
+
+# 반복 축에 대한 백분위 - NumPy의 정렬은 SIMD로 구현되어 np.percentile이 쓰는 부분 정렬(partition)보다
+# 몇 배 빠르므로, 반복 축을 제자리에서 정렬한 뒤 필요한 순서 통계량만 골라 선형 보간
+def percentiles_along_runs(values, percentiles):
+    """마지막 축에 대한 백분위 (백분위 수 x 나머지 축) - np.percentile(values, percentiles, axis=-1)과 같은 값
+    
+    복사하지 않도록 values를 제자리에서 정렬하므로 더 쓰지 않을 배열만 넘긴다.
+    """
+    values.sort(axis=-1)
+    positions = np.asarray(percentiles, dtype=float) / 100 * (values.shape[-1] - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, values.shape[-1] - 1)
+    fraction = (positions - lower).reshape((-1,) + (1,) * (values.ndim - 1))
+    low_values = np.moveaxis(values[..., lower], -1, 0)
+    return low_values + (np.moveaxis(values[..., upper], -1, 0) - low_values) * fraction
+
+# 시뮬레이션 결과 생성
+@time_stage("simulation")
+def generate_simulation_results(campaign_data, ad_type, media_distribution=None, runs=SIMULATION_RUNS,
+                                seed=None, weekly_budget=SIMULATION_WEEKLY_BUDGET,
+                                horizon_days=SIMULATION_HORIZON_DAYS, granularity=SIMULATION_GRANULARITY):
+    """매체 x 기간 x 반복 텐서를 배열 연산으로 계산해 기간별 합계 밴드와 매체별 기여도를 SimulationResult로 반환
+    
+    horizon_days(최대 SIMULATION_MAX_HORIZON_DAYS)일을 granularity("week" 또는 "day") 단위로 집계하며,
+    주 단위에서는 남는 날을 버린다. 텐서가 SIMULATION_CHUNK_ELEMENTS를 넘으면 기간 축을 나눠 계산한다.
+    """
+    # period_scale: 주간 노출 수 대비 기간별 노출 수
+    period_numbers, time_factor, period_scale = get_simulation_periods(horizon_days, granularity)
+    period_count = len(period_numbers)
+    base_ctr, base_conversion, base_reach = get_ad_type_rates(ad_type)
+    description_factor = get_description_factor(campaign_data)
+    shares = get_channel_shares(media_distribution or DEFAULT_MEDIA_DISTRIBUTION)
+    
+    # 매체 x 기간 (x 반복) 축에 맞춘 매체별 기준값 - 반복 축을 마지막에 두어 반복에 대한 백분위/중앙값을
+    # 연속된 메모리에서 계산하고, 지표는 미리 만든 float32 배열 네 개를 제자리에서 바꿔가며 계산
+    rng = np.random.default_rng(seed)
+    channel_budget = weekly_budget * shares
+    base_impressions = (get_response_impressions(channel_budget) * period_scale)[:, None]
+    base_click_rate = (base_ctr * get_channel_param("ctr") * description_factor)[:, None]
+    base_conversion_rate = (base_conversion * get_channel_param("cvr") * description_factor)[:, None]
+    base_channel_reach = (
+        base_reach * get_channel_param("reach") * get_reach_response(channel_budget, weekly_budget) * description_factor
+    )[:, None]
+    
+    def noisy(out, bits, base, low, high):
+        """out을 base(매체 x 기간) x U(low, high)로 채워 반환 - 균등 난수는 16비트 정수 bits를 구간 중앙값으로 변환
+        (노이즈 폭의 1/65536 간격이면 충분하고, 64비트 난수 하나로 네 개를 만들어 float 난수 생성보다 훨씬 빠름)"""
+        step = (high - low) / 65536
+        base = base[..., None]
+        np.multiply(bits, (base * step).astype(np.float32), out=out)
+        out += (base * (low + step / 2)).astype(np.float32)
+        return out
+    
+    # 매체(channels) x 기간 x 반복(runs) 지표를 기간 축 구간마다 한 번의 배열 연산으로 계산
+    low, _, high = SIMULATION_PERCENTILES
+    chunk_periods = max(SIMULATION_CHUNK_ELEMENTS // (len(MEDIA_CHANNELS) * runs), 1)
+    bands = {metric: [] for metric in SIMULATION_BAND_METRICS}
+    median_conversion_rate = []
+    period_conversions = []
+    channel_totals = {name: np.zeros((len(MEDIA_CHANNELS), runs)) for name in ("impressions", "clicks", "conversions")}
+    buffers = None
+    for start in range(0, period_count, chunk_periods):
+        chunk_factor = time_factor[start:start + chunk_periods]
+        shape = (len(MEDIA_CHANNELS), len(chunk_factor), runs)
+        if buffers is None or buffers.shape[1:] != shape:
+            buffers = np.empty((4, *shape), dtype=np.float32)
+        impressions, clicks, conversions, channel_reach = buffers
+        bits = rng.bit_generator.random_raw(buffers.size // 4).view(np.uint16).reshape(buffers.shape)
+        # 횟수는 반올림 (일 단위처럼 기간별 값이 작을 때 내림하면 합계가 주 단위보다 체계적으로 작아짐)
+        np.rint(noisy(impressions, bits[0], base_impressions * chunk_factor, 0.95, 1.05), out=impressions)
+        noisy(clicks, bits[1], base_click_rate * chunk_factor, 0.85, 1.15)
+        clicks *= impressions
+        np.rint(clicks, out=clicks)
+        noisy(conversions, bits[2], base_conversion_rate, 0.9, 1.1)
+        conversions *= clicks
+        np.rint(conversions, out=conversions)
+        noisy(channel_reach, bits[3], base_channel_reach * chunk_factor, 0.9, 1.1)
+        np.minimum(channel_reach, 0.95, out=channel_reach)
+        
+        # 매체 합계 (도달률은 매체 간 중복을 고려해 합집합으로 계산, 최대 95%)
+        # 주간 도달률을 기간 길이에 맞게 환산 - 7일 동안 독립적으로 도달한다고 보면 합집합이 주간 도달률과 같으므로
+        # 매체별로 1 - (1 - r)^(기간/7)을 계산한 뒤 합집합을 구하는 것은 합집합의 미도달 비율을 거듭제곱하는 것과 같음
+        np.subtract(1, channel_reach, out=channel_reach)
+        missed = np.prod(channel_reach, axis=0)
+        if period_scale != 1:
+            missed **= np.float32(period_scale)
+        # 기간별 매체 합계는 포화 곡선 때문에 2^24보다 훨씬 작아 float32로도 정확한 정수 (기간 전체 합계는 float64)
+        total_impressions = impressions.sum(axis=0)
+        total_clicks = clicks.sum(axis=0)
+        total_conversions = conversions.sum(axis=0)
+        runs_by_metric = {
+            "impressions": total_impressions,
+            "reach": np.minimum(1 - missed, np.float32(0.95)),
+            "clicks": total_clicks,
+            "ctr": np.divide(total_clicks, total_impressions, out=np.zeros_like(total_clicks), where=total_impressions > 0),
+            "conversions": total_conversions
+        }
+        conversion_rate = np.divide(total_conversions, total_clicks, out=np.zeros_like(total_clicks), where=total_clicks > 0)
+        # 기간별 백분위 밴드 (p5 / p50 / p95) - 지표(마지막은 전환율)를 한 배열로 쌓아 한 번에 계산
+        metric_bands = percentiles_along_runs(
+            np.stack([runs_by_metric[metric] for metric in SIMULATION_BAND_METRICS] + [conversion_rate]),
+            SIMULATION_PERCENTILES
+        )
+        for index, metric in enumerate(SIMULATION_BAND_METRICS):
+            bands[metric].append(metric_bands[:, index])
+        median_conversion_rate.append(metric_bands[1, -1])
+        for name, values in (("impressions", impressions), ("clicks", clicks), ("conversions", conversions)):
+            channel_totals[name] += values.sum(axis=1, dtype=np.float64)
+        period_conversions.append(percentiles_along_runs(conversions, (50,))[0])
+    
+    # 기간별 지표 열 (기본 값은 중앙값, 밴드는 _p5 / _p95 열로 제공)
+    periods = {granularity: period_numbers}
+    for metric in SIMULATION_BAND_METRICS:
+        band = np.concatenate(bands[metric], axis=1)
+        if metric in ("impressions", "clicks", "conversions"):
+            band = np.rint(band).astype(np.int64)
+        periods[metric] = band[1]
+        periods[f"{metric}_p{low}"] = band[0]
+        periods[f"{metric}_p{high}"] = band[2]
+    periods["conversion_rate"] = np.concatenate(median_conversion_rate)
+    
+    # 매체별 기여도 (전체 기간 합계의 중앙값과 전환 수 밴드, 기간별 전환 수 중앙값)
+    channel_conversion_bands = np.rint(
+        np.percentile(channel_totals["conversions"], SIMULATION_PERCENTILES, axis=1)
+    ).astype(np.int64)
+    channels = {
+        "channel": np.array(MEDIA_CHANNELS),
+        "share": shares,
+        "spend": np.rint(channel_budget * period_scale * period_count).astype(np.int64),
+        "impressions": np.rint(np.median(channel_totals["impressions"], axis=1)).astype(np.int64),
+        "clicks": np.rint(np.median(channel_totals["clicks"], axis=1)).astype(np.int64),
+        "conversions": channel_conversion_bands[1],
+        f"conversions_p{low}": channel_conversion_bands[0],
+        f"conversions_p{high}": channel_conversion_bands[2],
+        "period_conversions": np.concatenate(period_conversions, axis=1)
+    }
+    
+    return SimulationResult(periods, channels, granularity, runs)
+
+# 차트 데이터 축소 - Largest-Triangle-Three-Buckets 방식으로 추세의 모양을 유지하며 점 수를 줄임
+def downsample_lttb(x, y, max_points):
+    """(x, y) 선 그래프에서 남길 점의 인덱스 배열 (처음과 끝 점 포함, 최대 max_points개)
+    
+    점이 max_points개 이하이면 모든 인덱스를 반환한다. 구간마다 이전에 고른 점, 다음 구간의 평균 점과
+    만드는 삼각형의 넓이가 가장 큰 점을 고른다.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    
+    # 처음과 끝 점을 뺀 나머지를 max_points - 2개 구간으로 나눔
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    # 다음 구간의 평균 점 (마지막 구간은 끝 점)
+    next_x = np.append([x[a:b].mean() for a, b in zip(edges[1:-1], edges[2:])], x[-1])
+    next_y = np.append([y[a:b].mean() for a, b in zip(edges[1:-1], edges[2:])], y[-1])
+    previous = 0
+    for i, (a, b) in enumerate(zip(edges[:-1], edges[1:])):
+        area = np.abs(
+            (x[previous] - next_x[i]) * (y[a:b] - y[previous])
+            - (x[previous] - x[a:b]) * (next_y[i] - y[previous])
+        )
+        previous = a + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+# 매체 배분 비중(MEDIA_CHANNELS 순서)을 합이 100인 정수 퍼센트로 변환 (최대 잔여 방식)
+def round_distribution(shares):
+    shares = [float(share) for share in shares]
+    total = sum(shares)
+    if total <= 0:
+        shares, total = [1.0] * len(shares), float(len(shares))
+    raw = [share / total * 100 for share in shares]
+    rounded = [int(value) for value in raw]
+    remainder = 100 - sum(rounded)
+    by_fraction = sorted(range(len(raw)), key=lambda i: rounded[i] - raw[i])
+    for i in by_fraction[:remainder]:
+        rounded[i] += 1
+    return dict(zip(MEDIA_CHANNELS, rounded))
+
+# 후보 배분들의 기대 성과 계산
+def evaluate_media_splits(splits, campaign_data, ad_type, objective="conversions",
+                          weekly_budget=SIMULATION_WEEKLY_BUDGET, horizon_days=SIMULATION_HORIZON_DAYS,
+                          granularity=SIMULATION_GRANULARITY):
+    """(후보 수 x 매체 수) 비중 행렬의 시뮬레이션 기간 기대 총 전환 수 또는 마지막 기간 도달률을 한 번에 계산"""
+    base_ctr, base_conversion, base_reach = get_ad_type_rates(ad_type)
+    description_factor = get_description_factor(campaign_data)
+    _, time_factor, period_scale = get_simulation_periods(horizon_days, granularity)
+    
+    if objective == "reach":
+        return expected_final_reach(
+            weekly_budget * splits, weekly_budget, base_reach, description_factor, time_factor[-1], period_scale
+        )
+    return expected_total_conversions(
+        weekly_budget * splits, base_ctr, base_conversion, description_factor, time_factor, period_scale
+    )
+
+# 기대 성과 계산 - 인자는 마지막 축이 매체인 배열과 브로드캐스트되는 배열이어도 됨 (시나리오 격자 계산에 사용)
+def expected_total_conversions(channel_budget, base_ctr, base_conversion, description_factor, time_factor,
+                               period_scale=1.0):
+    """매체별 주간 예산(..., 매체 수)의 기간 전체 기대 전환 수 (time_factor는 기간별 시간 계수, period_scale은 주 대비 기간 길이)"""
+    # 노출 수와 클릭률이 모두 시간 계수에 비례하므로 기간별 전환 수는 시간 계수의 제곱에 비례
+    conversions_per_impression = (
+        base_ctr * get_channel_param("ctr") * description_factor
+        * base_conversion * get_channel_param("cvr") * description_factor
+    )
+    weekly_conversions = get_response_impressions(channel_budget) * conversions_per_impression
+    return weekly_conversions.sum(axis=-1) * period_scale * np.sum(time_factor ** 2)
+
+def expected_final_reach(channel_budget, weekly_budget, base_reach, description_factor, final_time_factor,
+                         period_scale=1.0):
+    """매체별 주간 예산(..., 매체 수)의 마지막 기간 기대 도달률 (매체 간 중복을 고려한 합집합, 최대 95%)
+    
+    시뮬레이션과 같이 주간 도달률을 기간 길이에 맞게 환산 (합집합의 미도달 비율을 period_scale 제곱)
+    """
+    channel_reach = np.minimum(
+        base_reach * get_channel_param("reach") * get_reach_response(channel_budget, weekly_budget)
+        * description_factor * final_time_factor,
+        0.95
+    )
+    return np.minimum(1 - np.prod(1 - channel_reach, axis=-1) ** period_scale, 0.95)
+
+# 예산 배분 최적화
+@time_stage("optimization")
+def optimize_media_distribution(campaign_data, ad_type, media_distribution=None, objective="conversions",
+                                weekly_budget=SIMULATION_WEEKLY_BUDGET, horizon_days=SIMULATION_HORIZON_DAYS,
+                                granularity=SIMULATION_GRANULARITY, batch_size=OPTIMIZER_BATCH_SIZE,
+                                iterations=OPTIMIZER_ITERATIONS, seed=0):
+    """디리클레 표본 기반 교차 엔트로피 탐색으로 매체 배분 심플렉스에서 시뮬레이션 기간의 목표 지표를 최대화"""
+    rng = np.random.default_rng(seed)
+    channel_count = len(MEDIA_CHANNELS)
+    baseline = get_channel_shares(media_distribution or DEFAULT_MEDIA_DISTRIBUTION)
+    
+    def evaluate(splits):
+        return evaluate_media_splits(
+            splits, campaign_data, ad_type, objective, weekly_budget, horizon_days, granularity
+        )
+    
+    # 첫 배치는 심플렉스 전체에서 균등하게 추출하고, AI 추천 배분과 균등 배분을 후보에 포함
+    candidates = np.vstack([
+        rng.dirichlet(np.ones(channel_count), batch_size),
+        baseline,
+        np.full(channel_count, 1 / channel_count)
+    ])
+    best_split = baseline
+    best_value = evaluate(baseline[None, :])[0]
+    concentration = 20.0
+    elite_count = max(1, batch_size // 20)
+    
+    for _ in range(iterations):
+        values = evaluate(candidates)
+        order = np.argsort(values)[::-1]
+        if values[order[0]] > best_value:
+            best_split, best_value = candidates[order[0]], values[order[0]]
+        
+        # 상위 후보의 평균 주변으로 점점 좁혀 가며 다음 배치 추출
+        elite_mean = candidates[order[:elite_count]].mean(axis=0)
+        candidates = rng.dirichlet(np.maximum(elite_mean * concentration, 0.05), batch_size)
+        candidates[0] = best_split
+        concentration *= 3
+    
+    optimized_distribution = round_distribution(best_split)
+    return {
+        "objective": objective,
+        "media_distribution": optimized_distribution,
+        "expected_value": evaluate(get_channel_shares(optimized_distribution)[None, :])[0].item(),
+        "baseline_value": evaluate(baseline[None, :])[0].item()
+    }
+
+# 시나리오 분석 - 광고 유형 x 설명 길이 x 예산 수준 x 매체 배분 격자 전체의 기대 성과를 배열 연산으로 계산
+def make_sweep_splits(media_distribution=None, sampled=SWEEP_SAMPLED_SPLITS, extra_splits=None, seed=0):
+    """시나리오 분석에 쓸 배분 후보의 (이름 목록, (후보 수 x 매체 수) 비중 행렬)
+    
+    추천 배분, 균등 배분, extra_splits(이름 -> 배분), 매체별 집중 배분 뒤에 추천 배분 주변에서 뽑은
+    후보 sampled개가 이어진다.
+    """
+    channel_count = len(MEDIA_CHANNELS)
+    baseline = get_channel_shares(media_distribution or DEFAULT_MEDIA_DISTRIBUTION)
+    labels = ["AI 추천", "균등 배분"]
+    rows = [baseline, np.full(channel_count, 1 / channel_count)]
+    for label, distribution in (extra_splits or {}).items():
+        labels.append(label)
+        rows.append(get_channel_shares(distribution))
+    for c, channel in enumerate(MEDIA_CHANNELS):
+        focused = np.full(channel_count, 0.4 / (channel_count - 1))
+        focused[c] = 0.6
+        labels.append(f"{channel} 집중")
+        rows.append(focused)
+    if sampled:
+        rng = np.random.default_rng(seed)
+        rows.extend(rng.dirichlet(np.maximum(baseline * SWEEP_SAMPLE_CONCENTRATION, 0.05), sampled))
+        labels.extend(f"후보 {i + 1}" for i in range(sampled))
+    return labels, np.vstack(rows)
+
+class ScenarioSweep:
+    """시나리오 분석 결과
+    
+    metrics는 {지표: (광고 유형 x 설명 길이 x 예산 수준 x 배분 후보) 배열}이며 지표는 SWEEP_METRICS의 키.
+    배분 후보 중 앞의 named_split_count개는 이름 있는 배분(AI 추천, 균등 배분 등)이고 나머지는 무작위 후보.
+    기대 성과는 horizon_days일을 granularity 단위 기간 period_count개로 나눈 시뮬레이션 기간 기준이다.
+    배열은 만든 뒤 바꾸지 않는다.
+    """
+    
+    def __init__(self, ad_types, description_lengths, weekly_budgets, split_labels, splits, named_split_count,
+                 metrics, horizon_days, granularity, period_count, digest):
+        self.ad_types = list(ad_types)
+        self.description_lengths = np.asarray(description_lengths)
+        self.weekly_budgets = np.asarray(weekly_budgets)
+        self.split_labels = list(split_labels)
+        self.splits = splits
+        self.named_split_count = named_split_count
+        self.metrics = metrics
+        self.horizon_days = horizon_days
+        self.granularity = granularity
+        self.period_count = period_count
+        self.digest = digest
+        self.size = metrics["conversions"].size
+    
+    def best_split_indices(self, metric):
+        """(광고 유형 x 설명 길이 x 예산 수준)마다 지표가 가장 좋은 배분 후보 번호"""
+        values = self.metrics[metric]
+        if metric in SWEEP_LOWER_IS_BETTER:
+            return np.nanargmin(np.where(np.isnan(values), np.inf, values), axis=-1)
+        return np.argmax(values, axis=-1)
+    
+    def to_dataframe(self):
+        """시나리오 하나당 한 행인 DataFrame (배분 비중은 매체별 열)"""
+        import pandas as pd
+        a, d, b, s = np.indices(self.metrics["conversions"].shape).reshape(4, -1)
+        columns = {
+            "ad_type": np.array(self.ad_types)[a],
+            "description_length": self.description_lengths[d],
+            "weekly_budget": self.weekly_budgets[b],
+            "split": np.array(self.split_labels)[s]
+        }
+        for c, channel in enumerate(MEDIA_CHANNELS):
+            columns[f"share_{channel}"] = self.splits[s, c]
+        for metric, values in self.metrics.items():
+            columns[metric] = values.reshape(-1)
+        return pd.DataFrame(columns)
+
+_sweep_cache = OrderedDict()
+_sweep_cache_lock = threading.Lock()
+
+@time_stage("scenario_sweep")
+def run_scenario_sweep(media_distribution=None, weekly_budget=SIMULATION_WEEKLY_BUDGET, ad_types=AD_TYPES,
+                       description_lengths=SWEEP_DESCRIPTION_LENGTHS, budget_multipliers=SWEEP_BUDGET_MULTIPLIERS,
+                       sampled_splits=SWEEP_SAMPLED_SPLITS, extra_splits=None, horizon_days=SIMULATION_HORIZON_DAYS,
+                       granularity=SIMULATION_GRANULARITY, seed=0, chunk_size=SWEEP_CHUNK_SIZE):
+    """격자의 모든 시나리오에 대한 기대 전환 수, 최종 도달률, 전환 단가를 ScenarioSweep으로 반환
+    
+    같은 매개변수(배분 후보 포함)의 결과는 프로세스 전체에서 재사용한다. 시뮬레이션의 무작위 변동은 평균이
+    1이므로 반복 시뮬레이션 대신 기대값을 계산하며, 배분 후보를 chunk_size개씩 나눠 한 번의 배열 연산으로 처리한다.
+    """
+    split_labels, splits = make_sweep_splits(media_distribution, sampled_splits, extra_splits, seed)
+    weekly_budgets = weekly_budget * np.asarray(budget_multipliers, dtype=float)
+    period_numbers, time_factor, period_scale = get_simulation_periods(horizon_days, granularity)
+    digest = hashlib.sha256(json.dumps({
+        "ad_types": list(ad_types),
+        "description_lengths": list(description_lengths),
+        "weekly_budgets": weekly_budgets.tolist(),
+        "split_labels": split_labels,
+        "granularity": granularity,
+        "periods": len(period_numbers)
+    }, ensure_ascii=False).encode("utf-8") + splits.tobytes()).hexdigest()
+    with _sweep_cache_lock:
+        if digest in _sweep_cache:
+            _sweep_cache.move_to_end(digest)
+            return _sweep_cache[digest]
+    
+    # 축 순서: 광고 유형, 설명 길이, 예산 수준, 배분 후보, 매체
+    rates = np.array([get_ad_type_rates(ad_type) for ad_type in ad_types])
+    base_ctr, base_conversion, base_reach = (rates[:, i].reshape(-1, 1, 1, 1, 1) for i in range(3))
+    description_factor = get_description_factor_for_length(description_lengths).reshape(1, -1, 1, 1, 1)
+    budget_axis = weekly_budgets.reshape(1, 1, -1, 1, 1)
+    
+    shape = (len(ad_types), len(description_lengths), len(weekly_budgets), len(splits))
+    conversions = np.empty(shape)
+    reach = np.empty(shape)
+    for start in range(0, len(splits), chunk_size):
+        stop = min(start + chunk_size, len(splits))
+        channel_budget = budget_axis * splits[start:stop]
+        conversions[..., start:stop] = expected_total_conversions(
+            channel_budget, base_ctr, base_conversion, description_factor, time_factor, period_scale
+        )
+        reach[..., start:stop] = expected_final_reach(
+            channel_budget, budget_axis, base_reach, description_factor, time_factor[-1], period_scale
+        )
+    spend = (weekly_budgets * period_scale * len(period_numbers)).reshape(1, 1, -1, 1)
+    cpa = np.divide(spend, conversions, out=np.full(shape, np.nan), where=conversions > 0)
+    
+    sweep = ScenarioSweep(
+        ad_types, description_lengths, weekly_budgets, split_labels, splits, len(splits) - sampled_splits,
+        {"conversions": conversions, "reach": reach, "cpa": cpa}, horizon_days, granularity, len(period_numbers), digest
+    )
+    with _sweep_cache_lock:
+        _sweep_cache[digest] = sweep
+        while len(_sweep_cache) > SWEEP_CACHE_ENTRIES:
+            _sweep_cache.popitem(last=False)
+    return sweep
+
+# 여러 모델 결과의 합의 - 결과가 도착할 때마다 하나씩 추가하며 갱신
+def get_consensus_weight(entry):
+    """분석 결과 하나가 합의에서 차지하는 가중치 (오류 결과는 0)"""
+    if is_error_result(entry["raw_text"]):
+        return 0.0
+    return 1.0 if entry.get("structured") else CONSENSUS_TEXT_PARSE_WEIGHT
+
+class ConsensusBuilder:
+    """모델별 파싱 결과를 받아 매체 배분(가중 중앙값 또는 절사 평균)과 광고 유형(가중 다수결) 합의를 계산"""
+    
+    def __init__(self):
+        self.weights = {}
+        # 매체별 (비율, 가중치) 목록을 비율 순으로 정렬해 유지
+        self._values = {channel: [] for channel in MEDIA_CHANNELS}
+        self._votes = {}
+    
+    def add(self, model_name, parsed_data, weight=1.0):
+        """모델 결과 하나를 합의에 반영 (가중치가 0 이하이면 무시)"""
+        if weight <= 0 or model_name in self.weights:
+            return
+        self.weights[model_name] = weight
+        for channel in MEDIA_CHANNELS:
+            bisect.insort(self._values[channel], (float(parsed_data["media_distribution"].get(channel, 0)), weight))
+        ad_type = parsed_data["ad_type"]
+        self._votes[ad_type] = self._votes.get(ad_type, 0.0) + weight
+    
+    def _weighted_median(self, values, total):
+        cumulative = 0.0
+        for i, (value, weight) in enumerate(values):
+            cumulative += weight
+            if cumulative > total / 2:
+                return value
+            if cumulative == total / 2:
+                # 가중치가 정확히 절반으로 나뉘면 경계의 두 값을 평균
+                return (value + values[i + 1][0]) / 2
+        return values[-1][0]
+    
+    def _trimmed_mean(self, values, total):
+        trim = total * CONSENSUS_TRIM_RATIO
+        low, high = trim, total - trim
+        cumulative = weighted_sum = kept = 0.0
+        for value, weight in values:
+            # 누적 가중치 구간 [cumulative, cumulative + weight] 중 [low, high]에 걸친 부분만 사용
+            overlap = min(cumulative + weight, high) - max(cumulative, low)
+            if overlap > 0:
+                weighted_sum += value * overlap
+                kept += overlap
+            cumulative += weight
+        return weighted_sum / kept if kept else 0.0
+    
+    def result(self, method="median"):
+        """현재까지의 합의 결과 (반영된 결과가 없으면 None)"""
+        if not self.weights:
+            return None
+        total = sum(self.weights.values())
+        aggregate = self._trimmed_mean if method == "trimmed_mean" else self._weighted_median
+        shares = [aggregate(self._values[channel], total) for channel in MEDIA_CHANNELS]
+        return {
+            "method": method,
+            # 득표(가중치 합)가 같으면 먼저 도착한 유형을 선택
+            "ad_type": max(self._votes, key=self._votes.get),
+            "media_distribution": round_distribution(shares),
+            "votes": dict(self._votes),
+            "weights": dict(self.weights)
+        }
+
+# 캠페인 하나를 한 모델로 분석하고 성과 시뮬레이션까지 실행 (화면 없이 쓰는 통합 진입점)
+def run_campaign_analysis(campaign_data, model_name, cache=None, bypass_cache=False,
+                          runs=SIMULATION_RUNS, seed=None, timeout=ANALYSIS_DEADLINE):
+    """분석 → 파싱 → 시뮬레이션 결과를 JSON으로 저장할 수 있는 딕셔너리로 반환 (timeout초 안에 분석 응답이 없으면 오류)"""
+    start = time.perf_counter()
+    deadline = time.monotonic() + timeout if timeout else None
+    prompt = build_analysis_prompt(campaign_data)
+    prompt_tokens = estimate_tokens(prompt)
+    if prompt_tokens > PROMPT_MAX_TOKENS:
+        return {
+            "model": model_name, "cached": False, "latency": 0.0, "status": "error",
+            "error": f"오류: 프롬프트가 너무 깁니다 (약 {prompt_tokens:,}토큰, 최대 {PROMPT_MAX_TOKENS:,}토큰)"
+        }
+    text, cached = get_ai_analysis_cached(
+        cache or get_analysis_cache(), prompt, model_name, bypass_cache=bypass_cache, deadline=deadline
+    )
+    result = {"model": model_name, "cached": cached, "latency": time.perf_counter() - start}
+    if is_error_result(text):
+        result.update({"status": "error", "error": text})
+        return result
+    
+    entry = build_analysis_entry(text)
+    parsed_data = entry["parsed_data"]
+    simulation = generate_simulation_results(
+        campaign_data, parsed_data["ad_type"], parsed_data["media_distribution"], runs=runs, seed=seed
+    )
+    result.update({
+        "status": "ok",
+        "raw_text": entry["raw_text"],
+        "structured": entry["structured"],
+        "parsed_data": parsed_data,
+        "summary": simulation.summary(),
+        "simulation": simulation.to_dict()
+    })
+    return result
+
+# 백그라운드 분석 작업 - 화면(스크립트) 실행과 분리해 rerun, 새로고침, 연결 끊김에도 분석을 계속하고
+# 결과를 프로세스 메모리에 보관. 화면은 작업 ID로 다시 연결해 snapshot()으로 진행 상황을 조회
+def make_job_key(prompt, model_names, race_mode=False):
+    """프롬프트, 모델 목록(순서 포함), 분석 방식으로 작업 키(SHA-256) 생성 - 같은 키의 작업은 결과도 같음"""
+    key_source = json.dumps({
+        "prompt": normalize_prompt(prompt),
+        "models": list(model_names),
+        "race_mode": bool(race_mode)
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+class AnalysisJob:
+    """여러 모델의 분석을 백그라운드 스레드에서 실행하는 작업
+    
+    모델별 상태는 running → done / timeout 으로 바뀌고, 결과는 끝난 순서대로 results에 쌓인다.
+    스트리밍 모드에서는 응답이 오는 동안 partial에 누적 텍스트가 갱신된다.
+    """
+    
+    def __init__(self, key, prompt, model_names, race_mode=False, bypass_cache=False, stream=False,
+                 timeout=ANALYSIS_DEADLINE):
+        self.job_id = uuid.uuid4().hex
+        self.key = key
+        self.prompt = prompt
+        self.model_names = list(model_names)
+        self.race_mode = race_mode
+        self.bypass_cache = bypass_cache
+        self.stream = stream
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout
+        self.finished = None  # 작업이 끝난 시각 (time.monotonic 기준)
+        self.status = {model_name: "running" for model_name in self.model_names}
+        self.partial = {}
+        self.latencies = {}
+        self.results = {}
+        self.failures = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+    
+    def start(self, cache, max_workers=ANALYSIS_JOB_WORKERS):
+        threading.Thread(target=self._run, args=(cache, max_workers), daemon=True).start()
+    
+    def wait(self, timeout=None):
+        """작업이 끝날 때까지 최대 timeout초 대기하고 끝났는지 반환"""
+        return self._done.wait(timeout)
+    
+    def is_done(self):
+        return self._done.is_set()
+    
+    def has_successful_result(self):
+        with self._lock:
+            return any(model_name not in self.failures for model_name in self.results)
+    
+    def snapshot(self):
+        """현재 진행 상황의 사본 (results는 끝난 순서를 유지)"""
+        with self._lock:
+            return {
+                "done": self._done.is_set(),
+                "status": dict(self.status),
+                "partial": dict(self.partial),
+                "latencies": dict(self.latencies),
+                "results": dict(self.results),
+                "failures": dict(self.failures),
+                "timed_out": [name for name, status in self.status.items() if status == "timeout"]
+            }
+    
+    def _run(self, cache, max_workers):
+        try:
+            if self.race_mode:
+                self._run_race(cache)
+            else:
+                self._run_parallel(cache, max_workers)
+        except Exception as e:
+            logger.exception("분석 작업 %s 실행 중 오류", self.job_id)
+            with self._lock:
+                for model_name, status in self.status.items():
+                    if status == "running":
+                        self.status[model_name] = "done"
+                        self.failures[model_name] = f"오류: {str(e)}"
+        finally:
+            with self._lock:
+                self.finished = time.monotonic()
+            self._done.set()
+    
+    def _analyze_model(self, cache, model_name):
+        start = time.perf_counter()
+        first_token = []
+        
+        def on_token(text):
+            if not first_token:
+                first_token.append(time.perf_counter())
+            with self._lock:
+                self.partial[model_name] = text
+        
+        try:
+            text, cached = get_ai_analysis_cached(
+                cache, self.prompt, model_name, on_token if self.stream else None, self.bypass_cache, self.deadline
+            )
+        except Exception as e:
+            text, cached = f"오류: {str(e)}", False
+        latency = time.perf_counter() - start
+        with self._lock:
+            # 마감 시각이 지나 이미 시간 초과로 처리된 모델의 늦은 결과는 버림
+            if self.status[model_name] != "running":
+                return
+            self.latencies[model_name] = latency
+            if is_timeout_result(text):
+                self.status[model_name] = "timeout"
+                return
+            self.status[model_name] = "done"
+            if is_error_result(text):
+                self.failures[model_name] = text
+        if text:
+            entry = build_analysis_entry(text)
+            entry.update({
+                "ttft": first_token[0] - start if first_token else None,
+                "latency": latency,
+                "cached": cached
+            })
+            with self._lock:
+                self.results[model_name] = entry
+    
+    def _run_parallel(self, cache, max_workers):
+        executor = ThreadPoolExecutor(max_workers=max(1, min(len(self.model_names), max_workers)))
+        futures = [executor.submit(self._analyze_model, cache, model_name) for model_name in self.model_names]
+        # 요청마다 타임아웃이 걸려 있지만, DNS 조회처럼 타임아웃 밖에서 멈춘 요청도 마감 시각 뒤에는 기다리지 않음
+        try:
+            for _ in as_completed(futures, timeout=max(self.deadline - time.monotonic(), 0) + DEADLINE_GRACE):
+                pass
+        except FuturesTimeoutError:
+            with self._lock:
+                for model_name, status in self.status.items():
+                    if status == "running":
+                        self.status[model_name] = "timeout"
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _run_race(self, cache):
+        start = time.perf_counter()
+        model_name, text, cached, failures = race_ai_analysis(
+            lambda name: get_ai_analysis_cached(
+                cache, self.prompt, name, bypass_cache=self.bypass_cache, deadline=self.deadline
+            ),
+            self.model_names,
+            deadline=self.deadline,
+            accept=is_parsed_analysis
+        )
+        latency = time.perf_counter() - start
+        entry = None
+        if model_name is not None:
+            entry = build_analysis_entry(text)
+            entry.update({"ttft": None, "latency": latency, "cached": cached, "race_winner": True})
+        with self._lock:
+            self.failures.update(failures)
+            for name in self.model_names:
+                self.status[name] = "done"
+            if entry is not None:
+                self.latencies[model_name] = latency
+                self.results[model_name] = entry
+
+class AnalysisJobManager:
+    """프로세스 전체의 분석 작업 목록
+    
+    같은 작업 키로 실행 중인 작업이 있으면 새로 시작하지 않고 그 작업을 돌려주고, 끝난 작업은
+    retention초 동안 보관해 새로고침 후 다시 들어와도 API를 다시 호출하지 않고 결과를 보여준다.
+    """
+    
+    def __init__(self, retention=ANALYSIS_JOB_RETENTION, max_workers=ANALYSIS_JOB_WORKERS):
+        self.retention = retention
+        self.max_workers = max_workers
+        self._jobs = {}
+        self._by_key = {}
+        self._lock = threading.Lock()
+    
+    def _prune(self):
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished is not None and now - job.finished > self.retention:
+                del self._jobs[job_id]
+                if self._by_key.get(job.key) is job:
+                    del self._by_key[job.key]
+    
+    def get(self, job_id):
+        """작업 ID로 작업 조회 (없거나 보관 기간이 지났으면 None)"""
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+    
+    def submit(self, prompt, model_names, race_mode=False, bypass_cache=False, stream=False, cache=None,
+               timeout=ANALYSIS_DEADLINE):
+        """같은 작업이 실행 중이거나 성공 결과가 남아 있으면 그 작업을, 아니면 새 작업을 시작해 반환
+        
+        bypass_cache이면 끝난 작업은 재사용하지 않는다 (실행 중인 작업에는 연결).
+        """
+        key = make_job_key(prompt, model_names, race_mode)
+        with self._lock:
+            self._prune()
+            job = self._by_key.get(key)
+            if job is not None and (not job.is_done() or (job.has_successful_result() and not bypass_cache)):
+                return job
+            job = AnalysisJob(key, prompt, model_names, race_mode, bypass_cache, stream, timeout)
+            self._jobs[job.job_id] = job
+            self._by_key[key] = job
+        job.start(cache or get_analysis_cache(), self.max_workers)
+        return job
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+def get_job_manager():
+    """프로세스 전체에서 공유하는 분석 작업 관리자"""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = AnalysisJobManager()
+    return _job_manager
@@ -0,0 +1,99 @@
+"""요청 전 예상치 - 토큰 수 근사, 긴 설명 줄이기, 비용/응답 시간 예측, 프롬프트 길이 제한"""
+import pytest
+
+import pipeline
+from pipeline import (
+    AnalysisHistory,
+    estimate_analysis,
+    estimate_model_call,
+    estimate_tokens,
+    run_campaign_analysis,
+    trim_to_tokens,
+)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("", 0),
+    (None, 0),
+    ("광고", 2),
+    ("advertising", 3),  # 11자 / 4 → 3
+    ("1234567", 3),  # 7자리 / 3 → 3
+    ("광고 budget 100%!", 2 + 2 + 1 + 2),
+])
+def test_estimate_tokens(text, expected):
+    assert estimate_tokens(text) == expected
+
+
+def test_short_text_is_kept():
+    assert trim_to_tokens("짧은 설명입니다.", 100) == ("짧은 설명입니다.", False)
+
+
+def test_trim_keeps_whole_sentences():
+    text = "첫 문장입니다. 두 번째 문장입니다. 세 번째 문장입니다."
+    trimmed, shortened = trim_to_tokens(text, 20)
+    assert shortened
+    assert trimmed == "첫 문장입니다. 두 번째 문장입니다. …"
+    assert estimate_tokens(trimmed) <= 20
+
+
+def test_trim_cuts_a_single_long_sentence():
+    trimmed, shortened = trim_to_tokens("가" * 5000, 1500)
+    assert shortened
+    assert trimmed == "가" * 1499 + " …"
+    assert estimate_tokens(trimmed) <= 1500
+
+
+def test_estimate_without_history(tmp_path):
+    history = AnalysisHistory(str(tmp_path / "history.json"))
+    estimate = estimate_model_call("광고 분석", "ChatGPT", history)
+    config = pipeline.MODEL_CONFIG["ChatGPT"]
+    assert estimate["input_tokens"] == estimate_tokens("광고 분석") + estimate_tokens(config["system"])
+    # 기록이 없으면 최대 출력 토큰 수 (설정이 없으면 기본값)로 예상
+    assert estimate["output_tokens"] == pipeline.DEFAULT_OUTPUT_TOKENS
+    assert estimate["latency"] == pytest.approx(
+        pipeline.DEFAULT_OUTPUT_TOKENS * pipeline.DEFAULT_SECONDS_PER_OUTPUT_TOKEN
+    )
+    assert estimate["samples"] == 0
+    claude = estimate_model_call("광고 분석", "Claude", history)
+    assert claude["output_tokens"] == pipeline.MODEL_CONFIG["Claude"]["max_tokens"]
+
+
+def test_estimate_uses_recorded_history(tmp_path):
+    path = tmp_path / "history.json"
+    history = AnalysisHistory(str(path))
+    for output_tokens, latency in ((400, 4.0), (600, 12.0), (500, 5.0)):
+        history.record("Claude", 100, output_tokens, latency)
+    # 파일에서 다시 읽어도 같은 기록
+    estimate = estimate_model_call("광고 분석", "Claude", AnalysisHistory(str(path)))
+    assert estimate["samples"] == 3
+    assert estimate["output_tokens"] == 500
+    assert estimate["latency"] == pytest.approx(500 * 0.01)
+    input_price, output_price = pipeline.MODEL_PRICING["Claude"]
+    assert estimate["cost"] == pytest.approx(
+        (estimate["input_tokens"] * input_price + 500 * output_price) / 1_000_000
+    )
+
+
+def test_estimate_analysis_totals(tmp_path):
+    history = AnalysisHistory(str(tmp_path / "history.json"))
+    estimate = estimate_analysis("광고 분석", ["ChatGPT", "Claude"], history)
+    assert estimate["prompt_tokens"] == estimate_tokens("광고 분석")
+    assert estimate["max_prompt_tokens"] == pipeline.PROMPT_MAX_TOKENS
+    assert estimate["total_cost"] == pytest.approx(sum(model["cost"] for model in estimate["models"]))
+    assert estimate["max_latency"] == max(model["latency"] for model in estimate["models"])
+    assert estimate_analysis("광고 분석", [], history)["max_latency"] == 0.0
+
+
+def test_oversized_prompt_is_rejected_before_calling(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("API를 호출하면 안 됨")
+
+    monkeypatch.setattr(pipeline, "get_ai_analysis_cached", fail)
+    campaign = {
+        "brand_name": "테스트",
+        "brand_description": "가" * (pipeline.PROMPT_MAX_TOKENS + 1),
+        "campaign_goal": "브랜드 인지도 향상",
+    }
+    result = run_campaign_analysis(campaign, "ChatGPT")
+    assert result["status"] == "error"
+    assert "프롬프트가 너무 깁니다" in result["error"]
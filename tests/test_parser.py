@@ -0,0 +1,81 @@
+"""parse_ad_recommendations - 예산 배분 형식별 추출과 광고 유형 판별"""
+import pytest
+
+from pipeline import DEFAULT_MEDIA_DISTRIBUTION, parse_ad_recommendations
+
+EXPECTED = {"Google": 35, "Meta": 25, "Naver": 20, "Kakao": 15, "TTD": 5}
+
+
+def distribution(text):
+    return parse_ad_recommendations(text)["media_distribution"]
+
+
+@pytest.mark.parametrize("text", [
+    # 글머리 기호
+    "## 2. 매체별 예산 배분\n- Google: 35%\n- Meta: 25%\n- Naver: 20%\n- Kakao: 15%\n- TTD: 5%\n",
+    # 표
+    "| 매체 | 예산 비율 |\n|---|---|\n| Google | 35% |\n| Meta | 25% |\n| Naver | 20% |\n| Kakao | 15% |\n| TTD | 5% |\n",
+    # 한 줄 나열
+    "예산 배분 제안: Google 35%, Meta 25%, Naver 20%, Kakao 15%, TTD 5%\n",
+    # 값이 매체 앞에 오는 경우
+    "예산 분배\n35% Google, 25% Meta, 20% Naver, 15% Kakao, 5% TTD\n",
+    # 한글 별칭과 대소문자
+    "예산 배분\n- 구글 35%\n- 페이스북 25%\n- 네이버 20%\n- KAKAO 15%\n- The Trade Desk 5%\n",
+])
+def test_budget_formats(text):
+    assert distribution(text) == EXPECTED
+
+
+def test_values_not_multiple_of_five():
+    text = "예산 배분\n- Google: 33%\n- Meta: 12.4%\n- Naver: 26.6%\n- Kakao: 17%\n- TTD: 11%\n"
+    assert distribution(text) == {"Google": 33, "Meta": 12, "Naver": 27, "Kakao": 17, "TTD": 11}
+
+
+def test_range_uses_midpoint():
+    text = "예산 배분\n- Google: 30~40%\n- Meta: 20 - 30 %\n- Naver: 20%\n- Kakao: 15%\n- TTD: 5%\n"
+    assert distribution(text) == EXPECTED
+
+
+def test_zero_percent_is_kept():
+    text = "예산 배분: Google 40% / Meta 30% / Naver 20% / Kakao 10% / TTD 0%\n"
+    assert distribution(text) == {"Google": 40, "Meta": 30, "Naver": 20, "Kakao": 10, "TTD": 0}
+
+
+def test_valid_section_does_not_fall_back_to_defaults():
+    # 합계가 100%인 섹션에 없는 매체는 기본값이 아니라 0
+    text = "예산 배분\n- Google 60%\n- Meta 40%\n"
+    assert distribution(text) == {"Google": 60, "Meta": 40, "Naver": 0, "Kakao": 0, "TTD": 0}
+
+
+def test_decoy_sentences_are_ignored():
+    text = (
+        "Google 검색광고의 클릭 비율은 보통 3.5% 수준입니다.\n"
+        "전환 비율을 보면 Meta 광고가 가장 안정적입니다 (전환율 2%).\n"
+        "네이버와 카카오의 노출 비율은 모바일이 80% 이상을 차지합니다.\n"
+        "## 매체별 예산 배분\n- Google: 35%\n- Meta: 25%\n- Naver: 20%\n- Kakao: 15%\n- TTD: 5%\n"
+    )
+    assert distribution(text) == EXPECTED
+
+
+def test_best_section_wins_when_none_is_perfect():
+    # 모든 매체가 있지 않아도 합계가 맞는 섹션이 합계가 어긋난 앞 섹션보다 우선
+    text = (
+        "매체별 클릭 비율: Google 3%, Meta 2%\n\n\n\n\n\n\n\n\n\n\n\n"
+        "예산 배분\n- Google 50%\n- Meta 30%\n- Naver 20%\n"
+    )
+    assert distribution(text) == {"Google": 50, "Meta": 30, "Naver": 20, "Kakao": 0, "TTD": 0}
+
+
+def test_defaults_without_budget_section():
+    result = parse_ad_recommendations("예산 배분에 대한 언급이 없는 분석입니다.")
+    assert result == {"ad_type": "균형적", "media_distribution": DEFAULT_MEDIA_DISTRIBUTION}
+
+
+@pytest.mark.parametrize("line, ad_type", [
+    ("이 캠페인에는 검색광고가 더 적합합니다.", "검색광고"),
+    ("디스플레이 광고를 추천합니다.", "디스플레이광고"),
+    ("검색 광고와 디스플레이 광고 중 검색 광고가 적절합니다.", "검색광고"),
+    ("검색광고는 비용이 높습니다.", "균형적"),
+])
+def test_ad_type(line, ad_type):
+    assert parse_ad_recommendations(line)["ad_type"] == ad_type
@@ -0,0 +1,200 @@
+"""API 제공자 호출 - 등록, 토큰 버킷, Retry-After 해석과 재시도"""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import json
+
+import pytest
+
+import pipeline
+from pipeline import (
+    Provider,
+    TokenBucket,
+    call_provider_api,
+    extract_chat_delta,
+    extract_chat_text,
+    get_backoff_delay,
+    make_chat_request_builder,
+    parse_retry_after,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None, lines=()):
+        self.status_code = status_code
+        self.body = body or {}
+        self.headers = headers or {}
+        self.lines = lines
+        self.content = json.dumps(self.body).encode("utf-8")
+        self.elapsed = timedelta(milliseconds=5)
+
+    def json(self):
+        return self.body
+
+    def iter_lines(self):
+        return iter(self.lines)
+
+    def close(self):
+        pass
+
+
+def chat_body(text):
+    return {"choices": [{"message": {"content": text}}]}
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """요청 한도가 넉넉한 테스트용 제공자를 등록하고 HTTP 요청과 대기를 가로챔"""
+    test_provider = Provider(
+        "Test", "TEST_API_KEY", "https://test.invalid",
+        make_chat_request_builder("https://test.invalid/v1/chat/completions"),
+        extract_chat_text, extract_chat_delta, requests_per_minute=6000, burst=10
+    )
+    monkeypatch.setitem(pipeline.PROVIDERS, "Test", test_provider)
+    monkeypatch.setitem(pipeline.MODEL_CONFIG, "Test", dict(pipeline.MODEL_CONFIG["ChatGPT"]))
+    monkeypatch.setenv("TEST_API_KEY", "key")
+    monkeypatch.setattr(pipeline, "report_error", lambda message: None)
+    # 대기는 실제로 하지 않고 가짜 시계만 앞으로 돌림
+    clock = [pipeline.time.monotonic()]
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr(pipeline.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(pipeline.time, "sleep", fake_sleep)
+    test_provider.sleeps = sleeps
+    return test_provider
+
+
+def serve(monkeypatch, responses):
+    """순서대로 응답을 돌려주는 http_post로 교체하고 받은 요청 목록을 반환"""
+    calls = []
+    responses = iter(responses)
+
+    def fake_post(url, **kwargs):
+        calls.append((url, kwargs))
+        return next(responses)
+
+    monkeypatch.setattr(pipeline, "http_post", fake_post)
+    return calls
+
+
+def test_registered_model_availability(provider, monkeypatch):
+    assert pipeline.is_model_available("Test")
+    monkeypatch.delenv("TEST_API_KEY")
+    monkeypatch.setitem(pipeline.SECRETS, "TEST_API_KEY", "")
+    assert not pipeline.is_model_available("Test")
+    assert not pipeline.is_model_available("없는 모델")
+
+
+def test_chat_request_builder():
+    url, headers, payload = make_chat_request_builder("https://x.invalid/chat")(
+        "질문", pipeline.MODEL_CONFIG["ChatGPT"], "key", True
+    )
+    assert url == "https://x.invalid/chat"
+    assert headers["Authorization"] == "Bearer key"
+    assert payload["messages"][-1] == {"role": "user", "content": "질문"}
+    assert payload["stream"] is True
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    ("", None),
+    ("7", 7.0),
+    ("1.5", 1.5),
+    ("-3", 0.0),
+    ("곧", None),
+])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    value = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= parse_retry_after(value) <= 30
+
+
+def test_backoff_delay():
+    for attempt in range(8):
+        cap = min(pipeline.API_BACKOFF_MAX, pipeline.API_BACKOFF_BASE * 2 ** attempt)
+        assert cap / 2 <= get_backoff_delay(attempt) <= cap
+    assert 4 <= get_backoff_delay(0, retry_after=4) <= 4 + pipeline.API_BACKOFF_BASE
+
+
+def test_token_bucket_burst_then_deadline():
+    bucket = TokenBucket(rate=1, capacity=3)
+    assert all(bucket.acquire() for _ in range(3))
+    # 다음 토큰은 약 1초 뒤에 생기므로 0.1초 마감 안에서는 얻지 못함
+    assert not bucket.acquire(deadline=pipeline.time.monotonic() + 0.1)
+
+
+def test_token_bucket_throttle_and_recovery():
+    bucket = TokenBucket(rate=10, capacity=5)
+    bucket.on_throttled(retry_after=60)
+    assert bucket.rate == 5
+    assert bucket.tokens == 0
+    assert not bucket.acquire(deadline=pipeline.time.monotonic() + 1)
+    for _ in range(3):
+        bucket.on_throttled()
+    assert bucket.rate == 10 * pipeline.RATE_LIMIT_MIN_RATIO
+    for _ in range(100):
+        bucket.on_success()
+    assert bucket.rate == 10
+
+
+def test_success(provider, monkeypatch):
+    calls = serve(monkeypatch, [FakeResponse(200, chat_body("분석 결과"))])
+    assert call_provider_api("Test", "프롬프트") == "분석 결과"
+    url, kwargs = calls[0]
+    assert url == "https://test.invalid/v1/chat/completions"
+    assert kwargs["json"]["messages"][-1]["content"] == "프롬프트"
+
+
+def test_streaming(provider, monkeypatch):
+    lines = [
+        b'data: {"choices": [{"delta": {"content": "\xeb\xb6\x84"}}]}',
+        b"",
+        b'data: {"choices": [{"delta": {"content": "\xec\x84\x9d"}}]}',
+        b"data: [DONE]",
+    ]
+    serve(monkeypatch, [FakeResponse(200, lines=lines)])
+    tokens = []
+    assert call_provider_api("Test", "프롬프트", on_token=tokens.append) == "분석"
+    assert tokens == ["분", "분석"]
+
+
+def test_retry_honours_retry_after(provider, monkeypatch):
+    calls = serve(monkeypatch, [
+        FakeResponse(429, headers={"Retry-After": "2"}),
+        FakeResponse(503),
+        FakeResponse(200, chat_body("성공")),
+    ])
+    assert call_provider_api("Test", "프롬프트") == "성공"
+    assert len(calls) == 3
+    # 429 뒤에는 호출 제한기가 Retry-After 동안 막고, 백오프도 Retry-After 이상 기다림
+    assert 2 <= provider.sleeps[0] <= 2 + pipeline.API_BACKOFF_BASE
+    assert provider.limiter.rate < provider.limiter.max_rate
+
+
+def test_long_retry_after_fails_fast(provider, monkeypatch):
+    calls = serve(monkeypatch, [FakeResponse(429, headers={"Retry-After": "3600"})])
+    result = call_provider_api("Test", "프롬프트")
+    assert pipeline.is_error_result(result)
+    assert "한도" in result
+    assert len(calls) == 1
+
+
+def test_client_error_is_not_retried(provider, monkeypatch):
+    calls = serve(monkeypatch, [FakeResponse(400, {"error": {"message": "잘못된 모델"}})])
+    result = call_provider_api("Test", "프롬프트")
+    assert result == "오류: Test API 요청 오류: 잘못된 모델"
+    assert len(calls) == 1
+
+
+def test_retries_exhausted(provider, monkeypatch):
+    calls = serve(monkeypatch, [FakeResponse(500)] * (pipeline.API_MAX_RETRIES + 1))
+    result = call_provider_api("Test", "프롬프트")
+    assert result == "오류: Test API 호출 오류: 500"
+    assert len(calls) == pipeline.API_MAX_RETRIES + 1
+    assert len(provider.sleeps) == pipeline.API_MAX_RETRIES
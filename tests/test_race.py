@@ -0,0 +1,84 @@
+"""가장 빠른 응답 모드 - 예비 요청, 파싱 실패 응답 건너뛰기, 마감 시각"""
+import time
+
+import pipeline
+from pipeline import is_parsed_analysis, race_ai_analysis
+
+GOOD = "검색광고를 추천합니다.\n예산 배분\n- Google 60%\n- Meta 40%\n"
+UNPARSED = "죄송하지만 지금은 추천하기 어렵습니다."
+
+
+def make_analyze(responses):
+    """모델별 (지연 초, 텍스트)로 응답하는 analyze와 호출된 모델 목록"""
+    called = []
+
+    def analyze(model_name):
+        called.append(model_name)
+        delay, text = responses[model_name]
+        time.sleep(delay)
+        return text, False
+
+    return analyze, called
+
+
+def test_first_model_wins_without_hedging():
+    analyze, called = make_analyze({"A": (0, GOOD), "B": (0, GOOD)})
+    model_name, text, cached, failures = race_ai_analysis(analyze, ["A", "B"], hedge_delay=1)
+    assert (model_name, text, cached, failures) == ("A", GOOD, False, {})
+    assert called == ["A"]
+
+
+def test_slow_model_is_hedged():
+    analyze, called = make_analyze({"A": (1, GOOD), "B": (0, GOOD)})
+    model_name, _, _, _ = race_ai_analysis(analyze, ["A", "B"], hedge_delay=0.05)
+    assert model_name == "B"
+    assert called == ["A", "B"]
+
+
+def test_error_and_unparsed_responses_fall_through():
+    analyze, called = make_analyze({"A": (0, "오류: 연결 실패"), "B": (0, UNPARSED), "C": (0, GOOD)})
+    model_name, _, _, failures = race_ai_analysis(analyze, ["A", "B", "C"], hedge_delay=1, accept=is_parsed_analysis)
+    assert model_name == "C"
+    assert called == ["A", "B", "C"]
+    assert failures == {"A": "오류: 연결 실패", "B": f"오류: {pipeline.RACE_UNPARSED_MESSAGE}"}
+
+
+def test_all_failed():
+    analyze, _ = make_analyze({"A": (0, UNPARSED), "B": (0, "오류: 한도 초과")})
+    model_name, text, _, failures = race_ai_analysis(analyze, ["A", "B"], hedge_delay=0, accept=is_parsed_analysis)
+    assert (model_name, text) == (None, None)
+    assert set(failures) == {"A", "B"}
+
+
+def test_deadline():
+    analyze, _ = make_analyze({"A": (0.5, GOOD)})
+    model_name, _, _, failures = race_ai_analysis(analyze, ["A"], deadline=time.monotonic() + 0.05)
+    assert model_name is None
+    assert pipeline.is_timeout_result(failures["A"])
+
+
+def test_empty_wait_without_pending_models(monkeypatch):
+    # 마감 시각 전에 wait가 완료된 요청 없이 돌아와도 남은 모델이 없으면 다시 기다림
+    real_wait = pipeline.wait
+    empty_waits = [1]
+
+    def flaky_wait(futures, timeout=None, return_when=None):
+        if empty_waits:
+            empty_waits.pop()
+            return set(), set(futures)
+        return real_wait(futures, timeout=timeout, return_when=return_when)
+
+    monkeypatch.setattr(pipeline, "wait", flaky_wait)
+    analyze, _ = make_analyze({"A": (0.01, GOOD)})
+    model_name, _, _, _ = race_ai_analysis(analyze, ["A"], deadline=time.monotonic() + 5)
+    assert model_name == "A"
+
+
+def test_is_parsed_analysis(monkeypatch):
+    monkeypatch.setattr(pipeline, "STRUCTURED_OUTPUT", True)
+    assert is_parsed_analysis(GOOD)
+    assert is_parsed_analysis(
+        '{"analysis": "분석", "ad_type": "균형적", "media_distribution": {"Google": 100},'
+        ' "creatives": [], "ad_copies": []}'
+    )
+    assert not is_parsed_analysis(UNPARSED)
@@ -0,0 +1,71 @@
+"""예산 배분 최적화와 시나리오 분석 - 시뮬레이션 기간/집계 단위 반영"""
+import numpy as np
+import pytest
+
+from pipeline import (
+    AD_TYPES,
+    DEFAULT_MEDIA_DISTRIBUTION,
+    evaluate_media_splits,
+    generate_simulation_results,
+    get_channel_shares,
+    optimize_media_distribution,
+    run_scenario_sweep,
+)
+
+CAMPAIGN = {"brand_description": "20~30대 직장인을 위한 스페셜티 커피 구독 서비스입니다."}
+BASELINE = get_channel_shares(DEFAULT_MEDIA_DISTRIBUTION)[None, :]
+
+
+def expected(objective, horizon_days, granularity):
+    return evaluate_media_splits(
+        BASELINE, CAMPAIGN, AD_TYPES[0], objective, horizon_days=horizon_days, granularity=granularity
+    )[0]
+
+
+def test_expected_conversions_follow_the_horizon():
+    twelve_weeks = expected("conversions", 84, "week")
+    assert expected("conversions", 364, "week") > 3 * twelve_weeks
+    # 같은 기간이면 일 단위 합계도 주 단위와 거의 같음
+    assert expected("conversions", 84, "day") == pytest.approx(twelve_weeks, rel=0.02)
+
+
+@pytest.mark.parametrize("horizon_days, granularity", [(84, "week"), (84, "day"), (364, "day")])
+def test_expected_values_match_the_simulation(horizon_days, granularity):
+    simulation = generate_simulation_results(
+        CAMPAIGN, AD_TYPES[0], runs=2000, seed=0, horizon_days=horizon_days, granularity=granularity
+    )
+    assert expected("conversions", horizon_days, granularity) == pytest.approx(
+        simulation.total_conversions, rel=0.03
+    )
+    assert expected("reach", horizon_days, granularity) == pytest.approx(simulation.final_reach, rel=0.05)
+
+
+def test_daily_reach_is_the_last_day():
+    assert expected("reach", 84, "day") < expected("reach", 84, "week") / 3
+
+
+def test_optimizer_uses_the_horizon():
+    weekly = optimize_media_distribution(CAMPAIGN, AD_TYPES[0], objective="reach", horizon_days=84, granularity="week")
+    daily = optimize_media_distribution(CAMPAIGN, AD_TYPES[0], objective="reach", horizon_days=84, granularity="day")
+    assert daily["baseline_value"] == pytest.approx(expected("reach", 84, "day"))
+    assert weekly["baseline_value"] == pytest.approx(expected("reach", 84, "week"))
+    assert daily["expected_value"] >= daily["baseline_value"]
+
+
+def test_sweep_is_cached_per_horizon():
+    weekly = run_scenario_sweep(sampled_splits=10, horizon_days=84, granularity="week")
+    assert run_scenario_sweep(sampled_splits=10, horizon_days=84, granularity="week") is weekly
+    daily = run_scenario_sweep(sampled_splits=10, horizon_days=84, granularity="day")
+    year = run_scenario_sweep(sampled_splits=10, horizon_days=365, granularity="week")
+    assert len({weekly.digest, daily.digest, year.digest}) == 3
+    assert (daily.granularity, daily.period_count) == ("day", 84)
+    np.testing.assert_allclose(daily.metrics["conversions"], weekly.metrics["conversions"], rtol=0.02)
+    assert np.all(daily.metrics["reach"] < weekly.metrics["reach"])
+    assert np.all(year.metrics["conversions"] > weekly.metrics["conversions"])
+    # 전환 단가의 집행 예산도 시뮬레이션 기간 기준
+    spend_ratio = year.period_count / weekly.period_count
+    np.testing.assert_allclose(
+        year.metrics["cpa"] / weekly.metrics["cpa"],
+        spend_ratio * weekly.metrics["conversions"] / year.metrics["conversions"],
+        rtol=1e-6,
+    )
@@ -0,0 +1,80 @@
+"""generate_simulation_results - 몬테카를로 밴드와 매체별 결과"""
+import numpy as np
+import pytest
+
+from pipeline import (
+    AD_TYPES,
+    MEDIA_CHANNELS,
+    SIMULATION_BAND_METRICS,
+    generate_simulation_results,
+    percentiles_along_runs,
+)
+
+CAMPAIGN = {"brand_description": "20~30대 직장인을 위한 스페셜티 커피 구독 서비스입니다."}
+
+
+def simulate(**kwargs):
+    kwargs.setdefault("runs", 2000)
+    kwargs.setdefault("seed", 0)
+    return generate_simulation_results(CAMPAIGN, AD_TYPES[0], **kwargs)
+
+
+def test_weekly_result_shape():
+    result = simulate()
+    assert result.granularity == "week"
+    assert result.period_count == 12
+    assert result.runs == 2000
+    assert result.periods["week"].tolist() == list(range(1, 13))
+    assert result.channels["channel"].tolist() == MEDIA_CHANNELS
+    assert result.channels["period_conversions"].shape == (len(MEDIA_CHANNELS), 12)
+
+
+@pytest.mark.parametrize("metric", SIMULATION_BAND_METRICS)
+def test_bands_are_ordered(metric):
+    periods = simulate().periods
+    assert np.all(periods[f"{metric}_p5"] <= periods[metric])
+    assert np.all(periods[metric] <= periods[f"{metric}_p95"])
+    # 반복 실행이므로 밴드 폭이 0이 아님
+    assert np.any(periods[f"{metric}_p5"] < periods[f"{metric}_p95"])
+
+
+def test_seed_makes_results_reproducible():
+    assert simulate(seed=1).digest == simulate(seed=1).digest
+    assert simulate(seed=1).digest != simulate(seed=2).digest
+
+
+def test_totals_match_period_columns():
+    result = simulate()
+    assert result.total_conversions == result.periods["conversions"].sum()
+    assert result.final_reach == result.periods["reach"][-1]
+    assert 0 < result.final_reach <= 0.95
+
+
+def test_zero_share_channel_gets_nothing():
+    distribution = {"Google": 50, "Meta": 50, "Naver": 0, "Kakao": 0, "TTD": 0}
+    channels = simulate(media_distribution=distribution).channels
+    for name in ("Naver", "Kakao", "TTD"):
+        index = MEDIA_CHANNELS.index(name)
+        assert channels["spend"][index] == 0
+        assert channels["impressions"][index] == 0
+        assert channels["conversions"][index] == 0
+
+
+def test_more_runs_narrow_the_median_noise():
+    # 반복 횟수가 충분하면 시드가 달라도 중앙값이 거의 같음
+    first = simulate(runs=10000, seed=1).total_conversions
+    second = simulate(runs=10000, seed=2).total_conversions
+    assert abs(first - second) / first < 0.01
+
+
+def test_daily_horizon_keeps_requested_runs():
+    result = simulate(horizon_days=730, granularity="day")
+    assert result.runs == 2000
+    assert result.period_count == 730
+
+
+@pytest.mark.parametrize("shape", [(7, 1000), (2, 3, 10), (5, 1)])
+def test_percentiles_match_numpy(shape):
+    values = np.random.default_rng(0).integers(0, 20, shape).astype(float)
+    expected = np.percentile(values, (5, 50, 95), axis=-1)
+    np.testing.assert_allclose(percentiles_along_runs(values.copy(), (5, 50, 95)), expected)
@@ -0,0 +1,104 @@
+"""동일 요청 합치기(single-flight) - 호출 공유, 마감 시각, 재시도, 구독 해제"""
+import threading
+import time
+
+import pytest
+
+from pipeline import DeadlineExceeded, SingleFlight
+
+
+class BlockingCall:
+    """release될 때까지 멈춰 있다가 results를 순서대로 반환하는 호출"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def __call__(self, fan_out):
+        self.calls += 1
+        if fan_out:
+            fan_out("부분")
+        self.started.set()
+        self.release.wait(5)
+        return self.results.pop(0)
+
+
+def start_leader(flight, call, key="key"):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(flight.do(key, call, on_token=lambda text: None)))
+    thread.start()
+    assert call.started.wait(5)
+    return thread, results
+
+
+def test_follower_shares_the_leader_call():
+    flight = SingleFlight()
+    call = BlockingCall("결과")
+    leader, leader_results = start_leader(flight, call)
+    tokens = []
+    threading.Timer(0.05, call.release.set).start()
+    assert flight.do("key", call, on_token=tokens.append) == ("결과", True)
+    leader.join(5)
+    assert leader_results == [("결과", False)]
+    assert call.calls == 1
+    assert tokens == ["부분", "결과"]
+
+
+def test_follower_deadline_removes_its_listener():
+    flight = SingleFlight()
+    call = BlockingCall("결과")
+    leader, _ = start_leader(flight, call)
+    listener = []
+    with pytest.raises(DeadlineExceeded):
+        flight.do("key", call, on_token=listener.append, deadline=time.monotonic() + 0.05)
+    assert listener.append not in flight._flights["key"].listeners
+    assert len(flight._flights["key"].listeners) == 1
+    call.release.set()
+    leader.join(5)
+    assert listener == ["부분"]
+
+
+def test_follower_retries_after_leader_timeout():
+    flight = SingleFlight()
+    call = BlockingCall("오류: 시간 초과", "결과")
+    leader, leader_results = start_leader(flight, call)
+    threading.Timer(0.05, call.release.set).start()
+    result = flight.do(
+        "key", call, on_token=lambda text: None, deadline=time.monotonic() + 5,
+        retry=lambda text: text.startswith("오류")
+    )
+    leader.join(5)
+    assert leader_results == [("오류: 시간 초과", False)]
+    # 먼저 시작된 호출이 시간 초과로 끝나 이번 호출이 직접 다시 호출
+    assert result == ("결과", False)
+    assert call.calls == 2
+    assert "key" not in flight._flights
+
+
+def test_leader_error_is_shared():
+    flight = SingleFlight()
+    gate = threading.Event()
+
+    def failing_call(fan_out):
+        gate.wait(5)
+        raise RuntimeError("연결 실패")
+
+    errors = []
+
+    def leader():
+        try:
+            flight.do("key", failing_call)
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    while "key" not in flight._flights:
+        time.sleep(0.001)
+    threading.Timer(0.05, gate.set).start()
+    with pytest.raises(RuntimeError, match="연결 실패"):
+        flight.do("key", failing_call)
+    thread.join(5)
+    assert len(errors) == 1
@@ -0,0 +1,75 @@
+"""구조화된(JSON) 응답 - 스키마 검증, 텍스트 파싱 대체, 스트리밍 중간 텍스트"""
+import json
+
+import pytest
+
+import pipeline
+from pipeline import (
+    build_analysis_entry,
+    extract_json_object,
+    extract_partial_analysis,
+    validate_structured_analysis,
+)
+
+RESPONSE = {
+    "analysis": "## 1. 광고 유형\n검색광고를 추천합니다.",
+    "ad_type": "검색광고",
+    "media_distribution": {"Google": 40, "Meta": "30%", "Naver": 20, "Kakao": 10, "TTD": 0},
+    "creatives": [{"type": "배너", "count": "3"}],
+    "ad_copies": ["지금 시작하세요"],
+}
+
+
+def test_valid_response():
+    entry = validate_structured_analysis(RESPONSE)
+    assert entry["raw_text"] == RESPONSE["analysis"]
+    assert entry["parsed_data"] == {
+        "ad_type": "검색광고",
+        "media_distribution": {"Google": 40, "Meta": 30, "Naver": 20, "Kakao": 10, "TTD": 0},
+        "creatives": [{"type": "배너", "count": 3}],
+        "ad_copies": ["지금 시작하세요"],
+    }
+
+
+@pytest.mark.parametrize("change", [
+    {"analysis": " "},
+    {"ad_type": "동영상광고"},
+    {"media_distribution": [40, 30, 20, 10, 0]},
+    {"media_distribution": {"Google": "많이"}},
+    {"media_distribution": {"Google": -10, "Meta": 110}},
+    {"media_distribution": {"Google": 0}},
+    {"creatives": [{"count": 3}]},
+    {"ad_copies": "지금 시작하세요"},
+])
+def test_invalid_response(change):
+    with pytest.raises(ValueError):
+        validate_structured_analysis({**RESPONSE, **change})
+
+
+def test_json_inside_code_block():
+    text = "다음은 결과입니다.\n```json\n" + json.dumps(RESPONSE, ensure_ascii=False) + "\n```"
+    assert extract_json_object(text) == RESPONSE
+
+
+def test_entry_falls_back_to_text_parsing(monkeypatch):
+    monkeypatch.setattr(pipeline, "STRUCTURED_OUTPUT", True)
+    structured = build_analysis_entry(json.dumps(RESPONSE, ensure_ascii=False))
+    assert structured["structured"] is True
+    text = "검색광고가 적합합니다.\n예산 배분\n- Google 60%\n- Meta 40%\n"
+    fallback = build_analysis_entry(text)
+    assert fallback["structured"] is False
+    assert fallback["raw_text"] == text
+    assert fallback["parsed_data"]["media_distribution"]["Google"] == 60
+
+
+@pytest.mark.parametrize("partial, expected", [
+    ("일반 텍스트 응답", "일반 텍스트 응답"),
+    ('{"ad_type": "검색광고", ', None),
+    ('{"analysis": "## 분석\\n검색', "## 분석\n검색"),
+    ('```json\n{"analysis": "따옴표 \\"인용\\" 끝', '따옴표 "인용" 끝'),
+    # 잘린 이스케이프는 완전한 문자까지만
+    ('{"analysis": "가나\\u00', "가나"),
+    ('{"analysis": "가나\\', "가나"),
+])
+def test_partial_analysis(partial, expected):
+    assert extract_partial_analysis(partial) == expected